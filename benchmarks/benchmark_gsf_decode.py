@@ -0,0 +1,87 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import sys
+import pathlib
+import argparse
+import tempfile
+from struct import unpack
+import numpy as np
+this_files_path = pathlib.Path(__file__).parent.absolute()
+src_path = this_files_path.parent / 'src'
+sys.path.insert(0, str(src_path))
+from snom_analysis.lib.file_handling import read_gsf_data
+from snom_analysis.lib.additional_functions import round_array
+from synthetic_data import write_gsf, time_function
+
+'''
+Measures the decoding of the binary data block of .gsf files.
+The data block is read with one numpy call and scaled and rounded as a whole array,
+for comparison the per-pixel struct.unpack and round loop which was used before is timed as well.
+The script fails if both decoders do not return identical arrays.
+Run it with 'python benchmarks/benchmark_gsf_decode.py'.
+'''
+
+def decode_per_pixel(filepath, xres:int, yres:int, scaling:float, phase_offset:float, rounding_decimal:int) -> np.ndarray:
+    """The previous decoder, every pixel is unpacked, scaled and rounded individually."""
+    with open(filepath, 'br') as f:
+        binarydata = f.read()
+    datasize = int(xres*yres*4)
+    reduced_binarydata = binarydata[-datasize:]
+    channel_data = np.zeros((yres, xres))
+    for y in range(0, yres):
+        for x in range(0, xres):
+            pixval = unpack('f', reduced_binarydata[4*(y*xres+x):4*(y*xres+x+1)])[0]
+            channel_data[y][x] = round(pixval*scaling + phase_offset, rounding_decimal)
+    return channel_data
+
+def decode_array(filepath, xres:int, yres:int, scaling:float, phase_offset:float, rounding_decimal:int) -> np.ndarray:
+    """The current decoder used by SnomMeasurement."""
+    return round_array(read_gsf_data(filepath, xres, yres)*scaling + phase_offset, rounding_decimal)
+
+def main():
+    parser = argparse.ArgumentParser(description='Decoding of .gsf data blocks')
+    parser.add_argument('--resolution', type=int, default=256, help='number of pixels in x and y direction')
+    parser.add_argument('--repeats', type=int, default=3, help='number of runs per measurement, the fastest is reported')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # amplitude, phase with offset and height in nm, with the rounding decimals of the default config
+    cases = {
+        'amplitude': (rng.random((args.resolution, args.resolution))*3, 1, 0, 5),
+        'phase': (rng.random((args.resolution, args.resolution))*2*np.pi - np.pi, 1, np.pi, 5),
+        'height': (rng.random((args.resolution, args.resolution))*1e-8, 1e9, 0, 2),
+    }
+    identical = True
+    with tempfile.TemporaryDirectory() as folder:
+        for name, (data, scaling, phase_offset, rounding_decimal) in cases.items():
+            filepath = pathlib.Path(folder) / f'{name}.gsf'
+            write_gsf(filepath, data, name, 1e-5, 1e-5)
+            parameters = (filepath, args.resolution, args.resolution, scaling, phase_offset, rounding_decimal)
+            per_pixel, reference = time_function(decode_per_pixel, args.repeats, *parameters)
+            vectorized, result = time_function(decode_array, args.repeats, *parameters)
+            identical &= np.array_equal(reference, result)
+            print(f'{name:10s} per pixel: {per_pixel*1000:8.1f} ms   numpy: {vectorized*1000:8.1f} ms   speedup: {per_pixel/vectorized:6.1f}x')
+    if not identical:
+        print('The numpy decoder does not return the same data as the per-pixel decoder!')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
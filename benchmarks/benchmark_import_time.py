@@ -0,0 +1,83 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import subprocess
+import sys
+import pathlib
+import argparse
+this_files_path = pathlib.Path(__file__).parent.absolute()
+src_path = this_files_path.parent / 'src'
+
+'''
+Measures the cold start time of 'import snom_analysis.main' in fresh python processes.
+The plotting and gui dependencies are only imported when they are used, so batch scripts which only load, correct and save data do not pay for them.
+For comparison the same import is timed with all dependencies imported eagerly, like it was done before,
+and the script fails if one of the plotting or gui modules is imported by the package itself.
+Run it with 'python benchmarks/benchmark_import_time.py'.
+'''
+
+# modules which should not be imported by the data path
+DEFERRED_MODULES = ['matplotlib', 'tkinter', 'PIL', 'skimage', 'imageio', 'mpl_point_clicker', 'matplotlib_scalebar', 'colorcet', 'scipy.signal', 'scipy.optimize']
+# the modules which were imported by snom_analysis.main before the imports were deferred
+EAGER_IMPORTS = 'import matplotlib.pyplot, matplotlib.animation, matplotlib_scalebar.scalebar, mpl_point_clicker, mpl_toolkits.axes_grid1, imageio, skimage, PIL.Image, scipy.ndimage, scipy.optimize, scipy.signal, tkinter'
+
+def time_import(statement:str, repeats:int) -> float:
+    """Returns the fastest of several import times, each measured in a new python process."""
+    code = f'''
+import sys, time
+sys.path.insert(0, {str(src_path)!r})
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+'''
+    times = []
+    for i in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+def get_imported_modules() -> list:
+    """Returns the deferred modules which are imported by 'import snom_analysis.main'."""
+    code = f'''
+import sys
+sys.path.insert(0, {str(src_path)!r})
+import snom_analysis.main
+print(','.join(name for name in {DEFERRED_MODULES!r} if name in sys.modules))
+'''
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return output[-1].split(',') if output and output[-1] else []
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start time of snom_analysis.main')
+    parser.add_argument('--repeats', type=int, default=5, help='number of python processes per measurement, the fastest is reported')
+    args = parser.parse_args()
+
+    imported_modules = get_imported_modules()
+    headless = time_import('import snom_analysis.main', args.repeats)
+    eager = time_import(f'{EAGER_IMPORTS}\nimport snom_analysis.main', args.repeats)
+    print(f'import snom_analysis.main (deferred imports): {headless*1000:8.1f} ms')
+    print(f'import snom_analysis.main (eager imports):    {eager*1000:8.1f} ms')
+    print(f'speedup: {eager/headless:.1f}x')
+    if imported_modules:
+        print(f'The following modules should be imported lazily but were imported by snom_analysis.main: {imported_modules}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import os
+import sys
+import pathlib
+import argparse
+import tempfile
+import numpy as np
+this_files_path = pathlib.Path(__file__).parent.absolute()
+src_path = this_files_path.parent / 'src'
+sys.path.insert(0, str(src_path))
+os.environ.setdefault('MPLBACKEND', 'agg')
+from snom_analysis.main import SnomMeasurement
+from synthetic_data import create_snom_measurement, time_function, OPTICAL_CHANNELS
+
+'''
+Measures the loading of a measurement with many channels, once sequentially and once with parallel=True,
+where the channel headers and data blocks are read in a thread pool.
+The speedup depends on the number of cores and the speed of the storage, on a single core no speedup is expected.
+The script fails if both loads do not return the same channels and data.
+Run it with 'python benchmarks/benchmark_parallel_loading.py'.
+'''
+
+CHANNELS = OPTICAL_CHANNELS + ['Z C']
+
+def load(folder, parallel:bool, max_workers) -> SnomMeasurement:
+    return SnomMeasurement(folder, channels=CHANNELS, autoscale=False, parallel=parallel, max_workers=max_workers)
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential and parallel loading of a measurement')
+    parser.add_argument('--resolution', type=int, default=512, help='number of pixels in x and y direction')
+    parser.add_argument('--repeats', type=int, default=3, help='number of loads per measurement, the fastest is reported')
+    parser.add_argument('--max_workers', type=int, default=None, help='number of threads for the parallel load, defaults to the executor default')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        folder = create_snom_measurement(pathlib.Path(temp_folder) / 'benchmark_measurement', args.resolution, args.resolution)
+        # the first load identifies the filetype, this is cached and not part of the measurement
+        load(folder, False, None)
+        serial, reference = time_function(load, args.repeats, folder, False, None)
+        parallel, result = time_function(load, args.repeats, folder, True, args.max_workers)
+    identical = reference.channels == result.channels and all(np.array_equal(a, b) for a, b in zip(reference.all_data, result.all_data))
+    print(f'{len(CHANNELS)} channels of {args.resolution}x{args.resolution} pixels on {os.cpu_count()} cores')
+    print(f'sequential: {serial*1000:8.1f} ms')
+    print(f'parallel:   {parallel*1000:8.1f} ms')
+    print(f'speedup: {serial/parallel:.1f}x')
+    if not identical:
+        print('The parallel load does not return the same data as the sequential load!')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
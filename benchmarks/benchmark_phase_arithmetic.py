@@ -0,0 +1,96 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import sys
+import pathlib
+import argparse
+import numpy as np
+this_files_path = pathlib.Path(__file__).parent.absolute()
+src_path = this_files_path.parent / 'src'
+sys.path.insert(0, str(src_path))
+from snom_analysis.lib import phase_analysis
+from synthetic_data import time_function
+
+'''
+Measures the phase arithmetic used by shift_phase, the phase drift corrections and the complex filters.
+The helpers in phase_analysis work on the whole array, for comparison the per-pixel loops which were used before are timed as well.
+The script fails if the helpers do not return identical arrays.
+Run it with 'python benchmarks/benchmark_phase_arithmetic.py'.
+'''
+
+def shift_phase_per_pixel(data:np.ndarray, shift:float) -> np.ndarray:
+    """The previous _shift_phase_data, changes the data in place."""
+    yres = len(data)
+    xres = len(data[0])
+    for y in range(yres):
+        for x in range(xres):
+            data[y][x] = (data[y][x] + shift) % (2*np.pi)
+    return data
+
+def level_phase_slope_per_pixel(data:np.ndarray, slope:float) -> np.ndarray:
+    """The previous _level_phase_slope, changes the data in place."""
+    yres = len(data)
+    xres = len(data[0])
+    for y in range(yres):
+        for x in range(xres):
+            data[y][x] -= y*slope
+    return shift_phase_per_pixel(data, 0)
+
+def complex_to_phase_per_pixel(compl_number_array:np.ndarray) -> np.ndarray:
+    """The previous _get_compl_angle."""
+    YRes = len(compl_number_array)
+    XRes = len(compl_number_array[0])
+    realpart = compl_number_array.real
+    imagpart = compl_number_array.imag
+    r = np.sqrt(pow(imagpart, 2) + pow(realpart, 2))
+    phase = np.arctan2(r*imagpart, r*realpart)
+    for i in range(YRes):
+        for j in range(XRes):
+            if phase[i][j] < 0:
+                phase[i][j]+=2*np.pi
+    return phase
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-pixel and array phase arithmetic')
+    parser.add_argument('--resolution', type=int, default=512, help='number of pixels in x and y direction')
+    parser.add_argument('--repeats', type=int, default=3, help='number of runs per measurement, the fastest is reported')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    phase = rng.random((args.resolution, args.resolution))*2*np.pi
+    amp = rng.random((args.resolution, args.resolution))*3
+    compl = phase_analysis.amp_phase_to_complex(amp, phase)
+    cases = {
+        'shift_phase': (shift_phase_per_pixel, lambda data, shift: phase_analysis.shift_phase(data, shift, inplace=True), phase, (1.3,)),
+        'level_phase_slope': (level_phase_slope_per_pixel, lambda data, slope: phase_analysis.level_phase_slope(data, slope, inplace=True), phase, (0.01,)),
+        'complex_to_phase': (complex_to_phase_per_pixel, phase_analysis.complex_to_phase, compl, ()),
+    }
+    identical = True
+    for name, (old_function, new_function, data, parameters) in cases.items():
+        per_pixel, reference = time_function(old_function, args.repeats, data, *parameters, copy_data=True)
+        vectorized, result = time_function(new_function, args.repeats, data, *parameters, copy_data=True)
+        identical &= np.array_equal(reference, result)
+        print(f'{name:18s} per pixel: {per_pixel*1000:8.1f} ms   array: {vectorized*1000:8.2f} ms   speedup: {per_pixel/vectorized:7.1f}x')
+    if not identical:
+        print('The array helpers do not return the same data as the per-pixel loops!')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
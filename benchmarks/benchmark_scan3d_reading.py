@@ -0,0 +1,95 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import io
+import sys
+import pathlib
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+this_files_path = pathlib.Path(__file__).parent.absolute()
+src_path = this_files_path.parent / 'src'
+sys.path.insert(0, str(src_path))
+from snom_analysis.lib.file_handling import read_columns
+from synthetic_data import time_function
+
+'''
+Measures the reading of the text datafile of a 3D scan.
+read_columns reads all requested channels in a single pass over the file, like Scan3D does,
+for comparison the file is also read with one np.genfromtxt call per channel like it was done before.
+The default file is larger than one read chunk, so the progress output of the chunked reader is included.
+The script fails if both readers do not return identical columns.
+Run it with 'python benchmarks/benchmark_scan3d_reading.py'.
+'''
+
+HEADER = ['# Scan:\t3D', '# Pixel Area (X, Y, Z):\t[px]\t100\t1\t100', '# Version:\t1.10.9592.0']
+COLUMNS = ['Row', 'Column', 'Run', 'Z', 'M1A', 'M1P', 'O1A', 'O1P', 'O2A', 'O2P', 'O3A', 'O3P']
+CHANNELS = ['Z', 'M1A', 'O1A', 'O1P', 'O2A', 'O2P', 'O3A', 'O3P']
+
+def create_datafile(filepath, rows:int, seed:int=0) -> None:
+    """Writes a tab separated datafile with the header and columns of a 3D scan."""
+    rng = np.random.default_rng(seed)
+    data = rng.random((rows, len(COLUMNS)))
+    with open(filepath, 'w') as file:
+        file.write('\n'.join(HEADER) + '\n')
+        file.write('\t'.join(COLUMNS) + '\t\n')
+        np.savetxt(file, data, fmt='%.8e', delimiter='\t', newline='\t\n')
+
+def read_per_channel(filepath, header_length:int, channels:list) -> dict:
+    """The previous reader, the whole file is parsed once per channel."""
+    data = {}
+    for channel in channels:
+        with open(filepath, 'r') as file:
+            for i in range(header_length):
+                file.readline()
+            index = file.readline().split('\t').index(channel)
+        with open(filepath, 'r') as file:
+            data[channel] = np.genfromtxt(file, skip_header=header_length+1, usecols=(index), delimiter='\t', invalid_raise=False)
+    return data
+
+def read_single_pass(filepath, header_length:int, channels:list) -> dict:
+    """The current reader used by Scan3D."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return read_columns(filepath, header_length, channels, show_progress=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Reading the text datafile of a 3D scan')
+    parser.add_argument('--rows', type=int, default=200000, help='number of data lines in the file')
+    parser.add_argument('--repeats', type=int, default=1, help='number of runs per measurement, the fastest is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        filepath = pathlib.Path(folder) / 'scan3d.txt'
+        create_datafile(filepath, args.rows)
+        size = filepath.stat().st_size
+        per_channel, reference = time_function(read_per_channel, args.repeats, filepath, len(HEADER), CHANNELS)
+        single_pass, result = time_function(read_single_pass, args.repeats, filepath, len(HEADER), CHANNELS)
+    identical = all(np.array_equal(reference[channel], result[channel]) for channel in CHANNELS)
+    print(f'{len(CHANNELS)} of {len(COLUMNS)} columns, {args.rows} rows, {size/1024**2:.1f} MiB')
+    print(f'genfromtxt per channel: {per_channel*1000:8.1f} ms')
+    print(f'single pass:            {single_pass*1000:8.1f} ms')
+    print(f'speedup: {per_channel/single_pass:.1f}x')
+    if not identical:
+        print('The single pass reader does not return the same data as genfromtxt!')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
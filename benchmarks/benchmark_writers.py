@@ -0,0 +1,102 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import os
+import sys
+import pathlib
+import argparse
+import tempfile
+from struct import pack
+this_files_path = pathlib.Path(__file__).parent.absolute()
+src_path = this_files_path.parent / 'src'
+sys.path.insert(0, str(src_path))
+os.environ.setdefault('MPLBACKEND', 'agg')
+from snom_analysis.main import SnomMeasurement
+from synthetic_data import create_snom_measurement, time_function
+
+'''
+Measures the writing of channels to .gsf and .txt files.
+The current writers round and convert the whole array and write it with a single call,
+for comparison the per-pixel writers which were used before are timed as well.
+The script fails if the old and new writers do not create identical files.
+Run it with 'python benchmarks/benchmark_writers.py'.
+'''
+
+CHANNELS = ['O2A', 'O2P', 'Z C']
+
+def write_gsf_per_pixel(measurement:SnomMeasurement, channel:str, filepath) -> None:
+    """The previous .gsf writer, every pixel is rounded and packed individually."""
+    data = measurement.all_data[measurement.channels.index(channel)]
+    XRes = len(data[0])
+    YRes = len(data)
+    header, NUL = measurement._create_header(channel)
+    with open(filepath, 'bw') as file:
+        file.write(header.encode('utf-8'))
+        file.write(NUL)
+        if measurement.height_indicator in channel:
+            for y in range(YRes):
+                for x in range(XRes):
+                    file.write(pack('f', round(data[y][x],5)*pow(10,-9)))
+        else:
+            for y in range(YRes):
+                for x in range(XRes):
+                    file.write(pack('f', round(data[y][x], 5)))
+
+def write_txt_per_pixel(measurement:SnomMeasurement, channel:str, filepath) -> None:
+    """The previous .txt writer, every pixel is rounded and written individually."""
+    data = measurement.all_data[measurement.channels.index(channel)]
+    XRes = len(data[0])
+    YRes = len(data)
+    header, NUL = measurement._create_header(channel, 'txt')
+    with open(filepath, 'w') as file:
+        file.write(header)
+        for y in range(YRes):
+            for x in range(XRes):
+                file.write(f'{round(data[y][x], 5)} ')
+
+def main():
+    parser = argparse.ArgumentParser(description='Writing channels to .gsf and .txt files')
+    parser.add_argument('--resolution', type=int, default=256, help='number of pixels in x and y direction')
+    parser.add_argument('--repeats', type=int, default=3, help='number of runs per measurement, the fastest is reported')
+    args = parser.parse_args()
+
+    identical = True
+    with tempfile.TemporaryDirectory() as temp_folder:
+        temp_folder = pathlib.Path(temp_folder)
+        folder = create_snom_measurement(temp_folder / 'benchmark_measurement', args.resolution, args.resolution)
+        measurement = SnomMeasurement(folder, channels=CHANNELS, autoscale=False)
+        writers = {
+            'gsf': (write_gsf_per_pixel, measurement._write_gsf_file),
+            'txt': (write_txt_per_pixel, measurement._write_txt_file),
+        }
+        for file_ending, (old_writer, new_writer) in writers.items():
+            for channel in CHANNELS:
+                old_path = temp_folder / f'old_{channel}.{file_ending}'
+                new_path = temp_folder / f'new_{channel}.{file_ending}'
+                per_pixel, _ = time_function(old_writer, args.repeats, measurement, channel, old_path, quiet=True)
+                vectorized, _ = time_function(new_writer, args.repeats, channel, new_path, quiet=True)
+                identical &= old_path.read_bytes() == new_path.read_bytes()
+                print(f'{file_ending} {channel:4s} per pixel: {per_pixel*1000:8.1f} ms   whole array: {vectorized*1000:8.1f} ms   speedup: {per_pixel/vectorized:6.1f}x')
+    if not identical:
+        print('The whole array writers do not create the same files as the per-pixel writers!')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import io
+import time
+import contextlib
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+'''
+Synthetic measurements and the timing helper of the benchmarks, the synthetic measurements are also used by the tests.
+The files follow the default config, a parameter file and one .gsf file per channel for the 'standard_new' filetype,
+so they can be opened with SnomMeasurement, or a tab separated datafile for approach curves and 3D scans.
+'''
+
+OPTICAL_CHANNELS = ['O1A', 'O1P', 'O2A', 'O2P', 'O3A', 'O3P', 'O4A', 'O4P', 'O5A', 'O5P']
+# columns of the datafiles of approach curves and 3D scans
+TEXT_COLUMNS = ['Row', 'Column', 'Run', 'Z', 'M1A', 'M1P', 'O1A', 'O1P', 'O2A', 'O2P', 'O3A', 'O3P']
+
+def write_gsf(filepath, data:np.ndarray, channel:str, xreal:Optional[float]=None, yreal:Optional[float]=None) -> None:
+    """Writes 2D data as .gsf file with the header tags of a neaspec measurement.
+    If the size of the scan area is not specified, the pixels are 100 nm wide."""
+    yres, xres = data.shape
+    if xreal is None:
+        xreal = xres*1e-7
+    if yreal is None:
+        yreal = yres*1e-7
+    header = (f'Gwyddion Simple Field 1.0\nTitle={channel}\nXRes={xres}\nYRes={yres}\nYResIncomplete={yres}\n'
+              f'XReal={xreal}\nYReal={yreal}\nXOffset=1e-05\nYOffset=2e-05\nNeaspec_Angle=0\n'
+              f'XYUnits=m\nZUnits={"m" if "Z" in channel else ""}\nNeaspec_WavenumberScaling=1.0\n').encode('utf-8')
+    # the header is padded with NUL characters to a multiple of 4 bytes
+    padding = 4 - len(header) % 4
+    with open(filepath, 'wb') as file:
+        file.write(header + b'\0'*padding + data.astype('<f4').tobytes())
+
+def write_parameters(file, scan:str, scan_area:str, pixel_area:str) -> None:
+    """Writes the header of the parameters file of a neaspec measurement to the open text file."""
+    parameters = {
+        'Scan': scan, 'Project': 'synthetic', 'Description': 'synthetic data', 'Date': '01/02/2024 12:00:00',
+        'Scanner Center Position (X, Y)': '[µm]\t10.0\t20.0', 'Rotation': '[°]\t0',
+        'Scan Area (X, Y, Z)': f'[µm]\t{scan_area}', 'Pixel Area (X, Y, Z)': f'[px]\t{pixel_area}',
+        'Averaging': '1', 'Integration time': '[ms]\t6.6', 'Laser Source': 'x', 'Detector': 'x',
+        'Target Wavelength': '[µm]\t1.6', 'Demodulation Mode': 'Fourier', 'Tip Frequency': '[Hz]\t250000',
+        'Tip Amplitude': '[mV]\t20', 'Tapping Amplitude': '[nm]\t50', 'Modulation Frequency': '[Hz]\t300',
+        'Modulation Amplitude': '[mV]\t100', 'Modulation Offset': '[mV]\t0', 'Setpoint': '[%]\t80',
+        'Regulator (P, I, D)': '\t1\t2\t3', 'Tip Potential': '[mV]\t0', 'M1A Scaling': '[nm/V]\t1',
+        'Q-Factor': '100', 'Version': '1.10.9592.0',
+    }
+    for tag, value in parameters.items():
+        file.write(f'# {tag}:\t{value}\n')
+
+def create_snom_measurement(folder, xres:int=256, yres:int=256, seed:int=0, channels:Optional[list]=None) -> Path:
+    """Creates a measurement folder with amplitude, phase and mechanical channels and the corrected height channels 'Z C' and 'R-Z C'.
+    The height is a smooth pattern with a tilt in y direction and a little noise, all other channels are random.
+
+    Args:
+        folder (Path): the measurement folder, the folder name is also used as measurement name
+        xres (int, optional): pixels in x direction. Defaults to 256.
+        yres (int, optional): pixels in y direction. Defaults to 256.
+        seed (int, optional): seed of the random data. Defaults to 0.
+        channels (list, optional): the phase, amplitude and mechanical channels, created in this order. Defaults to OPTICAL_CHANNELS and 'M1A', 'M1P'.
+
+    Returns:
+        Path: the measurement folder
+    """
+    if channels is None:
+        channels = OPTICAL_CHANNELS + ['M1A', 'M1P']
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    name = folder.name
+    with open(folder / f'{name}.txt', 'w', encoding='UTF-8') as file:
+        write_parameters(file, 'AFM (PsHet)', f'{xres/10}\t{yres/10}\t0.0', f'{xres}\t{yres}\t1')
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:yres, 0:xres]
+    for channel in channels:
+        if channel.endswith('P'):
+            data = rng.random((yres, xres))*2*np.pi - np.pi
+        else:
+            data = rng.random((yres, xres))*3
+        write_gsf(folder / f'{name} {channel} raw.gsf', data, channel)
+    write_gsf(folder / f'{name} Z C.gsf', (np.sin(x/7) + 0.01*y)*1e-8 + rng.random((yres, xres))*1e-10, 'Z C')
+    write_gsf(folder / f'{name} R-Z C.gsf', (np.sin((x + 2)/7) + 0.01*y)*1e-8, 'R-Z C')
+    return folder
+
+def create_text_measurement(folder, scan:str='Approach Curve', xres:int=1, yres:int=1, zres:int=50, seed:int=0) -> Path:
+    """Creates an approach curve or 3D scan folder with a tab separated datafile of random values.
+    For 3D scans the .gsf files of the 'Z' and 'O2A' channels are created as well, they are needed to identify the filetype.
+
+    Args:
+        folder (Path): the measurement folder, the folder name is also used as measurement name
+        scan (str, optional): the scan type, 'Approach Curve' or '3D'. Defaults to 'Approach Curve'.
+        xres (int, optional): pixels in x direction. Defaults to 1.
+        yres (int, optional): pixels in y direction. Defaults to 1.
+        zres (int, optional): points per approach curve. Defaults to 50.
+        seed (int, optional): seed of the random data. Defaults to 0.
+
+    Returns:
+        Path: the measurement folder
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    name = folder.name
+    rng = np.random.default_rng(seed)
+    with open(folder / f'{name}.txt', 'w', encoding='UTF-8') as file:
+        write_parameters(file, scan, '1.0\t1.0\t0.2', f'{xres}\t{yres}\t{zres}')
+        file.write('\t'.join(TEXT_COLUMNS) + '\t\n')
+        np.savetxt(file, rng.random((xres*yres*zres, len(TEXT_COLUMNS))), fmt='%.8e', delimiter='\t', newline='\t\n')
+    if scan == '3D':
+        write_gsf(folder / f'{name} Z.gsf', rng.random((yres, xres))*1e-8, 'Z')
+        write_gsf(folder / f'{name} O2A raw.gsf', rng.random((yres, xres)), 'O2A')
+    return folder
+
+def time_function(function, repeats:int, *args, copy_data:bool=False, quiet:bool=False) -> tuple:
+    """Returns the fastest of several runs and the result of the last run.
+
+    Args:
+        function (Callable): the function to time, it is called with args
+        repeats (int): number of runs
+        copy_data (bool, optional): every run gets a fresh copy of the first argument, for functions which change arrays in place. Defaults to False.
+        quiet (bool, optional): suppress the output the function prints. Defaults to False.
+
+    Returns:
+        tuple: the fastest time in seconds and the result of the last run
+    """
+    times = []
+    for i in range(repeats):
+        run_args = (args[0].copy(),) + args[1:] if copy_data else args
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            start = time.perf_counter()
+            result = function(*run_args)
+            times.append(time.perf_counter() - start)
+    return min(times), result
@@ -58,20 +58,68 @@ def mean_index_array(array, interpolation=4):
     Returns:
         float: the mean index of the data
     """
-    from scipy.interpolate import interp1d
-    # create a spline interpolation of the data with x times the resolution
-    x = np.arange(len(array))
-    xn = np.linspace(0, len(array)-1, len(array)*interpolation)
-    spline = interp1d(x, array, kind='cubic')
-    array_interp = spline(xn)
-    # calculate the mean index
-    mean = 0
-    half_area = np.sum(array_interp)/2
-    lower_sum = 0
-    for i in range(len(array_interp)):
-        if lower_sum + array_interp[i] <= half_area:
-            lower_sum += array_interp[i]
-            mean = i
-        else:
-            break
-    return mean/interpolation 
\ No newline at end of file
+    return mean_index_arrays(np.asarray(array)[np.newaxis], interpolation)[0].item()
+
+def mean_index_arrays(data, interpolation=4) -> np.ndarray:
+    """Batched version of mean_index_array, returns the mean index of every row of the 2D data.
+    All rows are interpolated with a single cubic spline and the half area is found with cumulative sums instead of a loop.
+
+    Args:
+        data (np.ndarray): 2D data, each row is one array to calculate the mean index from
+        interpolation (int, optional): how many datapoints to interpolate in between the given data. Defaults to 4.
+
+    Returns:
+        np.ndarray: the mean index of each row
+    """
+    from scipy.interpolate import make_interp_spline
+    data = np.asarray(data, dtype=np.float64)
+    length = data.shape[1]
+    # create a spline interpolation of all rows with x times the resolution, this is the same spline interp1d uses for kind='cubic'
+    x = np.arange(length)
+    xn = np.linspace(0, length-1, length*interpolation)
+    data_interp = np.ascontiguousarray(make_interp_spline(x, data, k=3, axis=1)(xn))
+    half_area = np.sum(data_interp, axis=1)/2
+    # the summation stops at the first value which would exceed the half area, the mean index is the value before
+    exceeded = ~(np.cumsum(data_interp, axis=1) <= half_area[:, np.newaxis])
+    first_exceeded = np.argmax(exceeded, axis=1)
+    mean = np.where(np.any(exceeded, axis=1), np.maximum(first_exceeded - 1, 0), data_interp.shape[1] - 1)
+    return mean/interpolation
+
+def get_float_dtype(dtype) -> np.dtype:
+    """Returns the given dtype if it is a floating point or complex type, otherwise float64.
+    Used to keep float32 data in single precision when a calculation creates new arrays.
+
+    Args:
+        dtype (np.dtype): dtype of the data
+
+    Returns:
+        np.dtype: dtype for the result of the calculation
+    """
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.inexact):
+        return dtype
+    return np.dtype(np.float64)
+
+def round_array(array, decimals:int) -> np.ndarray:
+    """Rounds all elements of the array to the given number of decimals. In contrast to np.round the result is identical to
+    applying the builtin round function to every element, which rounds on the exact decimal representation of each value.
+    Elements where np.round could end up on the other side of a tie are rounded individually with the builtin round.
+
+    Args:
+        array (np.ndarray): data to round, will be converted to float64
+        decimals (int): number of decimals to round to
+
+    Returns:
+        np.ndarray: the rounded data
+    """
+    array = np.asarray(array, dtype=np.float64)
+    scaled = array * 10.0**decimals
+    rounded = np.rint(scaled) / 10.0**decimals
+    # find the values which are close to a tie or too large to have a fractional part, these are rounded individually
+    with np.errstate(invalid='ignore'):
+        distance_to_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5)
+        critical = (distance_to_tie <= 4*np.spacing(scaled)) | (np.abs(scaled) >= 2**52)
+    critical &= np.isfinite(array)
+    if np.any(critical):
+        rounded[critical] = [round(value, decimals) for value in array[critical].tolist()]
+    return rounded
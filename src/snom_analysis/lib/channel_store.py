@@ -0,0 +1,301 @@
+'''Channel storage for the snom_analysis package. Channels can be decoded lazily from their files when they are accessed
+or kept together in one dense array, the channel names are kept in a list with a fast index lookup.'''
+
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+from collections.abc import MutableSequence
+from typing import Callable, Optional
+import sys
+import zlib
+import numpy as np
+
+
+class _LazyChannel:
+    """A single channel of the LazyChannelData list. The data is either already in memory or can be (re)created with the loader.
+    The checksum of freshly decoded data is kept to make sure that data which was changed in place is never evicted.
+    Data which is still referenced outside of the container is not evicted either, since it could still be changed in place.
+    """
+    def __init__(self, loader:Optional[Callable]=None, data:Optional[np.ndarray]=None) -> None:
+        self.loader = loader
+        self.data = data
+        self.checksum = None
+        self.last_access = 0
+
+    def is_loaded(self) -> bool:
+        return self.data is not None
+
+    def is_evictable(self) -> bool:
+        # only data which was decoded from a file and was not changed since can be dropped and decoded again later
+        if self.loader is None or self.data is None:
+            return False
+        # one reference is held by this channel and one by the argument of getrefcount, any other reference is held by a caller
+        # which could still change the array in place, e.g. data = all_data[0] while other channels are loaded
+        if sys.getrefcount(self.data) > 2:
+            return False
+        return zlib.crc32(self.data) == self.checksum
+
+
+class LazyChannelData(MutableSequence):
+    """List like container for the channel data of a measurement. Instead of arrays it can hold loaders which decode
+    the channel data on first access, e.g. from a memory map of the file. This way only channels which are actually used
+    are kept in memory. If a memory budget is specified, the least recently used channels which are unchanged since loading
+    are dropped from memory once the budget is exceeded, they will be decoded again on the next access.
+    Assigning new data to an index replaces the loader, so manipulated channels always stay in memory.
+
+    Args:
+        memory_budget (float, optional): maximum memory in GB for the decoded channels. Defaults to None, meaning no limit.
+            Channels which were changed in place or are still referenced outside of the container are never dropped,
+            so the budget can be exceeded while such arrays are in use.
+    """
+    def __init__(self, memory_budget:Optional[float]=None) -> None:
+        self._channels = []
+        self.memory_budget = memory_budget
+        self._access_counter = 0
+
+    @classmethod
+    def _from_channels(cls, channels:list, memory_budget:Optional[float]) -> 'LazyChannelData':
+        new = cls(memory_budget)
+        new._channels = channels
+        return new
+
+    def append_loader(self, loader:Callable) -> None:
+        """Append a channel which will be decoded by calling the loader on first access.
+
+        Args:
+            loader (Callable): function without arguments returning the channel data as np.ndarray
+        """
+        self._channels.append(_LazyChannel(loader=loader))
+
+    def is_loaded(self, index:int) -> bool:
+        """Returns True if the channel at the given index is currently decoded and in memory."""
+        return self._channels[index].is_loaded()
+
+    def memory_usage(self) -> int:
+        """Returns the number of bytes currently used by the decoded channels."""
+        return sum(channel.data.nbytes for channel in self._channels if channel.data is not None)
+
+    def evict(self, index:Optional[int]=None) -> None:
+        """Drop decoded channels from memory which can be decoded again from their files.
+
+        Args:
+            index (int, optional): only drop the channel at this index. Defaults to None, meaning all unchanged channels are dropped.
+        """
+        channels = self._channels if index is None else [self._channels[index]]
+        for channel in channels:
+            if channel.is_evictable():
+                channel.data = None
+                channel.checksum = None
+
+    def _get_data(self, channel:_LazyChannel) -> np.ndarray:
+        self._access_counter += 1
+        channel.last_access = self._access_counter
+        if channel.data is None:
+            channel.data = channel.loader()
+            channel.checksum = zlib.crc32(channel.data)
+            self._apply_memory_budget(keep=channel)
+        return channel.data
+
+    def _apply_memory_budget(self, keep:_LazyChannel) -> None:
+        if self.memory_budget is None:
+            return
+        budget = self.memory_budget*1024**3
+        usage = self.memory_usage()
+        if usage <= budget:
+            return
+        # drop the least recently used channels first, but never the one which was just requested
+        candidates = sorted([channel for channel in self._channels if channel is not keep and channel.is_loaded()], key=lambda channel: channel.last_access)
+        for channel in candidates:
+            if usage <= budget:
+                break
+            if channel.is_evictable():
+                usage -= channel.data.nbytes
+                channel.data = None
+                channel.checksum = None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_data(channel) for channel in self._channels[index]]
+        return self._get_data(self._channels[index])
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            self._channels[index] = [_LazyChannel(data=data) for data in value]
+        else:
+            self._channels[index] = _LazyChannel(data=value)
+
+    def __delitem__(self, index) -> None:
+        del self._channels[index]
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def insert(self, index:int, value) -> None:
+        self._channels.insert(index, _LazyChannel(data=value))
+
+    def extend(self, values) -> None:
+        # keep other lazy channels lazy instead of decoding them while iterating
+        if isinstance(values, LazyChannelData):
+            self._channels.extend(values._channels)
+        else:
+            for value in values:
+                self.append(value)
+
+    def copy(self) -> 'LazyChannelData':
+        """Returns a shallow copy, channels which are not yet decoded stay lazy in the copy."""
+        return LazyChannelData._from_channels(self._channels.copy(), self.memory_budget)
+
+    def __repr__(self) -> str:
+        loaded = sum(channel.is_loaded() for channel in self._channels)
+        return f'LazyChannelData({len(self._channels)} channels, {loaded} loaded)'
+
+
+class ChannelList(list):
+    """List of channel names with a constant time lookup for index() and the 'in' operator.
+    The position of each name is kept in a dictionary, which is rebuilt on the next lookup after the list was changed.
+    Like for a normal list the index of the first occurrence is returned.
+    """
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self._positions = None
+
+    def _get_positions(self) -> dict:
+        if self._positions is None:
+            positions = {}
+            for index, name in enumerate(self):
+                positions.setdefault(name, index)
+            self._positions = positions
+        return self._positions
+
+    def index(self, value, *args) -> int:
+        if args:
+            return super().index(value, *args)
+        try:
+            return self._get_positions()[value]
+        except (KeyError, TypeError):
+            # raises the usual ValueError for missing values, unhashable values are searched in the list
+            return super().index(value)
+
+    def __contains__(self, value) -> bool:
+        try:
+            return value in self._get_positions()
+        except TypeError:
+            return super().__contains__(value)
+
+
+def _reset_positions(method:Callable) -> Callable:
+    def wrapper(self, *args, **kwargs):
+        self._positions = None
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+# all methods which change the list invalidate the positions
+for _method in ['append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse', '__setitem__', '__delitem__', '__iadd__', '__imul__']:
+    setattr(ChannelList, _method, _reset_positions(getattr(list, _method)))
+
+
+class ChannelStack(MutableSequence):
+    """List like container for the channel data of a measurement, which keeps all channels in one contiguous array of shape (channel, y, x).
+    The channels returned by indexing are views into this stack, so operations can be applied to all channels at once with get_stack().
+    Assigning, adding or removing channels only changes the list, the stack is rebuilt when it is requested the next time.
+    If the channels differ in size or can not be stored with the dtype of the stack, e.g. complex data in a float stack,
+    they are kept as separate arrays and get_stack() returns None until all channels are compatible again.
+
+    Args:
+        data (list, optional): initial channel data. Defaults to an empty list.
+        dtype (np.dtype, optional): data type of the stack. Defaults to np.float64.
+    """
+    def __init__(self, data=(), dtype=np.float64) -> None:
+        self.dtype = np.dtype(dtype)
+        self._channels = list(data)
+        self._stack = None
+
+    def _is_stackable(self) -> bool:
+        if len(self._channels) == 0:
+            return False
+        shape = np.shape(self._channels[0])
+        if len(shape) != 2:
+            return False
+        for data in self._channels:
+            if np.shape(data) != shape or not np.can_cast(np.asarray(data).dtype, self.dtype, 'same_kind'):
+                return False
+        return True
+
+    def get_stack(self) -> Optional[np.ndarray]:
+        """Returns the data of all channels as one array of shape (channel, y, x). The channels are views of this array,
+        so changes to the stack are visible in the channels. Returns None if the channels can not be stacked.
+        """
+        if self._stack is None and self._is_stackable():
+            stack = np.empty((len(self._channels),) + np.shape(self._channels[0]), dtype=self.dtype)
+            for index, data in enumerate(self._channels):
+                stack[index] = data
+            self._set_stack(stack)
+        return self._stack
+
+    def set_stack(self, data:np.ndarray, indices:Optional[list]=None) -> None:
+        """Replaces the data of the channels with the given array of shape (channel, y, x).
+
+        Args:
+            data (np.ndarray): the new data, one entry for each index
+            indices (list, optional): indices of the channels to replace. Defaults to None, meaning all channels in order.
+        """
+        if indices is None:
+            indices = range(len(self._channels))
+        indices = list(indices)
+        if indices == list(range(len(self._channels))) and data.ndim == 3 and data.dtype == self.dtype and data.flags.c_contiguous:
+            # the new data can be used as stack without copying it
+            self._set_stack(data)
+        else:
+            for index, channel_data in zip(indices, data):
+                self._channels[index] = channel_data
+            self._stack = None
+
+    def _set_stack(self, stack:np.ndarray) -> None:
+        self._stack = stack
+        self._channels = list(stack)
+
+    def __getitem__(self, index):
+        return self._channels[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._channels[index] = value
+        self._stack = None
+
+    def __delitem__(self, index) -> None:
+        del self._channels[index]
+        self._stack = None
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def insert(self, index:int, value) -> None:
+        self._channels.insert(index, value)
+        self._stack = None
+
+    def copy(self) -> 'ChannelStack':
+        """Returns a shallow copy, the channels of the copy are still views of the same stack."""
+        new = ChannelStack(self._channels, self.dtype)
+        new._stack = self._stack
+        return new
+
+    def __repr__(self) -> str:
+        state = 'stacked' if self._stack is not None else 'not stacked'
+        return f'ChannelStack({len(self._channels)} channels, {state})'
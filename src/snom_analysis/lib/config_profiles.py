@@ -0,0 +1,164 @@
+'''Compiled profiles of the config file. Every section of the config file is parsed once into a profile with the converted values,
+the profiles are shared by all measurements of the session and are only compiled again if the config file changes.'''
+
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import ast
+import copy
+import threading
+from collections.abc import Mapping
+from configparser import ConfigParser
+
+# one entry per config file: (modification time, size), config parser, compiled profiles
+_cache = {}
+_cache_lock = threading.Lock()
+
+def parse_config_value(value:str):
+    """Converts a value of the config file to the python type it represents.
+    Strings are surrounded by < and >, 'True', 'False' and 'None' are converted to the corresponding constants,
+    everything else is evaluated as python literal, e.g. numbers, lists and dictionaries. If this fails the string is returned.
+
+    Args:
+        value (str): the value as stored in the config file
+
+    Returns:
+        the converted value
+    """
+    if value[:1] == '<':
+        value = value.replace('<', '').replace('>', '')
+    if value == 'True':
+        return True
+    elif value == 'False':
+        return False
+    elif value == 'None':
+        return None
+    try:
+        return ast.literal_eval(value)
+    except:
+        return value
+
+
+class FiletypeProfile(Mapping):
+    """Read only mapping of the converted options of one section of the config file.
+    Mutable values like lists and dictionaries are copied when they are accessed, so the profile can not be changed by the caller.
+
+    Args:
+        name (str): name of the section
+        options (dict): the options of the section as stored in the config file
+    """
+    def __init__(self, name:str, options:dict) -> None:
+        self.name = name
+        self._raw = dict(options)
+        self._values = {option: parse_config_value(value) for option, value in self._raw.items()}
+
+    def __getitem__(self, option:str):
+        value = self._values[option]
+        if isinstance(value, (list, dict)):
+            return copy.deepcopy(value)
+        return value
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get_raw(self) -> dict:
+        """Returns the options of the section as stored in the config file."""
+        return dict(self._raw)
+
+    def __repr__(self) -> str:
+        return f'FiletypeProfile({self.name!r}, {self._values!r})'
+
+
+class ConfigProfiles(Mapping):
+    """Read only mapping of all sections of a config file to their FiletypeProfile.
+
+    Args:
+        config (ConfigParser): the loaded config file
+    """
+    def __init__(self, config:ConfigParser) -> None:
+        self._sections = {section: dict(config[section]) for section in config.sections()}
+        self._profiles = {section: FiletypeProfile(section, options) for section, options in self._sections.items()}
+        # string of all options, used to detect config changes in the filetype cache
+        self.signature = str(self._sections)
+
+    def __getitem__(self, section:str) -> FiletypeProfile:
+        return self._profiles[section]
+
+    def __iter__(self):
+        return iter(self._profiles)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+def _get_file_stamp(path) -> tuple:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _copy_config(config:ConfigParser) -> ConfigParser:
+    # the values are copied without interpolation, like they are stored in the config file
+    config_copy = ConfigParser()
+    config_copy.read_dict({section: {option: config.get(section, option, raw=True) for option in config.options(section)} for section in config.sections()})
+    return config_copy
+
+def load_config_profiles(path) -> tuple:
+    """Loads the config file and compiles its profiles. The result is cached,
+    the config file is only read again if its modification time or size changed.
+    The read only profiles are shared by all callers, but every caller gets its own copy of the config parser,
+    so changing the config of one measurement does not change the config of the others.
+
+    Args:
+        path (Path): path of the config file
+
+    Returns:
+        tuple: the config parser and the compiled ConfigProfiles
+    """
+    key = os.path.abspath(path)
+    stamp = _get_file_stamp(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            return _copy_config(entry[1]), entry[2]
+    config = ConfigParser()
+    with open(path, 'r') as f:
+        config.read_file(f)
+    profiles = ConfigProfiles(config)
+    with _cache_lock:
+        _cache[key] = (stamp, config, profiles)
+    return _copy_config(config), profiles
+
+def update_config_profiles(path, config:ConfigParser) -> ConfigProfiles:
+    """Compiles the profiles of a config which was just written to the config file and replaces the cached profiles.
+
+    Args:
+        path (Path): path of the config file
+        config (ConfigParser): the config which was written to the file
+
+    Returns:
+        ConfigProfiles: the compiled profiles
+    """
+    profiles = ConfigProfiles(config)
+    with _cache_lock:
+        # the cache keeps its own copy, the caller may change its config again
+        _cache[os.path.abspath(path)] = (_get_file_stamp(path), _copy_config(config), profiles)
+    return profiles
@@ -26,6 +26,7 @@ class Definitions(Enum):
     """This class keeps track of the implemented definitions."""
     vertical = auto()
     horizontal = auto()
+    cutline = auto()
 
 class MeasurementTypes(Enum):
     AFM = auto()
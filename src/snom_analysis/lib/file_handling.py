@@ -17,6 +17,13 @@
 # along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
 ##############################################################################
 
+import numpy as np
+import os
+import threading
+import json
+import hashlib
+from pathlib import Path
+
 def find_index(header, filepath, channel):
     with open(filepath, 'r') as file:
         for i in range(header+1):
@@ -163,3 +170,327 @@ def _remove_empty_spaces(line) -> str:
     except: pass
     return line
 
+def read_gsf_data(filepath, xres:int, yres:int) -> np.ndarray:
+    """Reads the binary data block of a gsf file. The data block consists of xres*yres little endian float32 values
+    at the end of the file, so the header is skipped by reading only the last xres*yres*4 bytes.
+
+    Args:
+        filepath (Path): path to the gsf file
+        xres (int): number of pixels in x direction
+        yres (int): number of pixels in y direction
+
+    Returns:
+        np.ndarray: the raw data as float64 array of shape (yres, xres)
+    """
+    datasize = int(xres*yres*4)
+    offset = os.path.getsize(filepath) - datasize
+    with open(filepath, 'br') as file:
+        file.seek(offset)
+        binarydata = file.read(datasize)
+    data = np.frombuffer(binarydata, dtype='<f4').reshape((yres, xres))
+    return data.astype(np.float64)
+
+def memmap_gsf_data(filepath, xres:int, yres:int) -> np.memmap:
+    """Creates a read only memory map of the binary data block of a gsf file without reading the data.
+    The data is only read from disk once the values of the memory map are used.
+
+    Args:
+        filepath (Path): path to the gsf file
+        xres (int): number of pixels in x direction
+        yres (int): number of pixels in y direction
+
+    Returns:
+        np.memmap: float32 memory map of shape (yres, xres)
+    """
+    datasize = int(xres*yres*4)
+    offset = os.path.getsize(filepath) - datasize
+    return np.memmap(filepath, dtype='<f4', mode='r', offset=offset, shape=(yres, xres))
+
+# cache for the parsed headers of data files, (filepath, modification time, size) -> tag index
+_header_tag_cache = {}
+_header_tag_cache_lock = threading.Lock()
+
+def read_gsf_header(filepath, encoding:str='latin1', chunk_size:int=4096) -> str:
+    """Reads only the header of a gsf file. The header is terminated by NUL padding, so the file is read in chunks until the first NUL character.
+    Files without NUL padding are read completely.
+
+    Args:
+        filepath (Path): path to the gsf file
+        encoding (str, optional): encoding of the header. Defaults to 'latin1'.
+        chunk_size (int, optional): number of bytes read at once. Defaults to 4096.
+
+    Returns:
+        str: the header text
+    """
+    header = b''
+    with open(filepath, 'br') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            end = chunk.find(b'\0')
+            if end != -1:
+                header += chunk[:end]
+                break
+            header += chunk
+    # use the same line endings as reading the file in text mode
+    return header.decode(encoding).replace('\r\n', '\n').replace('\r', '\n')
+
+def parse_header_tags(header:str) -> dict:
+    """Creates a tag -> value index from the 'tag=value' lines of a file header. Spaces are removed from tags and values.
+    Values which can be converted to a number are returned as float, the others as str. If a tag occurs multiple times the last value is used.
+    Lines longer than 50 characters are considered to not be part of the header anymore.
+
+    Args:
+        header (str): the header text
+
+    Returns:
+        dict: the tag index
+    """
+    tag_index = {}
+    for element in header.split('\n'):
+        if len(element) > 50: # its probably not part of the header anymore...
+            break
+        elif '=' not in element:
+            continue
+        tag_pair = element.split('=')
+        tag_name = tag_pair[0].replace(' ', '')# remove possible ' ' characters
+        tag_val = tag_pair[1].replace(' ', '')# remove possible ' ' characters
+        try: tag_index[tag_name] = float(tag_val)
+        except: tag_index[tag_name] = tag_val
+    return tag_index
+
+def get_header_tags(filepath, encoding:str='latin1') -> dict:
+    """Returns the tag index of the file header. The index is cached per file and only recreated if the modification time or size of the file changes.
+
+    Args:
+        filepath (Path): path to the data file
+        encoding (str, optional): encoding of the header. Defaults to 'latin1'.
+
+    Returns:
+        dict: the tag index, should not be modified
+    """
+    stat = os.stat(filepath)
+    key = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+    with _header_tag_cache_lock:
+        tag_index = _header_tag_cache.get(key)
+    if tag_index is None:
+        tag_index = parse_header_tags(read_gsf_header(filepath, encoding))
+        with _header_tag_cache_lock:
+            # remove outdated entries of the same file
+            for old_key in [old_key for old_key in _header_tag_cache if old_key[0] == key[0]]:
+                del _header_tag_cache[old_key]
+            _header_tag_cache[key] = tag_index
+    return tag_index
+
+def _parse_column_lines(lines:list, indices:list, delimiter:str) -> list:
+    """Parses the specified columns of delimiter separated lines and returns one array per column. The C parser of np.loadtxt is used if possible,
+    lines with empty values or missing columns are handled like np.genfromtxt with invalid_raise=False does for a single column,
+    empty or invalid values are nan and lines which do not contain the column are skipped for that column.
+    """
+    try:
+        data = np.loadtxt(lines, delimiter=delimiter, usecols=indices, ndmin=2, dtype=np.float64)
+        return [data[:, i] for i in range(len(indices))]
+    except ValueError:
+        pass
+    columns = [[] for index in indices]
+    for line in lines:
+        values = line.split('#')[0].strip(' \r\n')
+        if not values:
+            continue
+        values = values.split(delimiter)
+        for column, index in zip(columns, indices):
+            if index >= len(values):
+                continue
+            try:
+                column.append(float(values[index]))
+            except ValueError:
+                column.append(np.nan)
+    return [np.array(column, dtype=np.float64) for column in columns]
+
+def iter_column_chunks(filepath, header_length:int, columns:list, delimiter:str='\t', chunk_size:int=16*1024**2, show_progress:bool=False):
+    """Reads the specified columns of a delimiter separated text file, like the .txt files of approach curves and 3D scans,
+    in chunks and yields the values chunk by chunk. The line after the header contains the column names, all following lines contain the data.
+    Only one chunk of the text is in memory at once, so files larger than the memory can be processed.
+
+    Args:
+        filepath (Path): path of the text file
+        header_length (int): number of lines before the line with the column names
+        columns (list): names of the columns to read
+        delimiter (str, optional): the column delimiter. Defaults to '\t'.
+        chunk_size (int, optional): approximate number of characters parsed at once. Defaults to 16*1024**2.
+        show_progress (bool, optional): print the loading progress. Defaults to False.
+
+    Yields:
+        dict: column name -> 1D np.ndarray of the next values of the column
+    """
+    filesize = os.path.getsize(filepath)
+    with open(filepath, 'r') as file:
+        for i in range(header_length):
+            file.readline()
+        names = file.readline().split(delimiter)
+        # each column is only parsed once, even if it is requested multiple times
+        indices = list(dict.fromkeys([names.index(column) for column in columns]))
+        # file.tell() is not available while reading lines, the progress is estimated from the number of characters
+        position = 0
+        try:
+            while True:
+                lines = file.readlines(chunk_size)
+                if not lines:
+                    break
+                chunks = dict(zip(indices, _parse_column_lines(lines, indices, delimiter)))
+                if show_progress:
+                    position += sum(len(line) for line in lines)
+                    print(f'Reading {os.path.basename(filepath)}: {min(100, int(100*position/filesize))}%', end='\r')
+                yield {column: chunks[names.index(column)] for column in dict.fromkeys(columns)}
+        finally:
+            # also if the caller stops reading early
+            if show_progress:
+                print(f'Reading {os.path.basename(filepath)}: done')
+
+def read_columns(filepath, header_length:int, columns:list, expected_rows:int=None, delimiter:str='\t', chunk_size:int=16*1024**2, show_progress:bool=False) -> dict:
+    """Reads the specified columns of a delimiter separated text file, like the .txt files of approach curves and 3D scans,
+    in a single pass. The line after the header contains the column names, all following lines contain the data.
+    The file is read in chunks, so the whole text is never in memory at once.
+
+    Args:
+        filepath (Path): path of the text file
+        header_length (int): number of lines before the line with the column names
+        columns (list): names of the columns to read
+        expected_rows (int, optional): number of data lines if known, used to preallocate the arrays. Defaults to None.
+        delimiter (str, optional): the column delimiter. Defaults to '\t'.
+        chunk_size (int, optional): approximate number of characters parsed at once. Defaults to 16*1024**2.
+        show_progress (bool, optional): print the loading progress. Defaults to False.
+
+    Returns:
+        dict: column name -> 1D np.ndarray of the column values
+    """
+    columns = list(dict.fromkeys(columns))
+    data = {column: np.empty(expected_rows if expected_rows is not None else 0, dtype=np.float64) for column in columns}
+    row_counts = {column: 0 for column in columns}
+    for chunks in iter_column_chunks(filepath, header_length, columns, delimiter, chunk_size, show_progress):
+        for column, chunk in chunks.items():
+            row_count = row_counts[column]
+            if row_count + len(chunk) > len(data[column]):
+                # grow the preallocated array if more lines than expected are found
+                data[column] = np.concatenate([data[column][:row_count], np.empty(max(len(data[column]), row_count + len(chunk)))])
+            data[column][row_count:row_count + len(chunk)] = chunk
+            row_counts[column] += len(chunk)
+    return {column: data[column][:row_counts[column]] for column in columns}
+
+def get_column_cache_folder(cache_root, datafile) -> Path:
+    """Returns the folder of the binary column cache for the specified text datafile.
+    Every datafile gets its own folder, named after the file and a hash of its absolute path.
+
+    Args:
+        cache_root (Path): folder containing the caches of all datafiles
+        datafile (Path): path of the text datafile
+
+    Returns:
+        Path: the cache folder of the datafile
+    """
+    datafile = Path(datafile)
+    path_hash = hashlib.sha1(os.path.abspath(datafile).encode('utf-8')).hexdigest()[:16]
+    return Path(cache_root) / f'{datafile.stem}_{path_hash}'
+
+def _load_column_cache_meta(cache_folder:Path) -> dict:
+    try:
+        with open(cache_folder / 'meta.json', 'r') as file:
+            return json.load(file)
+    except:
+        return None
+
+def _read_column_cache_meta(cache_folder:Path, source_stat:os.stat_result) -> dict:
+    # the cache is only valid if the datafile was not changed since the cache was created
+    meta = _load_column_cache_meta(cache_folder)
+    if meta is None or meta.get('size') != source_stat.st_size or meta.get('mtime_ns') != source_stat.st_mtime_ns:
+        return None
+    return meta
+
+def load_column_cache(cache_folder, source_stat:os.stat_result, columns:list) -> tuple:
+    """Loads the specified columns from the binary column cache. The columns are memory mapped copy on write,
+    so opening is fast and changes of the data in memory never change the cache.
+
+    Args:
+        cache_folder (Path): the cache folder of the datafile, see get_column_cache_folder
+        source_stat (os.stat_result): the current stat of the datafile, used to invalidate the cache
+        columns (list): names of the columns to load
+
+    Returns:
+        tuple: header length or None if the cache is invalid, dict column name -> 1D np.ndarray of all columns found in the cache
+    """
+    cache_folder = Path(cache_folder)
+    meta = _read_column_cache_meta(cache_folder, source_stat)
+    if meta is None:
+        return None, {}
+    data = {}
+    for column in columns:
+        filename = meta['columns'].get(column)
+        if filename is None:
+            continue
+        try:
+            data[column] = np.load(cache_folder / filename, mmap_mode='c', allow_pickle=False)
+        except:
+            # a damaged column file is simply read from the datafile again
+            pass
+    return meta['header'], data
+
+def _get_column_cache_filename(column:str, source_stat:os.stat_result) -> str:
+    # the name depends only on the column and the version of the datafile, so processes caching different columns never write the same file
+    # and a file name always refers to the same data
+    column_hash = hashlib.sha1(column.encode('utf-8')).hexdigest()[:16]
+    return f'{source_stat.st_size}_{source_stat.st_mtime_ns}_{column_hash}.npy'
+
+def _is_newer_column_cache(cache_folder:Path, source_stat:os.stat_result) -> bool:
+    # a process which read an older version of the datafile must not replace the cache of the current version
+    meta = _load_column_cache_meta(cache_folder)
+    return meta is not None and meta.get('mtime_ns', 0) > source_stat.st_mtime_ns
+
+def save_column_cache(cache_folder, source_stat:os.stat_result, header_length:int, data:dict) -> None:
+    """Adds columns to the binary column cache. Each column is stored as a .npy file, so it can be memory mapped later.
+    Columns which are already cached for the same version of the datafile are kept, the cache of an older version is replaced.
+    If a newer version of the datafile is already cached, nothing is written.
+    Several processes can add columns of the same datafile at the same time, the meta file is read again and merged right before it is replaced.
+
+    Args:
+        cache_folder (Path): the cache folder of the datafile, see get_column_cache_folder
+        source_stat (os.stat_result): the stat of the datafile before the columns were read
+        header_length (int): header length of the datafile
+        data (dict): column name -> 1D np.ndarray of the columns to add
+    """
+    cache_folder = Path(cache_folder)
+    version_prefix = f'{source_stat.st_size}_{source_stat.st_mtime_ns}_'
+    try:
+        os.makedirs(cache_folder, exist_ok=True)
+        if _is_newer_column_cache(cache_folder, source_stat):
+            return
+        if _read_column_cache_meta(cache_folder, source_stat) is None:
+            # remove the columns of an outdated version of the datafile
+            for filename in os.listdir(cache_folder):
+                if filename.endswith('.npy') and not filename.startswith(version_prefix):
+                    try: os.remove(cache_folder / filename)
+                    except: pass
+        columns = {}
+        for column, values in data.items():
+            filename = _get_column_cache_filename(column, source_stat)
+            # write to a temporary file first, so an interrupted write never leaves a damaged cache
+            temp_path = cache_folder / f'{filename}.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as file:
+                np.lib.format.write_array(file, np.ascontiguousarray(values), allow_pickle=False)
+            os.replace(temp_path, cache_folder / filename)
+            columns[column] = filename
+        # merge with the columns other processes added in the meantime
+        if _is_newer_column_cache(cache_folder, source_stat):
+            for filename in columns.values():
+                os.remove(cache_folder / filename)
+            return
+        meta = _read_column_cache_meta(cache_folder, source_stat)
+        if meta is None:
+            meta = {'size': source_stat.st_size, 'mtime_ns': source_stat.st_mtime_ns, 'header': header_length, 'columns': {}}
+        meta['columns'].update(columns)
+        temp_path = cache_folder / f'meta.json.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(meta, file, indent=4)
+        os.replace(temp_path, cache_folder / 'meta.json')
+    except Exception as e:
+        print(f'Could not write the column cache: {e}')
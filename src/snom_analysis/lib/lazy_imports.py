@@ -0,0 +1,121 @@
+'''Deferred imports for the plotting and gui dependencies. Loading, correcting and saving data only needs numpy and scipy,
+matplotlib, tkinter, pillow, skimage and imageio are only imported when they are used for the first time.
+The same is used for the scipy modules which take long to import but are only needed by a few functions.'''
+
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import sys
+import importlib
+import importlib.util
+import threading
+from typing import Callable, Optional
+
+_import_lock = threading.RLock()
+
+
+class LazyModule:
+    """Placeholder for a module which is imported on the first attribute access.
+    Functions which have to run right after the import, e.g. applying a matplotlib style, can be registered with set_import_hook().
+
+    Args:
+        name (str): absolute name of the module, e.g. 'matplotlib.pyplot'
+        package (str, optional): package used to resolve relative module names. Defaults to None.
+    """
+    def __init__(self, name:str, package:Optional[str]=None) -> None:
+        self._name = name
+        self._package = package
+        self._absolute_name = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+        self._module = None
+        self._import_hooks = {}
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name, self._package)
+                    hooks = list(self._import_hooks.values())
+                    self._import_hooks.clear()
+                    self._module = module
+                    for hook in hooks:
+                        hook(module)
+        return self._module
+
+    def __getattr__(self, name:str):
+        # only called for attributes which are not set in __init__
+        return getattr(self._load(), name)
+
+    def is_loaded(self) -> bool:
+        """Returns True if the module was imported already."""
+        return self._module is not None
+
+    def set_import_hook(self, key:str, hook:Callable) -> None:
+        """Registers a function which is called with the module once it is imported. If the module was already imported it is called immediately,
+        this includes imports by the user after the placeholder was created.
+        Registering a hook with the same key again replaces the previous hook.
+
+        Args:
+            key (str): identifier of the hook
+            hook (Callable): function which takes the module as only argument
+        """
+        if self._module is None and self._absolute_name in sys.modules:
+            # the module was imported elsewhere in the meantime, e.g. by the user, so use it and call the waiting hooks
+            self._load()
+        with _import_lock:
+            if self._module is None:
+                self._import_hooks[key] = hook
+                return
+        hook(self._module)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_import(name:str, package:Optional[str]=None) -> LazyModule:
+    """Returns a placeholder for the module, which is imported on first use.
+    If the module was imported before, e.g. by the user, the placeholder is loaded already.
+
+    Args:
+        name (str): name of the module, relative names need the package argument
+        package (str, optional): package used to resolve relative module names. Defaults to None.
+
+    Returns:
+        LazyModule: the placeholder of the module
+    """
+    module = LazyModule(name, package)
+    if module._absolute_name in sys.modules:
+        module._module = sys.modules[module._absolute_name]
+    return module
+
+def lazy_function(module:LazyModule, name:str) -> Callable:
+    """Returns a function which imports the module on the first call and then calls the function or class with the specified name.
+
+    Args:
+        module (LazyModule): the module containing the function
+        name (str): name of the function or class
+
+    Returns:
+        Callable: the wrapper
+    """
+    def wrapper(*args, **kwargs):
+        return getattr(module, name)(*args, **kwargs)
+    wrapper.__name__ = name
+    wrapper.__qualname__ = name
+    return wrapper
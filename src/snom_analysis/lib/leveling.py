@@ -0,0 +1,144 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import numpy as np
+from .additional_functions import get_float_dtype
+
+# all functions work on the last two axes, so single channels (y, x) and channel stacks (channel, y, x) can be leveled at once
+
+def get_zone_means(data:np.ndarray, coords:list, zone:int=1) -> np.ndarray:
+    """Returns the mean value of each pixel and its neighbors. The zone specifies the number of neighbors,
+    1 means the pixel and the 8 nearest pixels, 2 means a total of 25 pixels with the pixel in the middle. Pixels outside of the data are ignored.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        coords (list): pixel coordinates [[x1, y1], [x2, y2], ...]
+        zone (int, optional): the number of neighbors. Defaults to 1.
+
+    Returns:
+        np.ndarray: the mean values, the last axis corresponds to the coordinates
+    """
+    data = np.asarray(data)
+    means = []
+    for x, y in coords:
+        x, y = int(x), int(y)
+        window = data[..., max(y - zone, 0):y + zone + 1, max(x - zone, 0):x + zone + 1]
+        means.append(np.mean(window, axis=(-2, -1)))
+    return np.stack(means, axis=-1)
+
+def get_three_point_background(coords:list, values:np.ndarray, shape:tuple) -> np.ndarray:
+    """Returns the plane through three points. Only the slope of the plane is used, the offset is arbitrary.
+
+    Args:
+        coords (list): pixel coordinates of the three points [[x1, y1], [x2, y2], [x3, y3]]
+        values (np.ndarray): height values at the three points, the last axis must have length 3, the other axes are used for stacks
+        shape (tuple): (yres, xres) of the data
+
+    Returns:
+        np.ndarray: the plane, of shape values.shape[:-1] + shape
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    matrix = np.empty(values.shape[:-1] + (3, 3))
+    matrix[..., 0] = coords[:3, 0]
+    matrix[..., 1] = coords[:3, 1]
+    matrix[..., 2] = values
+    # the plane a*x + b*y + c*z = 100 contains all three points, 100 is arbitrary but 0 would only allow the trivial solution
+    right_side = np.full(values.shape[:-1] + (3, 1), 100.0)
+    solution = np.linalg.solve(matrix, right_side)[..., 0]
+    a, b, c = [solution[..., i, np.newaxis, np.newaxis] for i in range(3)]
+    x = np.arange(shape[1])
+    y = np.arange(shape[0])[:, np.newaxis]
+    return -(a*x + b*y)/c
+
+def level_three_points(data:np.ndarray, coords:list, zone:int=1) -> np.ndarray:
+    """Subtracts the plane through three points from the data. The height at each point is averaged over the zone around it to reduce the noise.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        coords (list): pixel coordinates of the three points [[x1, y1], [x2, y2], [x3, y3]]
+        zone (int, optional): the number of neighbors used for the mean height at each point. Defaults to 1.
+
+    Returns:
+        np.ndarray: the leveled data
+    """
+    data = np.asarray(data)
+    values = get_zone_means(data, coords[:3], zone)
+    background = get_three_point_background(coords, values, data.shape[-2:])
+    return data - background.astype(get_float_dtype(data.dtype), copy=False)
+
+def _get_polynomial_basis(yres:int, xres:int, order:int) -> np.ndarray:
+    """Returns all terms x**i * y**j with i + j <= order on the pixel grid, shape (terms, yres, xres).
+    The coordinates are scaled to the range -1 to 1 to keep the fit well conditioned for higher orders.
+    """
+    x = np.linspace(-1, 1, xres)[np.newaxis, :]
+    y = np.linspace(-1, 1, yres)[:, np.newaxis]
+    terms = [(total - j, j) for total in range(order + 1) for j in range(total + 1)]
+    return np.stack([np.broadcast_to(x**i * y**j, (yres, xres)) for i, j in terms])
+
+def get_polynomial_background(data:np.ndarray, order:int=1, mask:np.ndarray=None) -> np.ndarray:
+    """Fits a 2D polynomial to the data with the least squares method. Order 0 is a constant offset, order 1 a plane and order 2 a quadratic surface.
+    Pixels which are not finite are ignored. For stacks with the same valid pixels in every channel all channels are fitted at once.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        order (int, optional): order of the polynomial. Defaults to 1.
+        mask (np.ndarray, optional): only pixels where the mask is not zero are used for the fit, either one mask for all channels or one per channel.
+            Defaults to None.
+
+    Returns:
+        np.ndarray: the fitted background with the same shape as the data
+    """
+    data = np.asarray(data)
+    yres, xres = data.shape[-2:]
+    basis = _get_polynomial_basis(yres, xres, order)
+    n_terms = len(basis)
+    values = data.reshape(-1, yres*xres).astype(np.float64, copy=False)
+    design = basis.reshape(n_terms, -1).T
+    valid = np.isfinite(values)
+    if mask is not None:
+        valid &= np.broadcast_to(np.asarray(mask) != 0, data.shape).reshape(valid.shape)
+    coefficients = np.empty((len(values), n_terms))
+    if np.all(valid == valid[0]):
+        # same pixels for all channels, a single least squares fit with one column per channel
+        if np.count_nonzero(valid[0]) < n_terms:
+            raise ValueError(f'At least {n_terms} valid pixels are needed for a polynomial of order {order}!')
+        coefficients[:] = np.linalg.lstsq(design[valid[0]], values[:, valid[0]].T, rcond=None)[0].T
+    else:
+        for i in range(len(values)):
+            if np.count_nonzero(valid[i]) < n_terms:
+                raise ValueError(f'At least {n_terms} valid pixels are needed for a polynomial of order {order}!')
+            coefficients[i] = np.linalg.lstsq(design[valid[i]], values[i, valid[i]], rcond=None)[0]
+    background = np.tensordot(coefficients, basis, axes=1)
+    return background.reshape(data.shape)
+
+def level_polynomial(data:np.ndarray, order:int=1, mask:np.ndarray=None) -> np.ndarray:
+    """Subtracts a least squares fit of a 2D polynomial from the data, see get_polynomial_background().
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        order (int, optional): order of the polynomial, 1 removes a plane. Defaults to 1.
+        mask (np.ndarray, optional): only pixels where the mask is not zero are used for the fit. Defaults to None.
+
+    Returns:
+        np.ndarray: the leveled data
+    """
+    data = np.asarray(data)
+    background = get_polynomial_background(data, order, mask)
+    return data - background.astype(get_float_dtype(data.dtype), copy=False)
@@ -0,0 +1,195 @@
+'''Buffered journal of the operations applied to a measurement. Each operation is stored as one json object per line,
+together with the arguments it was called with and the answers the user gave during the operation.
+Such a journal can be replayed on other measurements without any user interaction.'''
+
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import atexit
+import functools
+import json
+import threading
+import uuid
+import weakref
+from datetime import datetime
+from pathlib import Path, PurePath
+from typing import Callable, Optional
+import numpy as np
+
+# all files with unwritten lines, they are written when the interpreter exits
+_open_files = weakref.WeakSet()
+_open_files_lock = threading.Lock()
+
+def flush_open_files(path=None) -> None:
+    """Writes the buffered lines of all open files, or only of the files with the specified path.
+
+    Args:
+        path (Path, optional): only flush the files with this path. Defaults to None.
+    """
+    with _open_files_lock:
+        files = list(_open_files)
+    if path is not None:
+        path = Path(path).resolve()
+    for file in files:
+        try:
+            if path is None or file.path.resolve() == path:
+                file.flush()
+        except: pass
+
+atexit.register(flush_open_files)
+
+
+class BufferedAppendFile:
+    """Text file to which lines are only appended. The lines are kept in memory and written together,
+    once the buffer is full, flush() is called or the interpreter exits.
+
+    Args:
+        path (Path): path of the file
+        buffer_size (int, optional): number of lines which are kept in memory before they are written. Defaults to 64.
+    """
+    def __init__(self, path, buffer_size:int=64) -> None:
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self._lines = []
+        self._lock = threading.Lock()
+        with _open_files_lock:
+            _open_files.add(self)
+
+    def write(self, line:str) -> None:
+        """Appends a line to the file, the line must include the line break."""
+        with self._lock:
+            self._lines.append(line)
+            full = len(self._lines) >= self.buffer_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes all buffered lines to the file."""
+        with self._lock:
+            if not self._lines:
+                return
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.writelines(self._lines)
+            self._lines = []
+
+    def __del__(self) -> None:
+        try: self.flush()
+        except: pass
+
+
+def to_json_value(value):
+    """Converts the argument of an operation to a value which can be stored in json, numpy types are converted to the python types.
+
+    Args:
+        value: the argument
+
+    Returns:
+        the converted argument
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, (tuple, list)):
+        return [to_json_value(element) for element in value]
+    elif isinstance(value, dict):
+        return {str(key): to_json_value(element) for key, element in value.items()}
+    elif isinstance(value, PurePath):
+        return str(value)
+    elif isinstance(value, np.dtype) or (isinstance(value, type) and issubclass(value, np.generic)):
+        return np.dtype(value).name
+    return value
+
+
+class OperationJournal(BufferedAppendFile):
+    """Journal of the operations applied to a measurement, stored as json lines.
+    Every instance starts a new session, so the operations of one measurement instance can be read back with read_journal().
+
+    Args:
+        path (Path): path of the journal file
+        measurement (str): name of the measurement
+        buffer_size (int, optional): number of records which are kept in memory before they are written. Defaults to 64.
+    """
+    def __init__(self, path, measurement:str, buffer_size:int=64) -> None:
+        super().__init__(path, buffer_size)
+        self.measurement = measurement
+        self.session = uuid.uuid4().hex
+
+    def record(self, operation:str, arguments:dict, answers:Optional[list]=None, measurement_class:Optional[str]=None, replayable:bool=True) -> None:
+        """Adds an operation to the journal.
+
+        Args:
+            operation (str): name of the method
+            arguments (dict): arguments of the method, they must be convertible with to_json_value()
+            answers (list, optional): answers of the user to the questions asked during the operation. Defaults to None.
+            measurement_class (str, optional): name of the measurement class, only used for the creation of the measurement. Defaults to None.
+            replayable (bool, optional): False if the operation depends on data which is not stored in the journal. Defaults to True.
+        """
+        record = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'session': self.session,
+            'measurement': self.measurement,
+            'operation': operation,
+            'arguments': to_json_value(arguments),
+            'answers': to_json_value(answers) if answers else [],
+        }
+        if measurement_class is not None:
+            record['class'] = measurement_class
+        if not replayable:
+            record['replayable'] = False
+        self.write(json.dumps(record) + '\n')
+
+
+def read_journal(path, session:Optional[str]='last') -> list:
+    """Reads the records of a journal file. Incomplete or broken lines are skipped.
+
+    Args:
+        path (Path): path of the journal file
+        session (str, optional): only return the records of this session, 'last' for the last session in the file or None for all records. Defaults to 'last'.
+
+    Returns:
+        list: the records as dictionaries
+    """
+    # records of this session might still be buffered
+    flush_open_files(path)
+    records = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try: records.append(json.loads(line))
+            except: pass
+    if session == 'last':
+        if not records:
+            return records
+        session = records[-1].get('session')
+    if session is not None:
+        records = [record for record in records if record.get('session') == session]
+    return records
+
+def journaled(method:Optional[Callable]=None, replayable:bool=True) -> Callable:
+    """Decorator for the methods of a measurement which should be recorded in the operation journal.
+    The measurement must provide _run_operation(method, args, kwargs, replayable), which calls the method and records it.
+    Operations which depend on data passed by the user, like arrays, are decorated with @journaled(replayable=False).
+    They are recorded without their array arguments, and journals containing them can not be replayed.
+    """
+    if method is None:
+        return functools.partial(journaled, replayable=replayable)
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._run_operation(method, args, kwargs, replayable)
+    return wrapper
@@ -60,17 +60,13 @@ def get_difference(value1, value2):
 def get_difference_2(value1, value2):
     return value1-value2
     
-def get_profile_difference(profile1:list, profile2:list) -> list:
+def get_profile_difference(profile1:list, profile2:list) -> np.ndarray:
     # difference = [abs(profile1[i] - profile2[i]) for i in range(len(profile1))]
     # difference = [profile1[i] - profile2[i] for i in range(len(profile1))]
     # difference = [abs(profile1[i] - profile2[i]) if abs(profile1[i] - profile2[i])< np.pi else 2*np.pi - abs(profile1[i] - profile2[i]) for i in range(len(profile1))]
-    difference = []
-    for i in range(len(profile1)):
-        # difference.append(get_smallest_difference(profile1[i], profile2[i]))
-        difference.append(get_difference(profile1[i], profile2[i]))
-
-    return difference
-    # pass
+    # same as get_difference() for every point, profile2 can also be a stack of profiles (profile, point)
+    difference = np.asarray(profile1) - np.asarray(profile2)
+    return np.where(difference < 0, difference + 2*np.pi, difference)
 
 def get_profile_difference_2(profile1:list, profile2:list) -> list:
     difference = []
@@ -83,3 +79,89 @@ def get_modeindex_from_linearfunction(slope, pixelsize, wavelength=1600):
     period = np.pi*2/slope*pixelsize
     mode_index = wavelength/period
     return mode_index
+
+def wrap_phase(data:np.ndarray, inplace:bool=False) -> np.ndarray:
+    """Wraps the phase data to the interval [0, 2pi).
+
+    Args:
+        data (np.ndarray): phase data
+        inplace (bool, optional): if True the data array is changed and returned, otherwise a new array is returned. Defaults to False.
+
+    Returns:
+        np.ndarray: the wrapped phase data
+    """
+    if inplace:
+        return np.mod(data, 2*np.pi, out=data)
+    return np.mod(data, 2*np.pi)
+
+def shift_phase(data:np.ndarray, shift:float, inplace:bool=False) -> np.ndarray:
+    """Adds a constant phase shift to the phase data and wraps the result to the interval [0, 2pi).
+
+    Args:
+        data (np.ndarray): phase data
+        shift (float): phase shift in rad
+        inplace (bool, optional): if True the data array is changed and returned, otherwise a new array is returned. Defaults to False.
+
+    Returns:
+        np.ndarray: the shifted phase data
+    """
+    if inplace:
+        np.add(data, shift, out=data)
+        return wrap_phase(data, inplace=True)
+    return wrap_phase(np.add(data, shift), inplace=True)
+
+def level_phase_slope(data:np.ndarray, slope:float, inplace:bool=False) -> np.ndarray:
+    """Subtracts a linear phase gradient in y direction, row y is shifted by -y*slope. The result is wrapped to the interval [0, 2pi).
+
+    Args:
+        data (np.ndarray): phase data
+        slope (float): phase slope in rad per pixel
+        inplace (bool, optional): if True the data array is changed and returned, otherwise a new array is returned. Defaults to False.
+
+    Returns:
+        np.ndarray: the leveled phase data
+    """
+    gradient = (np.arange(len(data))*slope)[:, np.newaxis]
+    if inplace:
+        np.subtract(data, gradient, out=data)
+        return wrap_phase(data, inplace=True)
+    return wrap_phase(np.subtract(data, gradient), inplace=True)
+
+def amp_phase_to_complex(amp:np.ndarray, phase:np.ndarray) -> np.ndarray:
+    """Converts amplitude and phase data to complex data.
+
+    Args:
+        amp (np.ndarray): amplitude data
+        phase (np.ndarray): phase data in rad
+
+    Returns:
+        np.ndarray: the complex data
+    """
+    return np.add(amp*np.cos(phase), 1J*(amp*np.sin(phase)))
+
+def complex_to_phase(compl:np.ndarray) -> np.ndarray:
+    """Returns the phase of complex data in the interval [0, 2pi).
+
+    Args:
+        compl (np.ndarray): complex data
+
+    Returns:
+        np.ndarray: the phase data
+    """
+    realpart = compl.real
+    imagpart = compl.imag
+    r = np.sqrt(pow(imagpart, 2) + pow(realpart, 2))
+    phase = np.arctan2(r*imagpart, r*realpart) # returns values between -pi and pi, add 2pi for the negative values
+    phase[phase < 0] += 2*np.pi
+    return phase
+
+def complex_to_amp_phase(compl:np.ndarray) -> tuple:
+    """Converts complex data to amplitude and phase data, the phase is in the interval [0, 2pi).
+
+    Args:
+        compl (np.ndarray): complex data
+
+    Returns:
+        tuple: amplitude and phase data
+    """
+    return np.abs(compl), complex_to_phase(compl)
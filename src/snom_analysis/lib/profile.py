@@ -17,20 +17,158 @@
 # along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
 ##############################################################################
 
-# import numpy as np
-# from matplotlib import pyplot as plt
-
+import numpy as np
+from .additional_functions import get_float_dtype
 
+# cutlines are given as [start, end, width] with start and end as [x, y] pixel coordinates, like the selection of the CutlineSelector
+# the sampling follows skimage.measure.profile_line: bilinear interpolation, mirrored data at the edges and the mean over the width
 
 def horizontal_profile(array):
     xres = len(array[0])
     yres = len(array)
     print(f'xres: {xres}')
     print(f'yres: {yres}')
-    profile = []
-    for x in range(xres):
-        mean = 0
-        for y in range(yres):
-            mean += array[y][x]/yres
-        profile.append(mean)
-    return profile
+    return list(np.mean(array, axis=0))
+
+def get_cutline_length(start:list, end:list) -> int:
+    """Returns the number of points of a profile between start and end, one point per pixel including both end points.
+
+    Args:
+        start (list): [x, y] start point
+        end (list): [x, y] end point
+
+    Returns:
+        int: number of points
+    """
+    return int(np.ceil(np.hypot(end[0] - start[0], end[1] - start[1]) + 1))
+
+def get_cutline_coordinates(start:list, end:list, width:int=1, n_points:int=None) -> tuple:
+    """Returns the coordinates of all sampling points of a cutline. For each point on the line width points perpendicular to the line are sampled.
+
+    Args:
+        start (list): [x, y] start point
+        end (list): [x, y] end point
+        width (int, optional): width of the cutline in pixels. Defaults to 1.
+        n_points (int, optional): number of points along the line, if not specified one point per pixel is used. Defaults to None.
+
+    Returns:
+        tuple: x and y coordinates, each of shape (n_points, width)
+    """
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    if n_points is None:
+        n_points = get_cutline_length(start, end)
+    width = int(width)
+    # angle between the line and the y axis, for lines of zero length the width extends along x
+    theta = np.arctan2(end[0] - start[0], end[1] - start[1])
+    # the outer sampling points are (width - 1)/2 pixels away from the line
+    offsets = np.linspace(-0.5, 0.5, width)*(width - 1)
+    line_x = np.linspace(start[0], end[0], n_points)[:, np.newaxis]
+    line_y = np.linspace(start[1], end[1], n_points)[:, np.newaxis]
+    return line_x + np.cos(theta)*offsets, line_y - np.sin(theta)*offsets
+
+def _mirror_index(index:np.ndarray, size:int) -> np.ndarray:
+    # mirror indices outside of the data at the edges, -1 becomes 0 and size becomes size - 1
+    period = 2*size
+    index = np.mod(index, period)
+    return np.where(index >= size, period - 1 - index, index)
+
+
+class ProfileSampler:
+    """Extracts the profiles of many cutlines from 2D data. The interpolation indices and weights of all cutlines are calculated once,
+    afterwards the profiles of a single channel or of a whole channel stack are sampled in one vectorized step.
+    The profiles are returned as one array, shorter profiles are filled up with nan.
+
+    Args:
+        cutlines (list): list of cutlines [start, end, width], start and end are [x, y] pixel coordinates, the width is optional and defaults to 1
+        shape (tuple): (yres, xres) of the data
+        n_points (int, optional): number of points of every profile, if not specified each profile has one point per pixel. Defaults to None.
+    """
+    def __init__(self, cutlines:list, shape:tuple, n_points:int=None) -> None:
+        self.shape = tuple(shape[-2:])
+        self.cutlines = [self._get_cutline(cutline) for cutline in cutlines]
+        yres, xres = self.shape
+        self.lengths = np.array([get_cutline_length(start, end) if n_points is None else n_points for start, end, width in self.cutlines], dtype=int)
+        self.n_points = int(self.lengths.max()) if len(self.cutlines) > 0 else 0
+        indices, weights, positions, starts = [], [], [], []
+        n_values = 0
+        for number, (start, end, width) in enumerate(self.cutlines):
+            x, y = get_cutline_coordinates(start, end, width, self.lengths[number])
+            x0 = np.floor(x)
+            y0 = np.floor(y)
+            dx = x - x0
+            dy = y - y0
+            x0 = x0.astype(np.int64)
+            y0 = y0.astype(np.int64)
+            x_low, x_high = _mirror_index(x0, xres), _mirror_index(x0 + 1, xres)
+            y_low, y_high = _mirror_index(y0, yres), _mirror_index(y0 + 1, yres)
+            # the four neighbors of every sampling point, all values of one profile point are next to each other
+            indices.append(np.stack([y_low*xres + x_low, y_low*xres + x_high, y_high*xres + x_low, y_high*xres + x_high], axis=-1).reshape(len(x), -1))
+            weights.append(np.stack([(1 - dy)*(1 - dx), (1 - dy)*dx, dy*(1 - dx), dy*dx], axis=-1).reshape(len(x), -1)/width)
+            positions.append(number*self.n_points + np.arange(len(x)))
+            starts.append(n_values + np.arange(len(x))*4*width)
+            n_values += len(x)*4*width
+        if self.cutlines:
+            self._indices = np.concatenate([index.ravel() for index in indices])
+            self._weights = np.concatenate([weight.ravel() for weight in weights])
+            self._positions = np.concatenate(positions)
+            self._starts = np.concatenate(starts)
+
+    @staticmethod
+    def _get_cutline(cutline:list) -> tuple:
+        if len(cutline) == 2:
+            start, end = cutline
+            width = 1
+        else:
+            start, end, width = cutline
+        if int(width) < 1:
+            raise ValueError(f'The width of a cutline must be at least 1, not {width}!')
+        return [float(start[0]), float(start[1])], [float(end[0]), float(end[1])], int(width)
+
+    def sample(self, data:np.ndarray) -> np.ndarray:
+        """Returns the profiles of all cutlines.
+
+        Args:
+            data (np.ndarray): 2D data (y, x) or a stack of 2D data (channel, y, x) with the shape the sampler was created for
+
+        Returns:
+            np.ndarray: profiles of shape (cutline, point) for 2D data or (channel, cutline, point) for a stack
+        """
+        data = np.asarray(data)
+        if data.shape[-2:] != self.shape:
+            raise ValueError(f'The data has the shape {data.shape[-2:]}, but the cutlines were calculated for {self.shape}!')
+        dtype = get_float_dtype(data.dtype)
+        flat_data = data.reshape(-1, self.shape[0]*self.shape[1])
+        profiles = np.full((len(flat_data), len(self.cutlines)*self.n_points), np.nan, dtype=dtype)
+        if self.cutlines:
+            values = flat_data[:, self._indices]*self._weights.astype(dtype, copy=False)
+            profiles[:, self._positions] = np.add.reduceat(values, self._starts, axis=1)
+        return profiles.reshape(data.shape[:-2] + (len(self.cutlines), self.n_points))
+
+def get_profiles(data:np.ndarray, cutlines:list, n_points:int=None) -> np.ndarray:
+    """Returns the profiles of all cutlines, see ProfileSampler.
+
+    Args:
+        data (np.ndarray): 2D data (y, x) or a stack of 2D data (channel, y, x)
+        cutlines (list): list of cutlines [start, end, width], start and end are [x, y] pixel coordinates
+        n_points (int, optional): number of points of every profile, if not specified each profile has one point per pixel. Defaults to None.
+
+    Returns:
+        np.ndarray: profiles of shape (cutline, point) for 2D data or (channel, cutline, point) for a stack, shorter profiles are filled up with nan
+    """
+    data = np.asarray(data)
+    return ProfileSampler(cutlines, data.shape, n_points).sample(data)
+
+def get_profile(data:np.ndarray, start:list, end:list, width:int=1) -> np.ndarray:
+    """Returns the profile of a single cutline.
+
+    Args:
+        data (np.ndarray): 2D data (y, x) or a stack of 2D data (channel, y, x)
+        start (list): [x, y] start point
+        end (list): [x, y] end point
+        width (int, optional): width of the cutline in pixels, the profile is the mean over the width. Defaults to 1.
+
+    Returns:
+        np.ndarray: the profile, for a stack of shape (channel, point)
+    """
+    return get_profiles(data, [[start, end, width]])[..., 0, :]
@@ -24,8 +24,7 @@ from matplotlib.backend_bases import MouseButton
 import matplotlib.lines as mlines
 # import tkinter as tk
 from .snom_colormaps import SNOM_amplitude, SNOM_phase, SNOM_height
-
-import skimage as ski
+from .profile import get_profile
 
 def select_profile(data, channel):
     # root = tk.Tk()
@@ -35,7 +34,7 @@ def select_profile(data, channel):
     # root.mainloop()
 
     # create profile 
-    profile = ski.measure.profile_line(data.T, selector.start, selector.end, linewidth=selector.width) # somehow x and y are switched, therefore transpose the array
+    profile = get_profile(data, selector.start, selector.end, selector.width)
     # also return the physical length of the profile and the integration width
     return profile, selector.start, selector.end, selector.width
 
@@ -18,7 +18,9 @@
 ##############################################################################
 
 import numpy as np
-from matplotlib import pyplot as plt
+from .additional_functions import get_float_dtype
+from .lazy_imports import lazy_import
+plt = lazy_import('matplotlib.pyplot') # only used to display the drift estimation
 
 
 
@@ -58,18 +60,11 @@ def _shift_array_1d_by_index(array_1, array_2, index) -> tuple:
     """
     # print(f'in shift 1d, index: {index}')
     if index > 0:
-        array_1_new = array_1
-        array_2_new = array_2
-        for i in range(abs(index)):
-            # print(f'apply shift, i: {i}')
-            array_1_new = np.append(array_1_new, 0)
-            array_2_new = np.insert(array_2_new, 0, 0)
+        array_1_new = np.concatenate([array_1, np.zeros(index, dtype=np.result_type(np.asarray(array_1).dtype, 0))])
+        array_2_new = np.concatenate([np.zeros(index, dtype=np.result_type(np.asarray(array_2).dtype, 0)), array_2])
     elif index < 0:
-        array_1_new = array_1
-        array_2_new = array_2
-        for i in range(abs(index)):
-            array_1_new = np.insert(array_1_new, 0, 0)
-            array_2_new = np.append(array_2_new, 0)
+        array_1_new = np.concatenate([np.zeros(-index, dtype=np.result_type(np.asarray(array_1).dtype, 0)), array_1])
+        array_2_new = np.concatenate([array_2, np.zeros(-index, dtype=np.result_type(np.asarray(array_2).dtype, 0))])
     else:
         array_1_new = array_1
         array_2_new = array_2
@@ -86,19 +81,7 @@ def shift_array_2d_by_index(array_1, array_2, index) -> tuple:
     Returns:
         tuple: shifted arrays
     """
-    x_res = len(array_1[0])
-    y_res = len(array_1)
-    # print(f'xres={x_res} yres={y_res}, index={index}')
-    x_res_new = x_res + abs(index)
-    #create new lists with modified resolution
-    array_1_new = np.zeros((y_res, x_res_new))
-    array_2_new = np.zeros((y_res, x_res_new))
-    for y in range(y_res):
-        test_1, test_2 = _shift_array_1d_by_index(array_1[y], array_2[y], index)
-        # print(f'len test1: {len(test_1)}, len test 2: {len(test_2)}')
-        array_1_new[y] = test_1
-        array_2_new[y] = test_2
-        # array_1_new[y], array_2_new[y] = _shift_array_1d_by_index(array_1[y], array_2[y], index)
+    array_1_new, array_2_new, mean_array = overlay_shifted_arrays(array_1, array_2, index)
     return array_1_new, array_2_new
 
 def create_mean_array(array_1, array_2):
@@ -107,13 +90,7 @@ def create_mean_array(array_1, array_2):
         print('The length of the given arrays is not identical.')
         exit()
     else:
-        x_res = len(array_1[0])
-        y_res = len(array_1)
-        new_array = np.zeros((y_res, x_res))
-        for y in range(y_res):
-            for x in range(x_res):
-                new_array[y][x] = (array_1[y][x] + array_2[y][x])/2
-        return new_array
+        return (np.asarray(array_1, dtype=np.float64) + np.asarray(array_2, dtype=np.float64))/2
 
 def create_mean_array_v2(array_1, array_2, index):
     """This variant is meant to keep the size of the original array!
@@ -132,14 +109,13 @@ def create_mean_array_v2(array_1, array_2, index):
     else:
         x_res = len(array_1[0])
         y_res = len(array_1)
+        array_1 = np.asarray(array_1, dtype=np.float64)
+        array_2 = np.asarray(array_2, dtype=np.float64)
         new_array = np.zeros((y_res, x_res))
-        for y in range(y_res):
-            if index > 0:
-                for x in range(x_res - index):
-                    new_array[y][x] = (array_1[y][x+index] + array_2[y][x])/2
-            if index < 0:
-                for x in range(x_res - abs(index)):
-                    new_array[y][x] = (array_1[y][x] + array_2[y][x+abs(index)])/2
+        if index > 0:
+            new_array[:, :x_res - index] = (array_1[:, index:] + array_2[:, :x_res - index])/2
+        if index < 0:
+            new_array[:, :x_res - abs(index)] = (array_1[:, :x_res - abs(index)] + array_2[:, abs(index):])/2
         return new_array
 
 def minimize_deviation_1d(array_1, array_2, n_tries=5, display=True) -> int:
@@ -314,3 +290,201 @@ def minimize_drift(data:np.array, n_tries=5, display=False) -> np.array:
 
 
 
+def minimize_deviation_lines(reference, lines, n_tries=5, subpixel=False) -> np.ndarray:
+    """Batched version of minimize_deviation_1d. Finds the optimal shift of every line relative to the reference line at once.
+    For every shift between -n_tries and n_tries the mean absolute deviation of the overlapping values is calculated for all lines
+    with a sliding window, '0' and nan values are ignored like in calculate_squared_deviation.
+
+    Args:
+        reference (np.array): the reference line, typically height data
+        lines (np.ndarray): 2D array, each row is a line which should be compared to the reference
+        n_tries (int, optional): the maximum shift expected for optimal overlap, will be applied symmetrically to right and left shift. Defaults to 5.
+        subpixel (bool, optional): refine the shifts by fitting a parabola to the deviations around the optimal shift. Defaults to False.
+
+    Returns:
+        np.ndarray: the optimal shift for each line, left shift if negative. Integers unless subpixel is True.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    lines = np.asarray(lines, dtype=np.float64)
+    n_lines, length = lines.shape
+    if n_tries < 1:
+        return np.zeros(n_lines, dtype=float if subpixel else int)
+    # window i of the padded lines corresponds to a shift of n_tries - i
+    padded_lines = np.pad(lines, ((0, 0), (n_tries, n_tries)))
+    windows = np.lib.stride_tricks.sliding_window_view(padded_lines, length, axis=1)
+    deviations = np.abs(windows - reference)
+    ignored = (windows == 0) | (reference == 0) | np.isnan(deviations)
+    deviations[ignored] = 0
+    # like minimize_deviation_1d the mean is taken over the length of the shifted arrays, sorted from shift -n_tries to n_tries
+    shifts = np.arange(-n_tries, n_tries + 1)
+    mean_deviations = np.sum(deviations, axis=2)[:, ::-1]/(length + np.abs(shifts))
+    dev_center = mean_deviations[:, n_tries]
+    # the smallest shift wins if several shifts lead to the same deviation
+    index_left = np.argmin(mean_deviations[:, n_tries-1::-1], axis=1)
+    index_right = np.argmin(mean_deviations[:, n_tries+1:], axis=1)
+    dev_left = mean_deviations[np.arange(n_lines), n_tries - 1 - index_left]
+    dev_right = mean_deviations[np.arange(n_lines), n_tries + 1 + index_right]
+    optimal_shifts = np.zeros(n_lines, dtype=int)
+    use_left = (dev_left <= dev_right) & (dev_left < dev_center)
+    use_right = ~use_left & (dev_left > dev_right) & (dev_right < dev_center)
+    optimal_shifts[use_left] = -(index_left[use_left] + 1)
+    optimal_shifts[use_right] = index_right[use_right] + 1
+    if not subpixel:
+        return optimal_shifts
+    # parabolic interpolation between the neighbouring shifts, not possible at the borders of the search range
+    optimal_shifts = optimal_shifts.astype(float)
+    inner = np.abs(optimal_shifts) < n_tries
+    columns = optimal_shifts[inner].astype(int) + n_tries
+    rows = np.arange(n_lines)[inner]
+    previous = mean_deviations[rows, columns - 1]
+    center = mean_deviations[rows, columns]
+    following = mean_deviations[rows, columns + 1]
+    curvature = previous - 2*center + following
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offsets = np.where(curvature > 0, (previous - following)/(2*curvature), 0)
+    optimal_shifts[inner] += np.clip(offsets, -0.5, 0.5)
+    return optimal_shifts
+
+def shift_lines(data, shifts, axis=1) -> np.ndarray:
+    """Shifts each line of the data along the given axis by the corresponding shift.
+    The data is placed in a new array which is large enough to hold all shifted lines, empty positions are filled with zeros.
+    Lines are along axis 0, additional axes after the shifted axis are kept, e.g. the z axis of 3D scans.
+    Fractional shifts are applied with linear interpolation.
+
+    Args:
+        data (np.ndarray): data with the lines along axis 0
+        shifts (np.ndarray): shift for each line, the smallest shift is placed at index 0
+        axis (int, optional): axis along which the lines are shifted. Defaults to 1.
+
+    Returns:
+        np.ndarray: the shifted data
+    """
+    data = np.asarray(data)
+    shifts = np.asarray(shifts)
+    shifts = shifts - np.min(shifts)
+    integer_shifts = np.floor(shifts).astype(int)
+    fractions = shifts - integer_shifts
+    data = np.moveaxis(data, axis, 1)
+    n_lines, length = data.shape[:2]
+    new_shape = (n_lines, length + int(np.ceil(np.max(shifts)))) + data.shape[2:]
+    new_data = np.zeros(new_shape, dtype=get_float_dtype(data.dtype))
+    rows = np.arange(n_lines)[:, np.newaxis]
+    columns = np.arange(length)[np.newaxis, :] + integer_shifts[:, np.newaxis]
+    new_data[rows, columns] = data
+    if np.any(fractions > 0):
+        # split the values of lines with fractional shifts onto the two neighbouring pixels
+        fractional = fractions > 0
+        weights = fractions[fractional].reshape((-1, 1) + (1,)*(data.ndim - 2))
+        rows = rows[fractional]
+        columns = columns[fractional]
+        new_data[rows, columns] = (1 - weights)*data[fractional]
+        new_data[rows, columns + 1] += weights*data[fractional]
+    return np.moveaxis(new_data, 1, axis)
+
+def estimate_shift_fft(array_1, array_2, max_shift:int, per_row:bool=False, subpixel:bool=False):
+    """Estimates the shift of the second 2D array relative to the first along the x axis with a cross correlation of the rows.
+    The cross correlation of all rows is calculated at once with the FFT. The mean of each row is removed first and nan values are ignored.
+    The same convention as in minimize_deviation_1d is used, a positive shift means the second array has to be shifted to the right.
+
+    Args:
+        array_1 (np.ndarray): first and reference array, typically height data
+        array_2 (np.ndarray): second array, typically height data
+        max_shift (int): maximum expected shift, applied symmetrically to the right and left
+        per_row (bool, optional): estimate an individual shift for each row instead of one shift for the whole array. Defaults to False.
+        subpixel (bool, optional): refine the shift by fitting a parabola to the correlation peak. Defaults to False.
+
+    Returns:
+        int, float or np.ndarray: the shift, or an array with the shift of each row if per_row is True. Integers unless subpixel is True.
+    """
+    array_1 = np.atleast_2d(np.asarray(array_1, dtype=np.float64))
+    array_2 = np.atleast_2d(np.asarray(array_2, dtype=np.float64))
+    length = array_1.shape[1]
+    max_shift = int(min(max_shift, length - 1))
+    rows = []
+    for array in (array_1, array_2):
+        # without the mean the correlation would mostly depend on the length of the overlap
+        array = array - np.nanmean(array, axis=1, keepdims=True)
+        rows.append(np.nan_to_num(array, nan=0.0))
+    # zero padding to twice the length prevents the cyclic wrap around of the correlation
+    size = 2*length
+    correlation = np.fft.irfft(np.fft.rfft(rows[0], size, axis=1)*np.conj(np.fft.rfft(rows[1], size, axis=1)), size, axis=1)
+    shifts = np.arange(-max_shift, max_shift + 1)
+    correlation = correlation[:, shifts % size]
+    if not per_row:
+        correlation = np.sum(correlation, axis=0, keepdims=True)
+    peaks = np.argmax(correlation, axis=1)
+    optimal_shifts = shifts[peaks]
+    if subpixel:
+        optimal_shifts = optimal_shifts.astype(float)
+        inner = (peaks > 0) & (peaks < len(shifts) - 1)
+        row_indices = np.arange(len(peaks))[inner]
+        previous = correlation[row_indices, peaks[inner] - 1]
+        center = correlation[row_indices, peaks[inner]]
+        following = correlation[row_indices, peaks[inner] + 1]
+        curvature = previous - 2*center + following
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offsets = np.where(curvature < 0, (previous - following)/(2*curvature), 0)
+        optimal_shifts[inner] += np.clip(offsets, -0.5, 0.5)
+    if per_row:
+        return optimal_shifts
+    return optimal_shifts[0].item()
+
+def _sample_rows(data, positions) -> tuple:
+    """Samples each row of the 2D data at the given positions with linear interpolation.
+    Returns the values and a mask of the valid positions, values outside of the data are 0."""
+    length = data.shape[1]
+    lower = np.floor(positions).astype(int)
+    fractions = positions - lower
+    has_fraction = fractions > 0
+    valid = (lower >= 0) & (lower < length) & (~has_fraction | (lower + 1 < length))
+    rows = np.arange(data.shape[0])[:, np.newaxis]
+    values = data[rows, np.clip(lower, 0, length - 1)]
+    if np.any(has_fraction):
+        following = data[rows, np.clip(lower + 1, 0, length - 1)]
+        values = np.where(has_fraction, (1 - fractions)*values + fractions*following, values)
+    return np.where(valid, values, 0), valid
+
+def overlay_shifted_arrays(array_1, array_2, shifts, keep_size:bool=False) -> tuple:
+    """Shifts the second 2D array relative to the first and creates the mean of both, e.g. to overlay forward and backward channels.
+    Fractional shifts are applied to the second array with linear interpolation.
+
+    If keep_size is False both arrays are placed in a larger array which can hold both, zeros are added on the outside,
+    and the mean is taken of the enlarged arrays like create_mean_array does. For a single integer shift this is identical to
+    shift_array_2d_by_index followed by create_mean_array.
+    If keep_size is True only the overlapping part is averaged and stored at the beginning of each row, the rest is filled with zeros,
+    like create_mean_array_v2 does. Unlike create_mean_array_v2 a shift of 0 averages the complete arrays.
+
+    Args:
+        array_1 (np.ndarray): first and reference array
+        array_2 (np.ndarray): second array
+        shifts (float or np.ndarray): shift of the second array, or one shift per row, to the left if negative
+        keep_size (bool, optional): keep the size of the arrays. Defaults to False.
+
+    Returns:
+        tuple: the shifted first array, the shifted second array and the mean array
+    """
+    # float32 data stays in single precision
+    dtype = np.result_type(get_float_dtype(np.asarray(array_1).dtype), get_float_dtype(np.asarray(array_2).dtype))
+    array_1 = np.asarray(array_1, dtype=dtype)
+    array_2 = np.asarray(array_2, dtype=dtype)
+    y_res, x_res = array_1.shape
+    shifts = np.broadcast_to(np.asarray(shifts, dtype=np.float64), (y_res,))[:, np.newaxis]
+    if keep_size:
+        # positions of the first array which are combined with the second array in each row
+        offsets = np.maximum(np.ceil(shifts), 0)
+        positions = np.arange(x_res)[np.newaxis, :] + offsets
+        valid_1 = positions < x_res
+        array_1_new = np.where(valid_1, array_1[np.arange(y_res)[:, np.newaxis], np.minimum(positions, x_res - 1).astype(int)], 0)
+        array_2_new, valid_2 = _sample_rows(array_2, positions - shifts)
+        mean_array = np.where(valid_1 & valid_2, (array_1_new + array_2_new)/2, 0)
+        return array_1_new, array_2_new.astype(dtype, copy=False), mean_array.astype(dtype, copy=False)
+    # the first array is shifted to the right to make room for negative shifts of the second array
+    offset = int(max(np.ceil(-np.min(shifts)), 0))
+    x_res_new = x_res + offset + int(max(np.ceil(np.max(shifts)), 0))
+    array_1_new = np.zeros((y_res, x_res_new), dtype=dtype)
+    array_1_new[:, offset:offset + x_res] = array_1
+    positions = np.arange(x_res_new)[np.newaxis, :] - offset - shifts
+    array_2_new, valid_2 = _sample_rows(array_2, positions)
+    array_2_new = array_2_new.astype(dtype, copy=False)
+    mean_array = (array_1_new + array_2_new)/2
+    return array_1_new, array_2_new, mean_array
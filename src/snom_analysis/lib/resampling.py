@@ -0,0 +1,159 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import numpy as np
+
+# all functions work on the last two axes, so single channels (y, x) and channel stacks (channel, y, x) can be used
+METHODS = ['nearest', 'bilinear', 'fourier']
+
+def _nearest_indices(n_in:int, n_out:int) -> np.ndarray:
+    """Returns the source index for every target pixel. The pixel centers are mapped like in pillow,
+    including the accumulation of the step size, so the result is identical to Image.resize with Image.Resampling.NEAREST.
+    """
+    step = n_in/n_out
+    positions = np.full(n_out, step)
+    positions[0] = step*0.5
+    # cumsum adds the steps one after another like pillow does
+    return np.minimum(np.cumsum(positions).astype(np.int64), n_in - 1)
+
+def _weight_dtype(data:np.ndarray) -> np.dtype:
+    """Returns the float type for the interpolation weights, single precision data is not converted to double precision."""
+    if np.issubdtype(data.dtype, np.inexact):
+        return np.finfo(data.dtype).dtype
+    return np.dtype(np.float64)
+
+def _bilinear_weights(n_in:int, n_out:int) -> tuple:
+    """Returns the lower source index, upper source index and the weight of the upper index for every target pixel.
+    The pixel centers of source and target are aligned.
+    """
+    positions = (np.arange(n_out) + 0.5)*n_in/n_out - 0.5
+    positions = np.clip(positions, 0, n_in - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, n_in - 1)
+    return lower, upper, positions - lower
+
+def scale_nearest(data:np.ndarray, scale_y:int, scale_x:int) -> np.ndarray:
+    """Scales the data by integer factors with block replication, each pixel becomes scale_y*scale_x identical subpixels.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        scale_y (int): scaling factor in y direction
+        scale_x (int): scaling factor in x direction
+
+    Returns:
+        np.ndarray: the scaled data
+    """
+    data = np.asarray(data)
+    return np.repeat(np.repeat(data, scale_y, axis=-2), scale_x, axis=-1)
+
+def resize_nearest(data:np.ndarray, yres:int, xres:int) -> np.ndarray:
+    """Resizes the data to the new resolution using the nearest pixel.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        yres (int): new resolution in y direction
+        xres (int): new resolution in x direction
+
+    Returns:
+        np.ndarray: the resized data
+    """
+    data = np.asarray(data)
+    y_indices = _nearest_indices(data.shape[-2], yres)
+    x_indices = _nearest_indices(data.shape[-1], xres)
+    return np.take(np.take(data, y_indices, axis=-2), x_indices, axis=-1)
+
+def resize_bilinear(data:np.ndarray, yres:int, xres:int) -> np.ndarray:
+    """Resizes the data to the new resolution using bilinear interpolation.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        yres (int): new resolution in y direction
+        xres (int): new resolution in x direction
+
+    Returns:
+        np.ndarray: the resized data
+    """
+    data = np.asarray(data)
+    dtype = _weight_dtype(data)
+    lower, upper, weight = _bilinear_weights(data.shape[-2], yres)
+    weight = weight[:, np.newaxis].astype(dtype)
+    data = np.take(data, lower, axis=-2)*(1 - weight) + np.take(data, upper, axis=-2)*weight
+    lower, upper, weight = _bilinear_weights(data.shape[-1], xres)
+    weight = weight.astype(dtype)
+    return np.take(data, lower, axis=-1)*(1 - weight) + np.take(data, upper, axis=-1)*weight
+
+def resize_fourier(data:np.ndarray, yres:int, xres:int) -> np.ndarray:
+    """Resizes the data to the new resolution in the Fourier domain, by zero padding or cropping the spectrum.
+    This assumes periodic data, so steps between opposite borders of the image cause ringing.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        yres (int): new resolution in y direction
+        xres (int): new resolution in x direction
+
+    Returns:
+        np.ndarray: the resized data
+    """
+    # scipy.signal takes long to import and is only needed here
+    from scipy.signal import resample as fourier_resample
+    data = np.asarray(data)
+    if data.shape[-2] != yres:
+        data = fourier_resample(data, yres, axis=-2)
+    if data.shape[-1] != xres:
+        data = fourier_resample(data, xres, axis=-1)
+    return data
+
+def resize(data:np.ndarray, yres:int, xres:int, method:str='nearest') -> np.ndarray:
+    """Resizes the data to the new resolution.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        yres (int): new resolution in y direction
+        xres (int): new resolution in x direction
+        method (str, optional): 'nearest', 'bilinear' or 'fourier'. Defaults to 'nearest'.
+
+    Returns:
+        np.ndarray: the resized data
+    """
+    if method == 'nearest':
+        return resize_nearest(data, yres, xres)
+    elif method == 'bilinear':
+        return resize_bilinear(data, yres, xres)
+    elif method == 'fourier':
+        return resize_fourier(data, yres, xres)
+    raise ValueError(f'Unknown resampling method {method}, use one of {METHODS}!')
+
+def scale(data:np.ndarray, scale_y:int, scale_x:int=None, method:str='nearest') -> np.ndarray:
+    """Scales the data by integer factors.
+
+    Args:
+        data (np.ndarray): 2D data or a stack of 2D data
+        scale_y (int): scaling factor in y direction
+        scale_x (int, optional): scaling factor in x direction, if not specified scale_y is used. Defaults to None.
+        method (str, optional): 'nearest', 'bilinear' or 'fourier'. Defaults to 'nearest'.
+
+    Returns:
+        np.ndarray: the scaled data
+    """
+    if scale_x is None:
+        scale_x = scale_y
+    if method == 'nearest':
+        return scale_nearest(data, scale_y, scale_x)
+    data = np.asarray(data)
+    return resize(data, data.shape[-2]*scale_y, data.shape[-1]*scale_x, method)
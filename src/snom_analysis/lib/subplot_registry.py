@@ -0,0 +1,315 @@
+'''Registry for the subplots of the snom_analysis package. The subplots are kept in memory and every change is appended to a journal file,
+such that the subplots are also available in later sessions without rewriting all subplots on every change.'''
+
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+import os
+import pickle as pkl
+import threading
+from pathlib import Path
+import numpy as np
+try:
+    import fcntl
+except ImportError:
+    # windows
+    fcntl = None
+    import msvcrt
+
+# journal operations
+_ADD = 'add'
+_REMOVE = 'remove'
+_POP = 'pop'
+_SWAP = 'swap'
+
+# one registry per journal file, shared by all measurements of the session
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_subplot_registry(path, legacy_path=None) -> 'SubplotRegistry':
+    """Returns the registry for the given journal file. All measurements using the same file share the same registry.
+
+    Args:
+        path (Path): path of the journal file
+        legacy_path (Path, optional): pickle file of the subplots of previous versions, it is imported once if the journal does not exist yet.
+            Defaults to None.
+
+    Returns:
+        SubplotRegistry: the registry
+    """
+    key = os.path.abspath(path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = SubplotRegistry(path)
+            if legacy_path is not None:
+                registry.import_legacy_file(legacy_path)
+            _registries[key] = registry
+    return registry
+
+
+class _FileLock:
+    """Exclusive lock between processes, held on a separate lock file since the journal itself is replaced when it is compacted.
+
+    Args:
+        path (Path): path of the lock file
+    """
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self._file = None
+
+    def __enter__(self) -> '_FileLock':
+        self._file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            # locks the first byte, retries for about 10 seconds before an OSError is raised
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *args) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class SubplotRegistry:
+    """Keeps all subplots in memory and persists them incrementally in an append only journal file.
+    Each added subplot is written once, the metadata is pickled and the data array is stored in the binary npy format.
+    Removing or reordering subplots only appends a small record. If the journal contains more outdated records than subplots
+    it is rewritten with only the current subplots. Changes of the journal by other processes are read before every operation,
+    the changes are made while holding a lock on a lock file next to the journal, so records of different processes are never lost.
+
+    Args:
+        path (Path): path of the journal file
+    """
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self._subplots = []
+        self._file_id = None # (device, inode) of the journal which was read
+        self._offset = 0 # position up to which the journal was read
+        self._outdated_records = 0
+        self._lock = threading.RLock()
+        self._file_lock = _FileLock(self.path.with_name(f'{self.path.name}.lock'))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._subplots)
+
+    def get_all(self) -> list:
+        """Returns a list of all subplots in the order they were added."""
+        with self._lock:
+            self._sync()
+            return list(self._subplots)
+
+    def append(self, subplot:dict) -> None:
+        """Adds a subplot to the registry.
+
+        Args:
+            subplot (dict): the subplot, the data array is stored under the key 'data'
+        """
+        with self._lock, self._file_lock:
+            self._sync()
+            self._subplots.append(subplot)
+            self._write_records([(_ADD, subplot)])
+
+    def remove(self, index_array:list) -> None:
+        """Removes the subplots with the specified indices.
+
+        Args:
+            index_array (list): indices of the subplots to remove
+        """
+        with self._lock, self._file_lock:
+            self._sync()
+            subplots = list(self._subplots)
+            indices = sorted(index_array, reverse=True)
+            for index in indices:
+                del subplots[index]
+            self._subplots = subplots
+            self._outdated_records += len(indices)
+            self._write_records([(_REMOVE, indices)])
+
+    def pop(self, times:int=1) -> None:
+        """Removes the last added subplots.
+
+        Args:
+            times (int): number of subplots to remove from the end
+        """
+        with self._lock, self._file_lock:
+            self._sync()
+            subplots = list(self._subplots)
+            for i in range(times):
+                subplots.pop()
+            self._subplots = subplots
+            self._outdated_records += times
+            self._write_records([(_POP, times)])
+
+    def swap(self, first_id:int, second_id:int) -> None:
+        """Switches the position of two subplots.
+
+        Args:
+            first_id (int): index of the first subplot
+            second_id (int): index of the second subplot
+        """
+        with self._lock, self._file_lock:
+            self._sync()
+            subplots = list(self._subplots)
+            subplots[first_id], subplots[second_id] = subplots[second_id], subplots[first_id]
+            self._subplots = subplots
+            self._outdated_records += 1
+            self._write_records([(_SWAP, [first_id, second_id])])
+
+    def import_legacy_file(self, legacy_path) -> bool:
+        """Imports the subplots of the pickle file which was used before the journal, if the journal does not exist yet.
+        Afterwards the pickle file is renamed with the suffix '.migrated', so it is only imported once.
+
+        Args:
+            legacy_path (Path): path of the pickle file, a list of all subplots
+
+        Returns:
+            bool: True if subplots were imported, False otherwise
+        """
+        legacy_path = Path(legacy_path)
+        with self._lock, self._file_lock:
+            if self.path.exists() or not legacy_path.exists():
+                return False
+            try:
+                with open(legacy_path, 'rb') as file:
+                    subplots = pkl.load(file)
+            except:
+                print('Could not import the subplots of the old subplot file!')
+                return False
+            if not isinstance(subplots, list):
+                return False
+            self._subplots = list(subplots)
+            self._compact()
+            try:
+                os.replace(legacy_path, legacy_path.with_name(f'{legacy_path.name}.migrated'))
+            except: pass
+            return True
+
+    def clear(self) -> None:
+        """Removes all subplots and deletes the journal file."""
+        with self._lock, self._file_lock:
+            try:
+                os.remove(self.path)
+            except: pass
+            self._reset()
+
+    def _reset(self) -> None:
+        self._subplots = []
+        self._file_id = None
+        self._offset = 0
+        self._outdated_records = 0
+
+    def _sync(self) -> None:
+        """Reads changes of the journal which were not made by this registry, e.g. by a different process."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._file_id is not None:
+                # the journal was deleted
+                self._reset()
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            # the journal was replaced, read it completely
+            self._reset()
+            self._read_records(file_id)
+        elif stat.st_size > self._offset:
+            self._read_records(file_id)
+
+    def _read_records(self, file_id:tuple) -> None:
+        with open(self.path, 'rb') as file:
+            file.seek(self._offset)
+            while True:
+                try:
+                    operation, value, has_array = pkl.load(file)
+                    if has_array:
+                        value = dict(value, data=np.lib.format.read_array(file, allow_pickle=False))
+                except:
+                    # end of the journal or an incomplete last record
+                    break
+                self._apply(operation, value)
+                self._offset = file.tell()
+        self._file_id = file_id
+
+    def _apply(self, operation:str, value) -> None:
+        if operation == _ADD:
+            self._subplots.append(value)
+        elif operation == _REMOVE:
+            for index in value:
+                del self._subplots[index]
+            self._outdated_records += len(value)
+        elif operation == _POP:
+            for i in range(value):
+                self._subplots.pop()
+            self._outdated_records += value
+        elif operation == _SWAP:
+            first_id, second_id = value
+            self._subplots[first_id], self._subplots[second_id] = self._subplots[second_id], self._subplots[first_id]
+            self._outdated_records += 1
+
+    def _write_records(self, records:list) -> None:
+        # must be called while holding the file lock and after _sync(), so the journal contains no records which were not read yet
+        # the records were already applied to the subplots in memory, if the journal contains mostly outdated records rewrite it instead
+        if self._outdated_records > max(len(self._subplots), 16):
+            self._compact()
+            return
+        with open(self.path, 'ab') as file:
+            # everything after the last record which could be read is an incomplete record, e.g. of a process which was killed while writing,
+            # it would hide everything appended after it
+            if file.tell() > self._offset:
+                file.truncate(self._offset)
+                file.seek(self._offset)
+            for operation, value in records:
+                self._dump_record(file, operation, value)
+            self._offset = file.tell()
+            stat = os.fstat(file.fileno())
+        self._file_id = (stat.st_dev, stat.st_ino)
+
+    def _compact(self) -> None:
+        """Rewrites the journal with only the current subplots."""
+        temp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        with open(temp_path, 'wb') as file:
+            for subplot in self._subplots:
+                self._dump_record(file, _ADD, subplot)
+            offset = file.tell()
+        os.replace(temp_path, self.path)
+        stat = os.stat(self.path)
+        self._file_id = (stat.st_dev, stat.st_ino)
+        self._offset = offset
+        self._outdated_records = 0
+
+    def _dump_record(self, file, operation:str, value) -> None:
+        # store numeric data arrays in the npy format instead of pickling them
+        if operation == _ADD and isinstance(value, dict) and isinstance(value.get('data'), np.ndarray) and not value['data'].dtype.hasobject:
+            metadata = {key: item for key, item in value.items() if key != 'data'}
+            pkl.dump((operation, metadata, True), file, protocol=pkl.HIGHEST_PROTOCOL)
+            np.lib.format.write_array(file, value['data'], allow_pickle=False)
+        else:
+            pkl.dump((operation, value, False), file, protocol=pkl.HIGHEST_PROTOCOL)
@@ -19,51 +19,63 @@
 # along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
 ##############################################################################
 
-from scipy.ndimage import gaussian_filter # one could implement a bunch more filters
-from scipy.optimize import curve_fit
-from struct import unpack, pack
 import re
 from typing import Optional
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-from mpl_point_clicker import clicker# used for getting coordinates from images
-from matplotlib_scalebar.scalebar import ScaleBar # used for creating scale bars
-from matplotlib import patches # used for creating rectangles 
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from datetime import datetime
 from pathlib import Path, PurePath
 import os
 import sys
-import pickle as pkl # for saving and loading pickle files, the plot memory is saved in a pickle file
 import gc # garbage collector to free memory
 import json # for saving and loading json files like the plotting parameters, easy to view and edit by the user
-import ast # for string to list, dict ... conversion
-# for gif creation
-import imageio # for creating/viewing gifs
-from matplotlib.animation import FuncAnimation
-# for old version
-from PIL import Image
+import hashlib # for the folder signatures of the filetype cache
+import inspect # for the arguments of the journaled operations
+import copy
+from concurrent.futures import ProcessPoolExecutor
 # for config file
 from configparser import ConfigParser
-# for profile selector
-import skimage as ski
 
 # import own functionality
-from .lib.snom_colormaps import SNOM_height, SNOM_amplitude, SNOM_phase, SNOM_realpart, all_colormaps
-from .lib.phase_slider import get_phase_offset
-from .lib.rectangle_selector import select_rectangle
-from .lib.data_range_selector import select_data_range
 from .lib import realign
 from .lib import profile
 from .lib import phase_analysis
-from .lib.file_handling import get_parameter_values, find_index, convert_header_to_dict
-from .lib.profile_selector import select_profile
+from .lib import resampling
+from .lib import leveling
+from .lib.file_handling import get_parameter_values, find_index, convert_header_to_dict, read_gsf_data, memmap_gsf_data, get_header_tags, read_columns, iter_column_chunks, get_column_cache_folder, load_column_cache, save_column_cache
+from .lib.channel_store import LazyChannelData, ChannelList, ChannelStack
+from .lib.subplot_registry import get_subplot_registry
+from .lib.config_profiles import load_config_profiles, update_config_profiles
+from .lib.operation_journal import BufferedAppendFile, OperationJournal, read_journal, journaled, to_json_value
 # import additional functions
-from .lib.additional_functions import set_nan_to_zero, gauss_function, get_largest_abs, calculate_colorbar_size, mean_index_array
+from .lib.additional_functions import set_nan_to_zero, gauss_function, get_largest_abs, calculate_colorbar_size, mean_index_arrays, round_array, get_float_dtype
 # import definitions such as measurement and channel tags
 from .lib.definitions import Definitions, MeasurementTags, ChannelTags, PlotDefinitions, MeasurementTypes
-from .lib.height_masking import get_height_treshold
-from .lib.point_clicker import ImageClicker
+
+# plotting and gui dependencies and the larger scipy modules are only imported when they are used, so loading and correcting data does not import matplotlib or tkinter
+from .lib.lazy_imports import lazy_import, lazy_function
+gaussian_filter = lazy_function(lazy_import('scipy.ndimage'), 'gaussian_filter') # one could implement a bunch more filters
+curve_fit = lazy_function(lazy_import('scipy.optimize'), 'curve_fit')
+plt = lazy_import('matplotlib.pyplot')
+patches = lazy_import('matplotlib.patches') # used for creating rectangles
+make_axes_locatable = lazy_function(lazy_import('mpl_toolkits.axes_grid1'), 'make_axes_locatable')
+clicker = lazy_function(lazy_import('mpl_point_clicker'), 'clicker') # used for getting coordinates from images
+ScaleBar = lazy_function(lazy_import('matplotlib_scalebar.scalebar'), 'ScaleBar') # used for creating scale bars
+# for gif creation
+imageio = lazy_import('imageio') # for creating/viewing gifs
+FuncAnimation = lazy_function(lazy_import('matplotlib.animation'), 'FuncAnimation')
+# for old version
+Image = lazy_import('PIL.Image')
+# for profile selector
+ski = lazy_import('skimage')
+snom_colormaps = lazy_import('.lib.snom_colormaps', __package__)
+get_phase_offset = lazy_function(lazy_import('.lib.phase_slider', __package__), 'get_phase_offset')
+select_rectangle = lazy_function(lazy_import('.lib.rectangle_selector', __package__), 'select_rectangle')
+select_data_range = lazy_function(lazy_import('.lib.data_range_selector', __package__), 'select_data_range')
+select_profile = lazy_function(lazy_import('.lib.profile_selector', __package__), 'select_profile')
+get_height_treshold = lazy_function(lazy_import('.lib.height_masking', __package__), 'get_height_treshold')
+ImageClicker = lazy_function(lazy_import('.lib.point_clicker', __package__), 'ImageClicker')
  
 # new version is based on filehandler to do basic stuff and then a class for each different measurement type like snom/afm, approach curves, spectra etc.
 class FileHandler(PlotDefinitions):
@@ -93,6 +105,16 @@ class FileHandler(PlotDefinitions):
             self._create_default_config() # create a default config file if not existing
         
         self._find_filetype()
+
+    @property
+    def channels(self) -> list:
+        """The names of the channels in memory. Channels are looked up by name in almost every function,
+        so the names are kept in a ChannelList with a constant time index lookup."""
+        return self._channels
+
+    @channels.setter
+    def channels(self, channels:list) -> None:
+        self._channels = channels if isinstance(channels, ChannelList) else ChannelList(channels)
         
     def _generate_savefolder(self):
         """Generate savefolder if not already existing. Careful, has to be the same one as for the snom plotter gui app.
@@ -106,32 +128,72 @@ class FileHandler(PlotDefinitions):
         if not Path.exists(self.save_folder):
             os.makedirs(self.save_folder)
         # define the paths for the different files
-        self.all_subplots_path = self.save_folder / Path('all_subplots.p')
+        self.all_subplots_path = self.save_folder / Path('all_subplots.journal')
+        self.legacy_subplots_path = self.save_folder / Path('all_subplots.p') # used by previous versions, imported once into the journal
         self.plotting_parameters_path = self.save_folder / Path('plotting_parameters.json') # probably not a good idea to use the same folder as the snom plotter app
         self.config_path = self.save_folder / Path('config.ini')
         self.mpl_style_path = self.save_folder / Path('snom_analysis.mplstyle')
+        self.filetype_cache_path = self.save_folder / Path('filetype_cache.json')
+        self.column_cache_path = self.save_folder / Path('column_cache') # binary caches of text datafiles like approach curves and 3D scans
 
     def _initialize_logfile(self) -> str:
         # logfile_path = self.directory_name + '/python_manipulation_log.txt'
         logfile_path = self.directory_name / Path('python_manipulation_log.txt')
-        file = open(logfile_path, 'a') # the new logdata will be appended to the existing file
+        # the new logdata will be appended to the existing file, the lines are buffered and written together
+        self._logfile = BufferedAppendFile(logfile_path)
         now = datetime.now()
         current_datetime = now.strftime("%d/%m/%Y %H:%M:%S")
-        file.write(current_datetime + '\n' + 'filename = ' + self.filename.name + '\n')
-        file.close()
+        self._logfile.write(current_datetime + '\n' + 'filename = ' + self.filename.name + '\n')
+        # the journal stores every operation with its arguments, such that it can be replayed on other measurements with replay_journal()
+        self.journal = OperationJournal(self.directory_name / Path('python_manipulation_journal.jsonl'), self.filename.name)
+        self._operation = None # the journaled operation which is currently running
+        self._replay_answers = None # answers to the questions of the current operation if it is replayed
         return logfile_path
 
     def _write_to_logfile(self, parameter_name:str, parameter):
-        file = open(self.logfile_path, 'a')
-        file.write(f'{parameter_name} = {parameter}\n')
-        file.close()
+        self._logfile.write(f'{parameter_name} = {parameter}\n')
+
+    def flush_journal(self) -> None:
+        """Writes all buffered lines of the logfile and the operation journal to the measurement folder.
+        This happens automatically when data is saved and when python exits.
+        """
+        self._logfile.flush()
+        self.journal.flush()
+
+    def _run_operation(self, method, args:tuple, kwargs:dict, replayable:bool=True):
+        """Calls a journaled operation and records it in the operation journal once it finished.
+        Operations which are called by another operation are part of the outer operation and are not recorded.
+        """
+        if self._operation is not None:
+            return method(self, *args, **kwargs)
+        arguments = inspect.signature(method).bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        # the number of threads is not part of the operation
+        arguments = {name: value for name, value in list(arguments.arguments.items())[1:] if name not in ('parallel', 'max_workers')}
+        if not replayable:
+            # the data passed by the user is not stored in the journal
+            arguments = {name: value for name, value in arguments.items() if not isinstance(value, np.ndarray)}
+        # copy the arguments before the call, the operation might change mutable arguments like lists in place
+        arguments = copy.deepcopy(arguments)
+        self._operation = {'arguments': arguments, 'answers': []}
+        try:
+            result = method(self, *args, **kwargs)
+            self.journal.record(method.__name__, self._operation['arguments'], self._operation['answers'], replayable=replayable)
+        finally:
+            self._operation = None
+        return result
+
+    def _set_operation_argument(self, name:str, value) -> None:
+        """Replaces an argument of the running operation with the value the user selected interactively,
+        so the operation can be replayed without user interaction."""
+        if self._operation is not None and name in self._operation['arguments']:
+            self._operation['arguments'][name] = to_json_value(value)
 
     def _load_config(self):
         """This function loads the config file and makes the config available through self.config.
         """
-        self.config = ConfigParser()
-        with open(self.config_path, 'r') as f:
-            self.config.read_file(f)
+        # the config is only parsed again if the file changed, all measurements share the compiled profiles
+        self.config, self._config_profiles = load_config_profiles(self.config_path)
  
     def _create_default_config(self):
         """This function creates a default config file in case the script is run for the first time or the old config file is missing.
@@ -640,6 +702,7 @@ class FileHandler(PlotDefinitions):
         with open(self.config_path, 'w') as configfile:
             config.write(configfile)
         self.config = config
+        self._config_profiles = update_config_profiles(self.config_path, config)
     
     def _get_from_config(self, option:Optional[str]=None, section:Optional[str]=None):
         """This function gets the value of an option in a section of the config file.
@@ -649,34 +712,10 @@ class FileHandler(PlotDefinitions):
             try: section = self.file_type
             except: print('Filetype unknown, please specify the section! (In _get_from_config)')
         if option is None:
-            return dict(self.config[section])
+            return self._config_profiles[section].get_raw()
         else:
-            value = self.config[section][option]
-            # replace < and > with empty string if value is a string
-            if isinstance(value, str):
-                if value[0] == '<':
-                    value = value.replace('<', '').replace('>', '')
-                # convert string to list if it is a list
-                # elif value[0] == '[':
-                #     value = ast.literal_eval(value)
-                # # convert string to dictionary if it is a dictionary
-                # elif value[0] == '{':
-                #     value = ast.literal_eval(value)
-                # replace string with boolean if it is a boolean
-                if value == 'True':
-                    value = True
-                elif value == 'False':
-                    value = False
-                elif value == 'None':
-                    value = None
-                else:
-                    # try to convert string to float or int or list or dict
-                    try:
-                        value = ast.literal_eval(value)
-                    except:
-                        pass
-
-            return value
+            # the values are converted once when the config is loaded, see parse_config_value
+            return self._config_profiles[section][option]
 
     def _change_config(self, option:str, section:str, value):
         """This function changes the config file.
@@ -700,6 +739,7 @@ class FileHandler(PlotDefinitions):
         # update the config file        
         with open(self.config_path, 'w') as configfile:
             self.config.write(configfile)
+        self._config_profiles = update_config_profiles(self.config_path, self.config)
 
     def print_config(self, section: Optional[str]=None):
         """This function prints the config file.
@@ -719,19 +759,34 @@ class FileHandler(PlotDefinitions):
 
     def _find_filetype(self) -> bool:
         """This function tries to find the correct filetype for the given file.
-        It will iterate through all filetypes in the config file and try to create the measurement tag dict.
+        If the folder was already identified before and neither the files in the folder nor the config changed since,
+        the filetype is taken from the filetype cache in the save folder.
+        Otherwise it will iterate through all filetypes in the config file and try to create the measurement tag dict.
+        Filetypes which can not match the file names in the folder are skipped before any file is opened.
         If the filetype is found the function returns True otherwise False.
         """
+        file_names, folder_signature = self._scan_measurement_folder()
+        if self._set_cached_filetype(folder_signature):
+            return True
+
         filetypes = self._get_from_config(section='FILETYPES')
+        # keep track of the filetype the current measurement tag dict was created with, it is kept even if the filetype is rejected afterwards
+        tag_dict_filetype = None
 
         # try to identify the filetype by creating the measurement tag dict for the filetypes in the config file
         for key in filetypes:
             filetype = self._get_from_config(key, 'FILETYPES')
             # print('Trying to find filetype: ', filetype)
             parameters_name = self._get_from_config('parameters_name', filetype)
+            # without the parameters file the measurement tag dict can not be created
+            if self.filename.name + parameters_name not in file_names:
+                continue
             parameters_path = self.directory_name / Path(self.filename.name + parameters_name)
             # try to create the measurement tag dict
-            succsess = self._create_measurement_tag_dict(parameters_path, filetype)
+            if not self._create_measurement_tag_dict(parameters_path, filetype):
+                continue
+            tag_dict_filetype = filetype
+            succsess = True
             # if succsess:
                 # print('measurement tag dict: ', self.measurement_tag_dict)
                 # print('Measurement tag dict was created successfully')
@@ -765,6 +820,7 @@ class FileHandler(PlotDefinitions):
                 # print(f'Filetype found: {filetype}')
                 self.file_type = filetype
                 # print('parameter dict was created successfully')                
+                self._save_filetype_to_cache(folder_signature, filetype, tag_dict_filetype)
                 return True
             else: self.file_type = None
 
@@ -781,23 +837,27 @@ class FileHandler(PlotDefinitions):
 
             if self.measurement_type == MeasurementTypes.NONE:
                 self._find_measurement_type()
+            succsess = False
             if self.measurement_type == MeasurementTypes.SNOM:
                 channels = self.all_channels_default # test all default channels
                 # it might be sufficient to probe one optical an the corrected height channel, sometimes the channel suffix changes
                 # some channels end with 'raw' some do not...
-                # try to create the channel tag dict for every existing channel, otherwise no the correct filetype is selected
-                succsess = False
-                channel_success = []
-                for channel in channels:
-                    try: self._create_channel_tag_dict([channel])
-                    except: channel_success.append(1) # 1 for false, 0 for true
-                    else: channel_success.append(0)
-                if 1 not in channel_success: succsess = True
+                # every default channel file has to exist, this is checked with the file names first
+                channel_files = [self.filename.name + f'{self.channel_prefix_default}{channel}{self.channel_suffix_default}{self.file_ending}' for channel in channels]
+                if all(channel_file in file_names for channel_file in channel_files):
+                    # try to create the channel tag dict for every existing channel, otherwise no the correct filetype is selected
+                    channel_success = []
+                    for channel in channels:
+                        try: self._create_channel_tag_dict([channel])
+                        except: channel_success.append(1) # 1 for false, 0 for true
+                        else: channel_success.append(0)
+                    if 1 not in channel_success: succsess = True
             self.file_type = None
             if succsess:
                 # the correct filetype has been found
                 self.file_type = filetype
                 # print('channel dict was created successfully')                
+                self._save_filetype_to_cache(folder_signature, filetype, tag_dict_filetype)
                 return True
 
         # if no filetype was found return False
@@ -805,6 +865,91 @@ class FileHandler(PlotDefinitions):
         sys.exit('No filetype was found!')
         return False
 
+    def _scan_measurement_folder(self) -> tuple:
+        """Lists the files of the measurement folder and creates a signature of the folder.
+        The signature changes if a file is added, removed or modified or if the config changes.
+        The logfile is ignored, since it is appended every time the measurement is opened.
+
+        Returns:
+            tuple: set of the file names in the folder and the signature as hex string
+        """
+        file_names = set()
+        fingerprints = []
+        with os.scandir(self.directory_name) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name in (Path(self.logfile_path).name, self.journal.path.name):
+                    continue
+                stat = entry.stat()
+                file_names.add(entry.name)
+                fingerprints.append(f'{entry.name}|{stat.st_size}|{stat.st_mtime_ns}')
+        fingerprints.sort()
+        # changes in the config can change the detected filetype
+        fingerprints.append(self._config_profiles.signature)
+        signature = hashlib.sha1('\n'.join(fingerprints).encode('utf-8')).hexdigest()
+        return file_names, signature
+
+    def _load_filetype_cache(self) -> dict:
+        """Loads the filetype cache from the save folder. Returns an empty dict if the cache does not exist or can not be read."""
+        try:
+            with open(self.filetype_cache_path, 'r') as f:
+                cache = json.load(f)
+        except:
+            return {}
+        if not isinstance(cache, dict):
+            return {}
+        return cache
+
+    def _set_cached_filetype(self, folder_signature:str) -> bool:
+        """Sets the filetype from the filetype cache if the folder was already identified and did not change since.
+
+        Args:
+            folder_signature (str): the current signature of the measurement folder
+
+        Returns:
+            bool: True if the filetype was taken from the cache, False otherwise.
+        """
+        entry = self._load_filetype_cache().get(str(self.directory_name.resolve()))
+        if not isinstance(entry, dict) or entry.get('signature') != folder_signature:
+            return False
+        filetype = entry.get('filetype')
+        tag_dict_filetype = entry.get('tag_dict_filetype')
+        if filetype not in self.config.sections():
+            return False
+        # recreate the measurement tag dict, if this fails the filetype is searched again
+        if tag_dict_filetype is not None:
+            parameters_name = self._get_from_config('parameters_name', tag_dict_filetype)
+            parameters_path = self.directory_name / Path(self.filename.name + parameters_name)
+            if not self._create_measurement_tag_dict(parameters_path, tag_dict_filetype):
+                return False
+        self.file_type = filetype
+        self._initialize_measurement_channel_indicators()
+        if self.measurement_type == MeasurementTypes.NONE:
+            self._find_measurement_type()
+        return True
+
+    def _save_filetype_to_cache(self, folder_signature:str, filetype:str, tag_dict_filetype:Optional[str]) -> None:
+        """Saves the detected filetype of the measurement folder to the filetype cache.
+
+        Args:
+            folder_signature (str): the signature of the measurement folder
+            filetype (str): the detected filetype
+            tag_dict_filetype (str): the filetype the measurement tag dict was created with, None if it was not created
+        """
+        cache = self._load_filetype_cache()
+        cache[str(self.directory_name.resolve())] = {
+            'signature': folder_signature,
+            'filetype': filetype,
+            'tag_dict_filetype': tag_dict_filetype,
+        }
+        # write to a temporary file first, so other processes never read a partially written cache
+        temp_path = self.filetype_cache_path.with_name(f'{self.filetype_cache_path.name}.{os.getpid()}.tmp')
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(cache, f, indent=4)
+            os.replace(temp_path, self.filetype_cache_path)
+        except:
+            print('Could not save the filetype cache!')
+
     def _find_measurement_type(self) -> None:
         # print('Trying to find the measurement type')
         if self.file_type != None:
@@ -1108,169 +1253,152 @@ class FileHandler(PlotDefinitions):
         except:
             print('No measurement tag dict found!')
 
-    def _create_channel_tag_dict(self, channels:Optional[list]=None) -> list:
+    def _create_channel_tag_dict(self, channels:Optional[list]=None, parallel:bool=False, max_workers:Optional[int]=None) -> list:
         """This function reads in the header of the gsf file for the specified channel and extracts the tag values. The tag values are stored in a dictionary for each channel.
         This tag dict is very similar to the measurement_tag_dict, but the measurement_tag_dict is only created on the basis of the parameter file.
         If individual channels have been modified this will only be stored in the channel_tag_dict.
 
         Args:
             channel (str): channel name for which the tag values should be extracted
+            parallel (bool, optional): if True the headers are read concurrently. Defaults to False.
+            max_workers (int, optional): maximum number of threads used if parallel is True. Defaults to None.
         """
         if channels is None:
             channels = self.channels
+        try: channel_tags = self._get_from_config('channel_tags')
+        except:
+            if len(channels) > 0:
+                # the file has to exist anyways, this is also used to test if the correct filetype was found
+                self._get_channel_header_tags(channels[0])
+            print('Channel tags not found! Can not create channel tag dict!')
+            # try to create the channel tag dict from the measurement tag dict
+            channel_tag_dict = self._create_channel_tag_dict_from_measurement_tag_dict(channels)
+            return channel_tag_dict
         # create a list containing the tag dictionary for each channel
-        # self.channel_tag_dict = []
-        channel_tag_dict = []
-        for channel in channels:
-            channel_dict = {}
-            if self._is_custom_channel(channel):
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-            elif self._is_default_channel(channel):
-                suffix = self.channel_suffix_default
-                prefix = self.channel_prefix_default
-                channel_type = 'default'
-            else:
-                print(f'channel {channel} not found in default or custom channels!')
-                # assume it is a custom channel and try loading anyways
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-            '''if channel in self.all_channels_default:
-                suffix = self.channel_suffix_default
-                prefix = self.channel_prefix_default
-                channel_type = 'default'
-            elif channel in self.all_channels_custom:
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-            else:
-                print(f'channel {channel} not found in default or custom channels!')
-                # assume it is a custom channel and try loading anyways
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-                # sys.exit()'''
-            # we want to read the non binary part of the datafile
-            if self.file_ending == '.gsf':
-                encod = 'latin1'
-            elif self.file_ending == '.ascii':
-                encod = 'latin1'
-            else:
-                pass
-                # not necessarily a problem, since the creation of the channel tag dict is also a test if the correct filetype was found
-                # print('file ending not supported')
-                # print('in _create_channel_tag_dict')
-            
-            # print(f'Creating channel tag dict for channel {channel} of type {channel_type} with prefix {prefix} and suffix {suffix}')
-            with open(self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{self.file_ending}'), 'r', encoding=encod) as f:
-                content=f.read()
+        channel_tag_dict = self._map_channels(partial(self._create_single_channel_tag_dict, channel_tags=channel_tags), channels, parallel, max_workers)
+        return channel_tag_dict
 
+    def _get_channel_header_tags(self, channel:str) -> dict:
+        """Reads only the header of the datafile of the specified channel and returns its tag -> value index.
+        The index is cached per file, so probing the same file again does not read it again as long as it is unchanged.
 
-            try: channel_tags = self._get_from_config('channel_tags')
-            except:
-                print('Channel tags not found! Can not create channel tag dict!')
-                # try to create the channel tag dict from the measurement tag dict
-                channel_tag_dict = self._create_channel_tag_dict_from_measurement_tag_dict(channels)
-                return channel_tag_dict
-                '''# seem like there are no channel tags in the config file
-                # so we will just use the measurement tags to initialize the channel tags
-                measurement_tags = self._get_from_config('measurement_tags', self.file_type)
-                measurement_tag_enums = list(MeasurementTags)
-                channel_tag_enums = list(ChannelTags)
-                for key, value in measurement_tags.items():
-                    # get the data from the measurement tag dict
-                    for i in range(len(measurement_tag_enums)):
-                        if key == measurement_tag_enums[i].name:
-                            data = self.measurement_tag_dict[measurement_tag_enums[i]]
-                    # insert the data into the channel tag dict with the corresponding key wich is an enum of the channel tags class but has the same name as the measurement tag
-                    for i in range(len(channel_tag_enums)):
-                        if key == channel_tag_enums[i].name:
-                            channel_dict[channel_tag_enums[i]] = data'''
+        Args:
+            channel (str): channel name
+
+        Returns:
+            dict: the tag index of the header
+        """
+        if self._is_custom_channel(channel):
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+        elif self._is_default_channel(channel):
+            suffix = self.channel_suffix_default
+            prefix = self.channel_prefix_default
+            channel_type = 'default'
+        else:
+            print(f'channel {channel} not found in default or custom channels!')
+            # assume it is a custom channel and try loading anyways
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+        '''if channel in self.all_channels_default:
+            suffix = self.channel_suffix_default
+            prefix = self.channel_prefix_default
+            channel_type = 'default'
+        elif channel in self.all_channels_custom:
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+        else:
+            print(f'channel {channel} not found in default or custom channels!')
+            # assume it is a custom channel and try loading anyways
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+            # sys.exit()'''
+        # we want to read the non binary part of the datafile
+        if self.file_ending == '.gsf':
+            encod = 'latin1'
+        elif self.file_ending == '.ascii':
+            encod = 'latin1'
+        else:
+            pass
+            # not necessarily a problem, since the creation of the channel tag dict is also a test if the correct filetype was found
+            # print('file ending not supported')
+            # print('in _create_channel_tag_dict')
+        
+        # print(f'Creating channel tag dict for channel {channel} of type {channel_type} with prefix {prefix} and suffix {suffix}')
+        return get_header_tags(self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{self.file_ending}'), encod)
+
+    def _create_single_channel_tag_dict(self, channel:str, channel_tags:dict) -> dict:
+        """Creates the channel tag dictionary for a single channel from the header of its datafile.
+
+        Args:
+            channel (str): channel name
+            channel_tags (dict): the channel tags of the current filetype as specified in the config file
+
+        Returns:
+            dict: the channel tag dictionary
+        """
+        tag_index = self._get_channel_header_tags(channel)
+        channel_dict = {}
+        # print(channel_tags)
+        for key, tag in channel_tags.items():
+            is_list = False
+            tag_value_found = False
+            value = None
+            values = [None]
+            if isinstance(tag, list):
+                is_list = True
+            # so far each tag contains a maximum of 2 values
+            if is_list:
+                values = []
+                for element in tag:
+                    try: value = self._get_tagval(tag_index, element)
+                    except: 
+                        values.append(None)
+                        tag_value_found = False
+                    else: 
+                        values.append(value)
+                        tag_value_found = True
             else:
-                # print(channel_tags)
-                for key, tag in channel_tags.items():
-                    is_list = False
-                    tag_value_found = False
-                    value = None
-                    values = [None]
-                    if isinstance(tag, list):
-                        is_list = True
-                    # so far each tag contains a maximum of 2 values
-                    if is_list:
-                        values = []
-                        for element in tag:
-                            try: value = self._get_tagval(content, element)
-                            except: 
-                                values.append(None)
-                                tag_value_found = False
-                            else: 
-                                values.append(value)
-                                tag_value_found = True
-                    else:
-                        try: value = self._get_tagval(content, tag)
-                        except: value = None
-                        else: tag_value_found = True
-                        # try to find out if the value is a number or a unit
-                        try: float(value)
-                        except: pass
-                    # check if tag value was found
-                    if not tag_value_found:
-                        print(f'Could not find the tag value for {tag} in channel {channel}. You should probably check the config file.')
-                        continue
-                    if key == 'PIXELAREA':
-                        try: channel_dict[ChannelTags.PIXELAREA] = [int(values[0]), int(values[1]), int(values[2])]
-                        except: channel_dict[ChannelTags.PIXELAREA] = [int(values[0]), int(values[1])]
-                    elif key == 'YINCOMPLETE':
-                        channel_dict[ChannelTags.YINCOMPLETE] = int(value)
-                    elif key == 'SCANNERCENTERPOSITION':
-                        try: channel_dict[ChannelTags.SCANNERCENTERPOSITION] = [float(values[0]), float(values[1]), float(values[2])]
-                        except: channel_dict[ChannelTags.SCANNERCENTERPOSITION] = [float(values[0]), float(values[1])]
-                    elif key == 'ROTATION':
-                        channel_dict[ChannelTags.ROTATION] = float(value)
-                    elif key == 'SCANAREA':
-                        try: channel_dict[ChannelTags.SCANAREA] = [float(values[0]), float(values[1]), float(values[2])]
-                        except: channel_dict[ChannelTags.SCANAREA] = [float(values[0]), float(values[1])]
-                    elif key == 'XYUNIT':
-                        channel_dict[ChannelTags.XYUNIT] = value
-                    elif key == 'ZUNIT':
-                        channel_dict[ChannelTags.ZUNIT] = value
-                    elif key == 'WAVENUMBERSCALING':
-                        channel_dict[ChannelTags.WAVENUMBERSCALING] = float(value)
-            # add pixel scaling to the channel dict, initially this is always 1
-            channel_dict[ChannelTags.PIXELSCALING] = 1
-                    
-            # self.channel_tag_dict.append(channel_dict)
-            channel_tag_dict.append(channel_dict)
-        return channel_tag_dict
+                try: value = self._get_tagval(tag_index, tag)
+                except: value = None
+                else: tag_value_found = True
+                # try to find out if the value is a number or a unit
+                try: float(value)
+                except: pass
+            # check if tag value was found
+            if not tag_value_found:
+                print(f'Could not find the tag value for {tag} in channel {channel}. You should probably check the config file.')
+                continue
+            if key == 'PIXELAREA':
+                try: channel_dict[ChannelTags.PIXELAREA] = [int(values[0]), int(values[1]), int(values[2])]
+                except: channel_dict[ChannelTags.PIXELAREA] = [int(values[0]), int(values[1])]
+            elif key == 'YINCOMPLETE':
+                channel_dict[ChannelTags.YINCOMPLETE] = int(value)
+            elif key == 'SCANNERCENTERPOSITION':
+                try: channel_dict[ChannelTags.SCANNERCENTERPOSITION] = [float(values[0]), float(values[1]), float(values[2])]
+                except: channel_dict[ChannelTags.SCANNERCENTERPOSITION] = [float(values[0]), float(values[1])]
+            elif key == 'ROTATION':
+                channel_dict[ChannelTags.ROTATION] = float(value)
+            elif key == 'SCANAREA':
+                try: channel_dict[ChannelTags.SCANAREA] = [float(values[0]), float(values[1]), float(values[2])]
+                except: channel_dict[ChannelTags.SCANAREA] = [float(values[0]), float(values[1])]
+            elif key == 'XYUNIT':
+                channel_dict[ChannelTags.XYUNIT] = value
+            elif key == 'ZUNIT':
+                channel_dict[ChannelTags.ZUNIT] = value
+            elif key == 'WAVENUMBERSCALING':
+                channel_dict[ChannelTags.WAVENUMBERSCALING] = float(value)
+        # add pixel scaling to the channel dict, initially this is always 1
+        channel_dict[ChannelTags.PIXELSCALING] = 1
+        return channel_dict
 
-    def _get_tagval(self, content, tag):
+    def _get_tagval(self, tag_index:dict, tag):
         """This function gets the value of the tag listed in the file header"""
-        content_array = content.split('\n')
-        tag_array = []
-        tagval = 0 # if no tag val can be found return 0
-        for element in content_array:
-            if len(element) > 50: # its probably not part of the header anymore...
-                break
-            elif '=' not in element:
-                pass
-            else:
-                tag_pair = element.split('=')
-                # print(f'tag_pair = {tag_pair}')
-                tag_name = tag_pair[0].replace(' ', '')# remove possible ' ' characters
-                tag_val = tag_pair[1].replace(' ', '')# remove possible ' ' characters
-                tag_array.append([tag_name, tag_val])
-        for i in range(len(tag_array)):
-            is_unit = False
-            try: float(tag_array[i][1])
-            except: is_unit = True
-            if tag_array[i][0] == tag:
-                if is_unit:
-                    tagval = tag_array[i][1]
-                else:
-                    tagval = float(tag_array[i][1])
-        return tagval
+        return tag_index.get(tag, 0) # if no tag val can be found return 0
     
     def _create_channel_tag_dict_from_measurement_tag_dict(self, channels:Optional[list]=None) -> list:
         """Create the necessary channel tag dictionary from the measurement tag dictionary.
@@ -1733,6 +1861,25 @@ class FileHandler(PlotDefinitions):
                 existing_channels.append(channel)
         return existing_channels
   
+    def _map_channels(self, function, channels:list, parallel:bool=False, max_workers:Optional[int]=None) -> list:
+        """Applies the function to every channel and returns the results in the order of the channels.
+        If parallel is True the channels are processed concurrently in a thread pool, reading files and decoding data
+        with numpy releases the GIL, so the channels can be loaded at the same time.
+
+        Args:
+            function (callable): function taking the channel name as only argument
+            channels (list): list of channels
+            parallel (bool, optional): process the channels concurrently. Defaults to False.
+            max_workers (int, optional): maximum number of threads, if None the default of the ThreadPoolExecutor is used. Defaults to None.
+
+        Returns:
+            list: the results for each channel
+        """
+        if parallel and len(channels) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(function, channels))
+        return [function(channel) for channel in channels]
+
     def _initialize_measurement_channel_indicators(self):
         """This function initializes the channel indicators for the measurement channels.
         More precisely it loades all the parameters from the config file.
@@ -1749,7 +1896,7 @@ class FileHandler(PlotDefinitions):
         self.height_channel = self._get_from_config('height_channel')
         self.height_channels = self._get_from_config('height_channels')
         self.mechanical_channels = self._get_from_config('mechanical_channels')
-        self.all_channels_default = self.phase_channels + self.amp_channels + self.mechanical_channels # only channels to which the default parameters apply, like prefix and suffix
+        self.all_channels_default = ChannelList(self.phase_channels + self.amp_channels + self.mechanical_channels) # only channels to which the default parameters apply, like prefix and suffix
         self.preview_ampchannel = self._get_from_config('preview_ampchannel')
         self.preview_phasechannel = self._get_from_config('preview_phasechannel')
         self.preview_channels = self._get_from_config('preview_channels')
@@ -1796,7 +1943,8 @@ class FileHandler(PlotDefinitions):
         # some file versions create channels with a appendix such as 'raw' which is only used for raw optical or mechanical data
         # not the corrected height data for example
         # make a list of all custom channels, so corrected height channels, and all channels created by the user
-        self.all_channels_custom = self.height_channels + self.complex_channels + self.overlain_phase_channels + self.overlain_amp_channels + self.corrected_phase_channels + self.corrected_overlain_phase_channels
+        # channel lists support fast membership tests, they are used to decide how every channel is loaded and saved
+        self.all_channels_custom = ChannelList(self.height_channels + self.complex_channels + self.overlain_phase_channels + self.overlain_amp_channels + self.corrected_phase_channels + self.corrected_overlain_phase_channels)
         self.all_channels_custom += [channel + self.channel_suffix_manipulated for channel in self.all_channels_default]
 
     def _load_mpl_style(self):
@@ -1841,7 +1989,10 @@ class FileHandler(PlotDefinitions):
                 f.write('axes.formatter.useoffset: True\n')
                 f.write('axes.formatter.offset_threshold: 4\n')
                 f.write('axes.formatter.min_exponent: 0\n')
-        plt.style.use(self.mpl_style_path)
+        # the style is applied right away if pyplot was already imported, e.g. by the user, otherwise as soon as it is imported
+        # if the data is only processed matplotlib is never imported
+        mpl_style_path = self.mpl_style_path
+        plt.set_import_hook('mpl_style', lambda pyplot: pyplot.style.use(mpl_style_path))
 
     def _get_plotting_parameters(self) -> dict:
         """This will load the plotting parameters dictionary from the plotting_parameters.json file. If the file does not exist, it will be created with default values.
@@ -1932,19 +2083,64 @@ class FileHandler(PlotDefinitions):
                     # print('replaced channel!')
         # replace colormaps
         for key in dictionary:
-            for colormap in all_colormaps:
+            for colormap in snom_colormaps.all_colormaps:
                 if colormap in dictionary[key]:
-                    dictionary[key] = all_colormaps[colormap]
+                    dictionary[key] = snom_colormaps.all_colormaps[colormap]
                     break
         return dictionary
         
+    def _load_text_columns(self, datafile:Path, channels:list, read_function, use_cache:bool=False) -> dict:
+        """Loads the specified channels of a text datafile, e.g. of approach curves or 3D scans.
+        If use_cache is True the channels are memory mapped from the binary column cache in the SNOM_Config folder.
+        Channels which are not yet cached or were cached for an older version of the datafile are read from the text file
+        and added to the cache. The header length is stored in self.header.
+
+        Args:
+            datafile (Path): path of the text datafile
+            channels (list): channels to load
+            read_function (Callable): function reading the list of channels from the datafile and returning a dict channel -> np.ndarray, called after self.header was set
+            use_cache (bool, optional): use the binary column cache. Defaults to False.
+
+        Returns:
+            dict: channel -> 1D np.ndarray of the raw channel data
+        """
+        data = {}
+        header = None
+        if use_cache:
+            # the stat is taken before reading, so a datafile which is changed while reading will not match the cache later
+            source_stat = os.stat(datafile)
+            cache_folder = self._get_column_cache_folder(datafile)
+            header, data = load_column_cache(cache_folder, source_stat, channels)
+        if header is None:
+            header = self.find_header_length(datafile)
+        self.header = header
+        missing_channels = [channel for channel in dict.fromkeys(channels) if channel not in data]
+        if len(missing_channels) > 0:
+            new_data = read_function(missing_channels)
+            data.update(new_data)
+            if use_cache:
+                save_column_cache(cache_folder, source_stat, header, new_data)
+        return data
+
+    def _get_column_cache_folder(self, datafile:Path) -> Path:
+        # the measurement classes parse the same datafile slightly differently, so each class has its own cache
+        return get_column_cache_folder(self.column_cache_path / type(self).__name__, datafile)
+
     def _user_input_bool(self) -> bool: 
-        """This function asks the user to input yes or no and returns a boolean value."""
-        user_input = input('Please type y for yes or n for no. \nInput: ')
-        if user_input == 'y':
-            user_bool = True
-        elif user_input == 'n':
-            user_bool = False
+        """This function asks the user to input yes or no and returns a boolean value.
+        If an operation is replayed from the journal the recorded answer is used instead."""
+        if self._replay_answers is not None:
+            if len(self._replay_answers) == 0:
+                raise RuntimeError('The journal does not contain an answer to this question, the operation can not be replayed!')
+            user_bool = self._replay_answers.pop(0)
+        else:
+            user_input = input('Please type y for yes or n for no. \nInput: ')
+            if user_input == 'y':
+                user_bool = True
+            elif user_input == 'n':
+                user_bool = False
+        if self._operation is not None:
+            self._operation['answers'].append(user_bool)
         return user_bool
 
     def _user_input(self, message:str):
@@ -1966,11 +2162,29 @@ class SnomMeasurement(FileHandler):
         channels (list, optional): list of channels to load. Defaults to None.
         title (str, optional): title of the measurement. Defaults to None.
         autoscale (bool, optional): if True the data will be scaled to quadratic pixels. Defaults to True.
+        lazy (bool, optional): if True the gsf channels are only memory mapped and decoded when they are first accessed. Defaults to False.
+        memory_budget (float, optional): only used if lazy is True, maximum memory in GB for decoded channels. Unchanged channels
+            which were not used recently are dropped from memory if the budget is exceeded and decoded again when needed. Defaults to None.
+        parallel (bool, optional): if True the channel headers and data are loaded concurrently. Defaults to False.
+        max_workers (int, optional): maximum number of threads used for parallel loading. Defaults to None.
+        stacked (bool, optional): if True the data of all channels is kept in one contiguous array of shape (channel, y, x) as long as the channels
+            have the same size. Functions like shift_phase, set_min_to_zero, gauss_filter_channels, cut_channels and level_data_columnwise
+            are then applied to all channels at once. Ignored if lazy is True. Defaults to False.
+        dtype (np.dtype, optional): floating point type of the channel data, np.float32 or np.float64. The gsf files only store float32 values,
+            so np.float32 halves the memory without losing information of the raw data, but the calculations are less precise. Defaults to np.float64.
     """
-    def __init__(self, directory_name:str, channels:Optional[list]=None, title:Optional[str]=None, autoscale:bool=True) -> None:
+    def __init__(self, directory_name:str, channels:Optional[list]=None, title:Optional[str]=None, autoscale:bool=True, lazy:bool=False, memory_budget:Optional[float]=None,
+                 parallel:bool=False, max_workers:Optional[int]=None, stacked:bool=False, dtype=np.float64) -> None:
         self.all_subplots = [] # list containing all subplots
         self.measurement_type = MeasurementTypes.SNOM
+        self.lazy = lazy
+        self.stacked = stacked and not lazy
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError(f'Unsupported dtype {self.dtype}, use np.float32 or np.float64!')
+        self.memory_budget = memory_budget
         super().__init__(directory_name, title)
+        self.subplot_registry = get_subplot_registry(self.all_subplots_path, self.legacy_subplots_path) # shared by all measurements and persisted in the save folder
         self._initialize_measurement_channel_indicators()
         if channels is None: # the standard channels which will be used if no channels are specified
             channels = self.preview_channels
@@ -1983,7 +2197,15 @@ class SnomMeasurement(FileHandler):
                 channels = self._get_existing_channels(channels)
         self.channels = channels.copy() # make sure to copy the list to avoid changing the original list     
         self.autoscale = autoscale
-        self.initialize_channels(self.channels)
+        # loading the channels is part of the creation and not recorded as a separate operation
+        self._operation = {'arguments': {}, 'answers': []}
+        try:
+            self.initialize_channels(self.channels, parallel=parallel, max_workers=max_workers)
+        finally:
+            self._operation = None
+        # the first record of each session contains the arguments to create the measurement again when the journal is replayed
+        self.journal.record('__init__', {'channels': self.channels, 'title': title, 'autoscale': autoscale, 'lazy': lazy, 'memory_budget': memory_budget,
+                                         'stacked': stacked, 'dtype': self.dtype}, measurement_class=type(self).__name__)
         if PlotDefinitions.autodelete_all_subplots: self._delete_all_subplots() # automatically delete old subplots
         # get the plotting style from the mpl style file
         self._load_mpl_style()
@@ -1992,13 +2214,16 @@ class SnomMeasurement(FileHandler):
     #### Basic data handling functions ####
     #######################################
 
-    def initialize_channels(self, channels:Optional[list]=None) -> None:
+    @journaled
+    def initialize_channels(self, channels:Optional[list]=None, parallel:bool=False, max_workers:Optional[int]=None) -> None:
         """This function initializes the data in memory. If no channels are specified the already existing data is used,
         which is created automatically in the instance init method. If channels are specified, the instance data is overwritten.
         Channels must be specified as a list of channels.
         
         Args:
             channels [list]: a list containing the channels you want to initialize
+            parallel (bool, optional): if True the channel headers and data are loaded concurrently, the channel order is preserved. Defaults to False.
+            max_workers (int, optional): maximum number of threads used if parallel is True. Defaults to None.
         """
         # print(f'initialising channels: {channels}')
         if channels is None:
@@ -2007,10 +2232,8 @@ class SnomMeasurement(FileHandler):
         else:
             self.channels = channels
             # update the channel tag dictionary, makes the program compatible with differrently sized datasets, like original data plus manipulated, eg. cut data
-            self.channel_tag_dict = self._create_channel_tag_dict()
-            self.all_data, self.channels_label = self._load_data(channels) # could be changed to a single dictionary containing the data and the channel names
-            xres = len(self.all_data[0][0])
-            yres = len(self.all_data[0])
+            self.channel_tag_dict = self._create_channel_tag_dict(parallel=parallel, max_workers=max_workers)
+            self.all_data, self.channels_label = self._load_data(channels, parallel, max_workers) # could be changed to a single dictionary containing the data and the channel names
             # reset all the instance variables dependent on the data, but not the ones responsible for plotting
             if self.autoscale == True:
                 self.quadratic_pixels()
@@ -2019,14 +2242,17 @@ class SnomMeasurement(FileHandler):
             self.align_points = None
             self.scalebar_channels = []    
 
-    def add_channels(self, channels:list) -> None:
+    @journaled
+    def add_channels(self, channels:list, parallel:bool=False, max_workers:Optional[int]=None) -> None:
         """This function will add the specified channels to memory without changing the already existing ones.
 
         Args:
             channels (list): Channels to add to memory.
+            parallel (bool, optional): if True the channel headers and data are loaded concurrently, the channel order is preserved. Defaults to False.
+            max_workers (int, optional): maximum number of threads used if parallel is True. Defaults to None.
         """
         # create channel tag dict for new channels, but keep old tag dict for channels in memory!
-        additional_channel_tag_dict = self._create_channel_tag_dict(channels)
+        additional_channel_tag_dict = self._create_channel_tag_dict(channels, parallel, max_workers)
 
         # add the new list of dicts to the old list
         self.channel_tag_dict += additional_channel_tag_dict
@@ -2035,7 +2261,7 @@ class SnomMeasurement(FileHandler):
         self.channels += channels
 
         # load the data for the new channels and append to list in memory
-        additional_channel_data, additional_channel_label = self._load_data(channels)
+        additional_channel_data, additional_channel_label = self._load_data(channels, parallel, max_workers)
         self.all_data += additional_channel_data
 
         # also add the new channel labels
@@ -2045,8 +2271,10 @@ class SnomMeasurement(FileHandler):
         if self.autoscale == True:
             self.quadratic_pixels(channels)
 
+    @journaled(replayable=False)
     def create_new_channel(self, data, channel_name:str, channel_tag_dict:dict, channel_label:Optional[str]=None) -> None:
         """This function will create a new channel from the specified data and add it to memory.
+        The data is not stored in the operation journal, so a journal containing this operation can not be replayed.
 
         Args:
             data (np.ndarray): Data array to create the new channel from.
@@ -2061,130 +2289,217 @@ class SnomMeasurement(FileHandler):
         self.channel_tag_dict.append(channel_tag_dict)
         self.channels_label.append(channel_label)
 
-    def _load_data(self, channels:list) -> list:
+    def _load_data(self, channels:list, parallel:bool=False, max_workers:Optional[int]=None) -> list:
         """Loads all binary data of the specified channels and returns them in a list plus the dictionary with the channel information.
         Height data is automatically converted to nm. 
+        If the measurement was opened with lazy=True the gsf data is not read here, instead a LazyChannelData list is returned
+        which decodes each channel from a memory map of its file on first access.
         
         Args:
             channels (list): list of channels to load
+            parallel (bool, optional): if True the channels are read and decoded concurrently. Defaults to False.
+            max_workers (int, optional): maximum number of threads used if parallel is True. Defaults to None.
         """
-
-        data_dict = []
-        all_data = []
-        for channel in channels:
-            # check if channel is a default channel or something user made
-            # if default use the standard naming convention
-            # if user made dont use the '_raw' suffix
-            if self._is_custom_channel(channel):
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-            elif self._is_default_channel(channel):
-                suffix = self.channel_suffix_default
-                prefix = self.channel_prefix_default
-                channel_type = 'default'
-            else:
-                print(f'channel {channel} not found in default or custom channels!')
-                # assume it is a custom channel and try loading anyways
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-            '''if channel in self.all_channels_default:
-                suffix = self.channel_suffix_default
-                prefix = self.channel_prefix_default
-                channel_type = 'default'
-            elif channel in self.all_channels_custom:
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-            else:
-                print(f'channel {channel} not found in default or custom channels!')
-                # assume it is a custom channel and try loading anyways
-                suffix = self.channel_suffix_custom
-                prefix = self.channel_prefix_custom
-                channel_type = 'custom'
-                # sys.exit()'''
-            # check the readmode depending on the filetype
-            # this also affects the way the data is read and processed
-            if self.file_ending == '.gsf':
-                read_mode = 'br'
-            elif self.file_ending == '.ascii':
-                read_mode = 'r'
+        if self.lazy and self.file_ending == '.gsf':
+            # only create the loaders, each channel is decoded from a memory map on first access
+            all_data = LazyChannelData(self.memory_budget)
+            for channel in channels:
+                all_data.append_loader(partial(self._decode_gsf_channel, *self._get_channel_load_parameters(channel)))
+        else:
+            all_data = self._map_channels(self._load_channel_data, channels, parallel, max_workers)
+            if self.lazy:
+                lazy_data = LazyChannelData(self.memory_budget)
+                lazy_data.extend(all_data)
+                all_data = lazy_data
             else:
-                print('file ending not supported')
-            with open(self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{self.file_ending}'), read_mode) as f:
-                data=f.read()
-
-            if read_mode == 'br':
-                binarydata = data
-            elif read_mode == 'r':
-                datalist = data.split('\n')
-                datalist = [element.split(' ') for element in datalist]
-                datalist = np.array(datalist[:-1], dtype=float)#, dtype=np.float convert list to np.array and strings to float
-            
-            # get the resolution of the channel 
-            XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
-            # use the channel tag if possible
-            # try: XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
-            # some filetypes may not have a channel tag dict, then take the resolution from the measurement tag dict...
-            # except: XRes, YRes, *args = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
-            datasize=int(XRes*YRes*4)
-            channel_data = np.zeros((YRes, XRes))
-            # we knwo the resolution of the data from the header or parameter file
-            # we use that to read the data from the end of the file until the end of the file minus the datasize
-            # in this way we ignore the header and read only the data
-            if read_mode == 'br':
-                reduced_binarydata=binarydata[-datasize:]
-
-            # depending on the channel type set the scaling, phase_offset and rounding_decimal
-            scaling = 1 # default scaling, not every channel needs scaling
-            phase_offset = 0 # default phase offset, not every channel needs a phase offset
-            if self._is_amp_channel(channel):
-                if channel_type == 'default':
-                    rounding_decimal = self.rounding_decimal_amp_default
-                elif channel_type == 'custom':
-                    rounding_decimal = self.rounding_decimal_amp_custom
-            if self._is_height_channel(channel):
-                if channel_type == 'default':
-                    scaling = self.height_scaling_default
-                    rounding_decimal = self.rounding_decimal_height_default
-                elif channel_type == 'custom':
-                    scaling = self.height_scaling_custom
-                    rounding_decimal = self.rounding_decimal_height_custom
-            if self._is_phase_channel(channel):
-                if channel_type == 'default':
-                    phase_offset = self.phase_offset_default
-                    rounding_decimal = self.rounding_decimal_phase_default
-                elif channel_type == 'custom':
-                    phase_offset = self.phase_offset_custom
-                    rounding_decimal = self.rounding_decimal_phase_custom
-            if self._is_complex_channel(channel):
-                if channel_type == 'default':
-                    rounding_decimal = self.rounding_decimal_complex_default
-                elif channel_type == 'custom':
-                    rounding_decimal = self.rounding_decimal_complex_custom
-            # print(f'channel: {channel} is a {channel_type} channel')
-            # print(f'channel: {channel} is a amp channel ', self._is_amp_channel(channel))
-            # print(f'channel: {channel} is a phase channel ', self._is_phase_channel(channel))
-            # print(f'channel: {channel} is a height channel ', self._is_height_channel(channel))
-            # print(f'channel: {channel}, scaling: {scaling}, phase_offset: {phase_offset}, rounding_decimal: {rounding_decimal}')
-
-            # now read the data and apply the scaling, phase offset and rounding
-            for y in range(0,YRes):
-                for x in range(0,XRes):
-                    if read_mode == 'br':
-                        pixval = unpack("f",reduced_binarydata[4*(y*XRes+x):4*(y*XRes+x+1)])[0]
-                        channel_data[y][x] = round(pixval*scaling + phase_offset, rounding_decimal)
-                    elif read_mode == 'r':
-                        channel_data[y][x] = round(datalist[y][x]*scaling + phase_offset, rounding_decimal)
-            
-            all_data.append(channel_data)
-            data_dict.append(channel)
+                all_data = self._create_channel_data(all_data)
         # data_dict currently is just a list of the channels, this list is not equivalent to self.channels as the data_dict
         # or later self.channels_label contains the names of the channels which are used as the plot title, they will change depending on the functions applied, eg. 'channel_blurred' or channel_manipulated'...
         # but self.channels will always contain the original channel name as this is used for internal referencing
+        data_dict = list(channels)
         return all_data, data_dict
 
+    def _create_channel_data(self, all_data:list) -> list:
+        """Returns the container for the channel data, a ChannelStack if the measurement was opened with stacked=True, otherwise the list itself."""
+        if self.stacked:
+            return ChannelStack(all_data, self.dtype)
+        return all_data
+
+    def _get_channel_stack(self, indices:list) -> Optional[np.ndarray]:
+        """Returns the data of the channels with the given indices as one array of shape (channel, y, x).
+        Returns None if the measurement does not keep a channel stack or the channels can not be stacked, e.g. because they differ in size.
+
+        Args:
+            indices (list): indices of the channels in memory
+
+        Returns:
+            np.ndarray: the stacked data, a view of the stack if all channels are requested in order
+        """
+        if not isinstance(self.all_data, ChannelStack) or len(indices) == 0:
+            return None
+        stack = self.all_data.get_stack()
+        if stack is None or indices == list(range(len(stack))):
+            return stack
+        return stack[indices]
+
+    def _apply_to_channels(self, channels:list, function, stack:bool=False) -> None:
+        """Replaces the data of the specified channels with the result of the function.
+        If the channels can be stacked the function is called once with the data of all channels (channel, y, x),
+        otherwise it is called for each channel individually. The function must therefore work on the last two axes.
+
+        Args:
+            channels (list): channels in memory
+            function (callable): function taking the data and returning the new data
+            stack (bool, optional): if True channels of the same shape are also stacked if the measurement does not keep a channel stack,
+                useful if the function is much faster for the whole stack. Defaults to False.
+        """
+        indices = [self.channels.index(channel) for channel in channels]
+        data_stack = self._get_channel_stack(indices)
+        if data_stack is not None:
+            self.all_data.set_stack(function(data_stack), indices)
+        elif stack and len(indices) > 1 and len({np.shape(self.all_data[index]) for index in indices}) == 1:
+            data_stack = function(np.stack([self.all_data[index] for index in indices]))
+            for index, data in zip(indices, data_stack):
+                self.all_data[index] = data
+        else:
+            for index in indices:
+                self.all_data[index] = function(self.all_data[index])
+
+    def _get_channel_load_parameters(self, channel:str) -> tuple:
+        """Returns the filepath, resolution, scaling, phase offset and rounding decimal which are needed to load the specified channel.
+
+        Args:
+            channel (str): channel name
+
+        Returns:
+            tuple: (filepath, XRes, YRes, scaling, phase_offset, rounding_decimal)
+        """
+        # check if channel is a default channel or something user made
+        # if default use the standard naming convention
+        # if user made dont use the '_raw' suffix
+        if self._is_custom_channel(channel):
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+        elif self._is_default_channel(channel):
+            suffix = self.channel_suffix_default
+            prefix = self.channel_prefix_default
+            channel_type = 'default'
+        else:
+            print(f'channel {channel} not found in default or custom channels!')
+            # assume it is a custom channel and try loading anyways
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+        '''if channel in self.all_channels_default:
+            suffix = self.channel_suffix_default
+            prefix = self.channel_prefix_default
+            channel_type = 'default'
+        elif channel in self.all_channels_custom:
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+        else:
+            print(f'channel {channel} not found in default or custom channels!')
+            # assume it is a custom channel and try loading anyways
+            suffix = self.channel_suffix_custom
+            prefix = self.channel_prefix_custom
+            channel_type = 'custom'
+            # sys.exit()'''
+        # the filetype also affects the way the data is read and processed
+        if self.file_ending not in ['.gsf', '.ascii']:
+            print('file ending not supported')
+        filepath = self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{self.file_ending}')
+        
+        # get the resolution of the channel 
+        XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
+        # use the channel tag if possible
+        # try: XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
+        # some filetypes may not have a channel tag dict, then take the resolution from the measurement tag dict...
+        # except: XRes, YRes, *args = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
+
+        # depending on the channel type set the scaling, phase_offset and rounding_decimal
+        scaling = 1 # default scaling, not every channel needs scaling
+        phase_offset = 0 # default phase offset, not every channel needs a phase offset
+        # default rounding, e.g. for mechanical channels which are neither optical amplitude, phase, complex nor height channels
+        if channel_type == 'default':
+            rounding_decimal = self.rounding_decimal_amp_default
+        else:
+            rounding_decimal = self.rounding_decimal_amp_custom
+        if self._is_amp_channel(channel):
+            if channel_type == 'default':
+                rounding_decimal = self.rounding_decimal_amp_default
+            elif channel_type == 'custom':
+                rounding_decimal = self.rounding_decimal_amp_custom
+        if self._is_height_channel(channel):
+            if channel_type == 'default':
+                scaling = self.height_scaling_default
+                rounding_decimal = self.rounding_decimal_height_default
+            elif channel_type == 'custom':
+                scaling = self.height_scaling_custom
+                rounding_decimal = self.rounding_decimal_height_custom
+        if self._is_phase_channel(channel):
+            if channel_type == 'default':
+                phase_offset = self.phase_offset_default
+                rounding_decimal = self.rounding_decimal_phase_default
+            elif channel_type == 'custom':
+                phase_offset = self.phase_offset_custom
+                rounding_decimal = self.rounding_decimal_phase_custom
+        if self._is_complex_channel(channel):
+            if channel_type == 'default':
+                rounding_decimal = self.rounding_decimal_complex_default
+            elif channel_type == 'custom':
+                rounding_decimal = self.rounding_decimal_complex_custom
+        # print(f'channel: {channel} is a {channel_type} channel')
+        # print(f'channel: {channel} is a amp channel ', self._is_amp_channel(channel))
+        # print(f'channel: {channel} is a phase channel ', self._is_phase_channel(channel))
+        # print(f'channel: {channel} is a height channel ', self._is_height_channel(channel))
+        # print(f'channel: {channel}, scaling: {scaling}, phase_offset: {phase_offset}, rounding_decimal: {rounding_decimal}')
+
+        return filepath, XRes, YRes, scaling, phase_offset, rounding_decimal
+
+    def _load_channel_data(self, channel:str) -> np.ndarray:
+        """Loads the data of a single channel and applies the scaling, phase offset and rounding.
+
+        Args:
+            channel (str): channel name
+
+        Returns:
+            np.ndarray: the channel data
+        """
+        filepath, XRes, YRes, scaling, phase_offset, rounding_decimal = self._get_channel_load_parameters(channel)
+        # we knwo the resolution of the data from the header or parameter file
+        # we use that to read the data from the end of the file until the end of the file minus the datasize
+        # in this way we ignore the header and read only the data
+        if self.file_ending == '.gsf':
+            raw_data = read_gsf_data(filepath, XRes, YRes)
+        elif self.file_ending == '.ascii':
+            with open(filepath, 'r') as f:
+                data=f.read()
+            datalist = data.split('\n')
+            datalist = [element.split(' ') for element in datalist]
+            datalist = np.array(datalist[:-1], dtype=float)#, dtype=np.float convert list to np.array and strings to float
+            raw_data = datalist[:YRes, :XRes]
+        # now apply the scaling, phase offset and rounding to the whole array at once
+        return round_array(raw_data*scaling + phase_offset, rounding_decimal).astype(self.dtype, copy=False)
+
+    def _decode_gsf_channel(self, filepath:Path, XRes:int, YRes:int, scaling, phase_offset, rounding_decimal:int) -> np.ndarray:
+        """Decodes the data of a single gsf file from a memory map. Used as loader for lazily loaded channels.
+
+        Args:
+            filepath (Path): path to the gsf file
+            XRes (int): number of pixels in x direction
+            YRes (int): number of pixels in y direction
+            scaling (float): scaling factor applied to the raw data
+            phase_offset (float): offset added to the scaled data
+            rounding_decimal (int): number of decimals to round to
+
+        Returns:
+            np.ndarray: the channel data
+        """
+        raw_data = np.asarray(memmap_gsf_data(filepath, XRes, YRes), dtype=np.float64)
+        return round_array(raw_data*scaling + phase_offset, rounding_decimal).astype(self.dtype, copy=False)
+
     def _load_data_binary(self, channels:list) -> list:
         """Loads all binary data of the specified channels and returns them in a list plus the dictionary for access.
         
@@ -2310,21 +2625,19 @@ class SnomMeasurement(FileHandler):
             NUL += b'\0' # add NUL terminator
         return header, NUL
 
-    def save_to_gsf(self, channels:Optional[list]=None, appendix:str='default'):
-        """This function is ment to save all specified channels to external .gsf files.
-        
+    def _get_save_filepaths(self, channels:list, appendix:str, file_ending:str) -> tuple:
+        """Creates the filepaths to save the specified channels to.
+
         Args:
-            channels (list, optional):    list of the channels to be saved, if not specified, all channels in memory are saved.
-                                Careful! The data will be saved as it is right now, so with all the manipulations.
-                                Therefor the data should be saved with an appendix in the filename to keep the original data.
-            appendix (str, optional):     appendix/suffix to add to the filename, default is the default specified in the config of the current filetype.
+            channels (list): list of the channels to be saved
+            appendix (str): appendix/suffix to add to the filename
+            file_ending (str): file ending including the dot, e.g. '.gsf'
+
+        Returns:
+            tuple: dict of channel -> filepath and the appendix used for the last channel
         """
-        if appendix == 'default':
-            appendix = self.channel_suffix_manipulated
-        if channels is None:
-            channels = self.channels
+        filepaths = {}
         for channel in channels:
-
             # old:
             '''
             # find out if channel is default or not
@@ -2359,88 +2672,82 @@ class SnomMeasurement(FileHandler):
                 if self.channel_suffix_overlain in channel:
                     appendix = ''
 
-            filepath = self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{appendix}.gsf')
-            data = self.all_data[self.channels.index(channel)]
-            XRes = len(data[0])
-            YRes  = len(data)
-            header, NUL = self._create_header(channel)
-            file = open(filepath, 'bw')
+            filepaths[channel] = self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{appendix}{file_ending}')
+        return filepaths, appendix
+
+    def _write_gsf_file(self, channel:str, filepath:Path) -> None:
+        """Writes the data of the channel to a .gsf file. The data is rounded and converted as a whole and written with a single call.
+
+        Args:
+            channel (str): channel name
+            filepath (Path): path of the file
+        """
+        data = np.round(np.asarray(self.all_data[self.channels.index(channel)]), 5)
+        if self.height_indicator in channel:
+            data = data*pow(10,-9)
+        header, NUL = self._create_header(channel)
+        with open(filepath, 'bw') as file:
             file.write(header.encode('utf-8'))
             file.write(NUL) # the NUL marks the end of the header and konsists of 0 characters in the first dataline
-            if self.height_indicator in channel:
-                for y in range(YRes):
-                    for x in range(XRes):
-                        file.write(pack('f', round(data[y][x],5)*pow(10,-9)))
-            else:
-                for y in range(YRes):
-                    for x in range(XRes):
-                        file.write(pack('f', round(data[y][x], 5)))
-            file.close()
-            print(f'successfully saved channel {channel} to .gsf')
-        self._write_to_logfile('save_to_gsf_appendix', appendix)
+            file.write(np.asarray(data, dtype='<f4').tobytes())
+        print(f'successfully saved channel {channel} to .gsf')
 
-    def save_to_txt(self, channels:Optional[list]=None, appendix:str='default'):
-        """This function is ment to save all specified channels to external .txt files.
+    def _write_txt_file(self, channel:str, filepath:Path) -> None:
+        """Writes the data of the channel to a .txt file. The data is rounded as a whole and written row by row.
+
+        Args:
+            channel (str): channel name
+            filepath (Path): path of the file
+        """
+        data = np.round(np.asarray(self.all_data[self.channels.index(channel)]), 5)
+        header, NUL = self._create_header(channel, 'txt')
+        with open(filepath, 'w') as file:
+            file.write(header)
+            for row in data:
+                file.write(''.join([f'{value} ' for value in row]))
+        print(f'successfully saved channel {channel} to .txt')
+
+    @journaled
+    def save_to_gsf(self, channels:Optional[list]=None, appendix:str='default', parallel:bool=False, max_workers:Optional[int]=None):
+        """This function is ment to save all specified channels to external .gsf files.
         
         Args:
-            channels (list, optional):    list of the channels to be saved, if not specified, all channels in memory are saved
+            channels (list, optional):    list of the channels to be saved, if not specified, all channels in memory are saved.
                                 Careful! The data will be saved as it is right now, so with all the manipulations.
-                                Therefor the data will have an '_manipulated' appendix in the filename.
-            appendix (str, optional):     appendix to add to the filename, default is the default specified in the config of the current filetype.
+                                Therefor the data should be saved with an appendix in the filename to keep the original data.
+            appendix (str, optional):     appendix/suffix to add to the filename, default is the default specified in the config of the current filetype.
+            parallel (bool, optional):    write the channels concurrently. Defaults to False.
+            max_workers (int, optional):  maximum number of threads if parallel is True. Defaults to None.
         """
         if appendix == 'default':
-            appendix = self.channel_suffix_manipulated
-        if channels is None:
-            channels = self.channels
-        for channel in channels:
-            # old:
-            '''
-            # find out if channel is default or not
-            # if channel in self.all_channels_default:
-            #     suffix = self.channel_suffix_default
-            #     prefix = self.channel_prefix_default
-            #     channel_type = 'default'
-            # elif channel in self.all_channels_custom:
-            #     suffix = self.channel_suffix_custom
-            #     prefix = self.channel_prefix_custom
-            #     channel_type = 'custom'
-            #     # ignore the default appendix if the channel is not a default channel 
-            #     if self.channel_suffix_overlain in channel:
-            #         appendix = ''
-            #     elif self.channel_suffix_synccorrected_phase in channel:
-            #         appendix = ''
-            # else:
-            #     print('channel not found in default or custom channels\nNo appendix will be added to the filename')
-            #     # assume an unknown custom channel was encountered
-            #     suffix = self.channel_suffix_custom
-            #     prefix = self.channel_prefix_custom
-            #     channel_type = 'custom'
-            #     # sys.exit()
-            '''
-            # use the custom version of the prefix and suffix for all saves, we assume that all data which is saved has been modified in some way
-            # and should therefor be saved with the custom prefix and suffix even if no appendix is added
-            suffix = self.channel_suffix_custom
-            prefix = self.channel_prefix_custom
-            # check if the channel is custom
-            if self._is_custom_channel(channel):
-                # ignore the default appendix if the channel name already contains an appendix caused by manipulation 
-                if self.channel_suffix_overlain in channel:
-                    appendix = ''
-            
-            filepath = self.directory_name / Path(self.filename.name + f'{prefix}{channel}{suffix}{appendix}.txt')
-            data = self.all_data[self.channels.index(channel)]
-            XRes = len(data[0])
-            YRes  = len(data)
-            header, NUL = self._create_header(channel, 'txt')
-            file = open(filepath, 'w')
-            file.write(header)
-            # file.write(NUL) # the NUL marks the end of the header and konsists of 0 characters in the first dataline
-            for y in range(YRes):
-                for x in range(XRes):
-                    file.write(f'{round(data[y][x], 5)} ')
-            file.close()
-            print(f'successfully saved channel {channel} to .txt')
+            appendix = self.channel_suffix_manipulated
+        if channels is None:
+            channels = self.channels
+        filepaths, appendix = self._get_save_filepaths(channels, appendix, '.gsf')
+        self._map_channels(lambda channel: self._write_gsf_file(channel, filepaths[channel]), channels, parallel=parallel, max_workers=max_workers)
+        self._write_to_logfile('save_to_gsf_appendix', appendix)
+        self.flush_journal()
+
+    @journaled
+    def save_to_txt(self, channels:Optional[list]=None, appendix:str='default', parallel:bool=False, max_workers:Optional[int]=None):
+        """This function is ment to save all specified channels to external .txt files.
+        
+        Args:
+            channels (list, optional):    list of the channels to be saved, if not specified, all channels in memory are saved
+                                Careful! The data will be saved as it is right now, so with all the manipulations.
+                                Therefor the data will have an '_manipulated' appendix in the filename.
+            appendix (str, optional):     appendix to add to the filename, default is the default specified in the config of the current filetype.
+            parallel (bool, optional):    write the channels concurrently. Defaults to False.
+            max_workers (int, optional):  maximum number of threads if parallel is True. Defaults to None.
+        """
+        if appendix == 'default':
+            appendix = self.channel_suffix_manipulated
+        if channels is None:
+            channels = self.channels
+        filepaths, appendix = self._get_save_filepaths(channels, appendix, '.txt')
+        self._map_channels(lambda channel: self._write_txt_file(channel, filepaths[channel]), channels, parallel=parallel, max_workers=max_workers)
         self._write_to_logfile('save_to_txt_appendix', appendix)
+        self.flush_journal()
  
     def delete_unwanted_files(self, mechanical_channels=True, optical_channels=False, images_folder=True, gwy_file=True) -> None:
         """Delete unwanted files to reduce the size of the measurement folder.
@@ -2519,26 +2826,15 @@ class SnomMeasurement(FileHandler):
     ###########################################
 
     def _load_all_subplots(self) -> None:
-        """Load all subplots from memory (located under home/SNOM_Analysis/all_subplots.p).
+        """Load all subplots from the subplot registry. The registry keeps the subplots in memory and persists them
+        under home/SNOM_Config/SNOM_Analysis/all_subplots.journal.
         """
-        try:
-            with open(self.all_subplots_path, 'rb') as file:
-                self.all_subplots = pkl.load(file)
-        except: self.all_subplots = []
-         
-    def _export_all_subplots(self) -> None:
-        """Export all subplots to memory.
-        """
-        with open(self.all_subplots_path, 'wb') as file:
-            pkl.dump(self.all_subplots, file)
-        self.all_subplots = []
+        self.all_subplots = self.subplot_registry.get_all()
 
     def _delete_all_subplots(self):
         """Delete the subplot memory. Should be done always if new measurement row is investigated.
         """
-        try:
-            os.remove(self.all_subplots_path)
-        except: pass
+        self.subplot_registry.clear()
         self.all_subplots = []
 
     def _get_plotting_values(self, channel:str) -> tuple:
@@ -2626,9 +2922,7 @@ class SnomMeasurement(FileHandler):
             return [data, cmap, label, title]
         '''
         supplot = {'data': np.copy(data), 'cmap': cmap, 'label': label, 'title': title, 'scalebar': scalebar}
-        self._load_all_subplots()
-        self.all_subplots.append(supplot)
-        self._export_all_subplots()
+        self.subplot_registry.append(supplot)
         return supplot
     
     def remove_subplots(self, index_array:list) -> None:
@@ -2639,10 +2933,7 @@ class SnomMeasurement(FileHandler):
         """
         #sort the index array in descending order and delete the corresponding plots from the memory
         index_array.sort(reverse=True)
-        self._load_all_subplots()
-        for index in index_array:
-            del self.all_subplots[index]
-        self._export_all_subplots()
+        self.subplot_registry.remove(index_array)
 
     def remove_last_subplots(self, times:int=1) -> None:
         """This function removes the last added subplots from the memory.
@@ -2652,10 +2943,7 @@ class SnomMeasurement(FileHandler):
         Args:
             times (int): how many subplots should be removed from the end of the list?
         """
-        self._load_all_subplots()
-        for i in range(times):
-            self.all_subplots.pop()
-        self._export_all_subplots()
+        self.subplot_registry.pop(times)
 
     def _plot_subplots(self, subplots:list) -> None:
         """This function plots the subplots. The plots are created in a grid, by default the grid is optimized for 3 by 3.
@@ -2743,11 +3031,11 @@ class SnomMeasurement(FileHandler):
                         else:
                             img = axis.pcolormesh(data, cmap=cmap, vmin=-data_limit, vmax=data_limit, rasterized=True)
                     else:
-                        if cmap == SNOM_phase and PlotDefinitions.full_phase_range is True: # for phase data
+                        if cmap == snom_colormaps.SNOM_phase and PlotDefinitions.full_phase_range is True: # for phase data
                             vmin = 0
                             vmax = 2*np.pi
                             img = axis.pcolormesh(data, cmap=cmap, vmin=vmin, vmax=vmax, rasterized=True)
-                        elif cmap == SNOM_phase and PlotDefinitions.full_phase_range is False:
+                        elif cmap == snom_colormaps.SNOM_phase and PlotDefinitions.full_phase_range is False:
                             if PlotDefinitions.vmin_phase is None: PlotDefinitions.vmin_phase = min_data
                             if PlotDefinitions.vmax_phase is None: PlotDefinitions.vmax_phase = max_data
                             if PlotDefinitions.shared_phase_range is True:
@@ -2758,7 +3046,7 @@ class SnomMeasurement(FileHandler):
                                 PlotDefinitions.vmax_phase = max_data
                             img = axis.pcolormesh(data, cmap=cmap, vmin=PlotDefinitions.vmin_phase, vmax=PlotDefinitions.vmax_phase, rasterized=True)
                             
-                        elif cmap == SNOM_amplitude and PlotDefinitions.amp_cbar_range is True:
+                        elif cmap == snom_colormaps.SNOM_amplitude and PlotDefinitions.amp_cbar_range is True:
                             if PlotDefinitions.vmin_amp is None: PlotDefinitions.vmin_amp = min_data
                             if PlotDefinitions.vmax_amp is None: PlotDefinitions.vmax_amp = max_data
                             if min_data < PlotDefinitions.vmin_amp: PlotDefinitions.vmin_amp = min_data # update the min and max values in PlotDefinitions if new values are outside of range
@@ -2766,7 +3054,7 @@ class SnomMeasurement(FileHandler):
                             vmin = PlotDefinitions.vmin_amp
                             vmax = PlotDefinitions.vmax_amp
                             img = axis.pcolormesh(data, cmap=cmap, vmin=vmin, vmax=vmax, rasterized=True)
-                        elif cmap == SNOM_height and PlotDefinitions.height_cbar_range is True:
+                        elif cmap == snom_colormaps.SNOM_height and PlotDefinitions.height_cbar_range is True:
                             if PlotDefinitions.vmin_height is None: PlotDefinitions.vmin_height = min_data # initialize for the first time
                             if PlotDefinitions.vmax_height is None: PlotDefinitions.vmax_height = max_data
                             if min_data < PlotDefinitions.vmin_height: PlotDefinitions.vmin_height = min_data # update the min and max values in PlotDefinitions if new values are outside of range
@@ -2782,7 +3070,7 @@ class SnomMeasurement(FileHandler):
                     # the mask is not stored in the plot variable but for the whole measurement.
                     # repeated calls of the measurement instance would lead to problems
                     '''
-                    if (cmap == SNOM_height) and ('_masked' in title) and ('_reduced' not in title):
+                    if (cmap == snom_colormaps.SNOM_height) and ('_masked' in title) and ('_reduced' not in title):
                         # create a white border around the masked area, but show the full unmasked height data
                         border_width = 1
                         yres = len(data)
@@ -2937,11 +3225,11 @@ class SnomMeasurement(FileHandler):
                 else:
                     img = ax.pcolormesh(data, cmap=cmap, vmin=-data_limit, vmax=data_limit, rasterized=True)
             else:
-                if cmap == SNOM_phase and PlotDefinitions.full_phase_range is True: # for phase data
+                if cmap == snom_colormaps.SNOM_phase and PlotDefinitions.full_phase_range is True: # for phase data
                     vmin = 0
                     vmax = 2*np.pi
                     img = ax.pcolormesh(data, cmap=cmap, vmin=vmin, vmax=vmax, rasterized=True)
-                elif cmap == SNOM_phase and PlotDefinitions.full_phase_range is False:
+                elif cmap == snom_colormaps.SNOM_phase and PlotDefinitions.full_phase_range is False:
                     if PlotDefinitions.vmin_phase is None: PlotDefinitions.vmin_phase = min_data
                     if PlotDefinitions.vmax_phase is None: PlotDefinitions.vmax_phase = max_data
                     if PlotDefinitions.shared_phase_range is True:
@@ -2952,7 +3240,7 @@ class SnomMeasurement(FileHandler):
                         PlotDefinitions.vmax_phase = max_data
                     img = ax.pcolormesh(data, cmap=cmap, vmin=PlotDefinitions.vmin_phase, vmax=PlotDefinitions.vmax_phase, rasterized=True)
                     
-                elif cmap == SNOM_amplitude and PlotDefinitions.amp_cbar_range is True:
+                elif cmap == snom_colormaps.SNOM_amplitude and PlotDefinitions.amp_cbar_range is True:
                     if PlotDefinitions.vmin_amp is None: PlotDefinitions.vmin_amp = min_data
                     if PlotDefinitions.vmax_amp is None: PlotDefinitions.vmax_amp = max_data
                     if min_data < PlotDefinitions.vmin_amp: PlotDefinitions.vmin_amp = min_data # update the min and max values in PlotDefinitions if new values are outside of range
@@ -2960,7 +3248,7 @@ class SnomMeasurement(FileHandler):
                     vmin = PlotDefinitions.vmin_amp
                     vmax = PlotDefinitions.vmax_amp
                     img = ax.pcolormesh(data, cmap=cmap, vmin=vmin, vmax=vmax, rasterized=True)
-                elif cmap == SNOM_height and PlotDefinitions.height_cbar_range is True:
+                elif cmap == snom_colormaps.SNOM_height and PlotDefinitions.height_cbar_range is True:
                     if PlotDefinitions.vmin_height is None: PlotDefinitions.vmin_height = min_data # initialize for the first time
                     if PlotDefinitions.vmax_height is None: PlotDefinitions.vmax_height = max_data
                     if min_data < PlotDefinitions.vmin_height: PlotDefinitions.vmin_height = min_data # update the min and max values in PlotDefinitions if new values are outside of range
@@ -2994,7 +3282,7 @@ class SnomMeasurement(FileHandler):
             # the mask is not stored in the plot variable but for the whole measurement.
             # repeated calls of the measurement instance would lead to problems
             '''
-            if (cmap == SNOM_height) and ('_masked' in title) and ('_reduced' not in title):
+            if (cmap == snom_colormaps.SNOM_height) and ('_masked' in title) and ('_reduced' not in title):
                 # create a white border around the masked area, but show the full unmasked height data
                 border_width = 1
                 yres = len(data)
@@ -3047,11 +3335,7 @@ class SnomMeasurement(FileHandler):
         if (first_id is None) or (second_id is None):
             first_id = int(input('Please enter the id of the first image: '))
             second_id = int(input('Please enter the id of the second image: '))
-        self._load_all_subplots()
-        first_subplot = self.all_subplots[first_id]
-        self.all_subplots[first_id] = self.all_subplots[second_id]
-        self.all_subplots[second_id] = first_subplot
-        self._export_all_subplots()
+        self.subplot_registry.swap(first_id, second_id)
         self.display_all_subplots()
         print('Are you happy with the new positioning?')
         user_input = self._user_input_bool()
@@ -3171,32 +3455,41 @@ class SnomMeasurement(FileHandler):
     #### Basic functions ####
     #~~~~~~~~~~~~~~~~~~~~~~~#
 
-    def _scale_array(self, array, scaling) -> np.ndarray:
-        """This function scales a given 2D Array, it thus creates 'scaling'**2 subpixels per pixel.
-        The scaled array is returned."""
-        yres = len(array)
-        xres = len(array[0])
-        scaled_array = np.zeros((yres*scaling, xres*scaling))
-        for i in range(len(array)):
-            for j in range(len(array[0])):
-                for k in range(scaling):
-                    for l in range(scaling):
-                        scaled_array[i*scaling + k][j*scaling + l] = array[i][j]
-        return scaled_array
-
-    def scale_channels(self, channels:Optional[list]=None, scaling:int=4) -> None:
+    def _scale_array(self, array, scaling, method:str='nearest') -> np.ndarray:
+        """This function scales a given 2D Array or a stack of 2D arrays, it thus creates 'scaling'**2 subpixels per pixel.
+        The scaled array is returned.
+
+        Args:
+            array (np.ndarray): the data
+            scaling (int): the scaling factor
+            method (str, optional): 'nearest' replicates each pixel, 'bilinear' and 'fourier' interpolate. Defaults to 'nearest'.
+        """
+        return resampling.scale(array, scaling, method=method)
+
+    @journaled
+    def scale_channels(self, channels:Optional[list]=None, scaling:int=4, method:str='nearest') -> None:
         """This function scales all the data in memory or the specified channels.
+        Channels with the same resolution are scaled together as one stack.
                 
         Args:
             channels (list, optional): List of channels to scale. If not specified all channels in memory will be scaled. Defaults to None.
             scaling (int, optional): Defines scaling factor. Each pixel will be scaled to scaling**2 subpixels. Defaults to 4.
+            method (str, optional): 'nearest' replicates each pixel, 'bilinear' and 'fourier' interpolate the subpixels. Defaults to 'nearest'.
         """
         if channels is None:
             channels = self.channels
         self._write_to_logfile('scaling', scaling)
+        # group the channels by resolution and scale each group at once
+        channel_groups = {}
+        for channel in channels:
+            if channel in self.channels:
+                channel_groups.setdefault(np.shape(self.all_data[self.channels.index(channel)]), []).append(channel)
+        for group in channel_groups.values():
+            scaled_data = self._scale_array(np.stack([self.all_data[self.channels.index(channel)] for channel in group]), scaling, method)
+            for channel, data in zip(group, scaled_data):
+                self.all_data[self.channels.index(channel)] = data
         for channel in channels:
             if channel in self.channels:
-                self.all_data[self.channels.index(channel)] = self._scale_array(self.all_data[self.channels.index(channel)], scaling)
                 # XReal, YReal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA) # Real should be the scan size not the pixel count...
                 XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
                 # use the channel tag if possible
@@ -3208,6 +3501,7 @@ class SnomMeasurement(FileHandler):
             else:
                 print(f'Channel {channel} is not in memory! Please initiate the channels you want to use first!')
 
+    @journaled
     def set_min_to_zero(self, channels:Optional[list]=None) -> None:
         """This function sets the min value of the specified channels to zero.
                 
@@ -3221,14 +3515,14 @@ class SnomMeasurement(FileHandler):
                     channels.append(channel)
 
         self._write_to_logfile('set_min_to_zero', True)
+        channels_in_memory = []
         for channel in channels:
             if channel in self.channels:
-                data = self.all_data[self.channels.index(channel)]
-                flattened_data = data.flatten()
-                data_min = min(flattened_data)
-                self.all_data[self.channels.index(channel)] = data - data_min
+                channels_in_memory.append(channel)
             else:
                 print('At least one of the specified channels is not in memory! You probably should initialize the channels first.')
+        # subtract the min value of each channel, nan values are ignored
+        self._apply_to_channels(channels_in_memory, lambda data: data - np.nanmin(data, axis=(-2, -1), keepdims=True))
     
     def _get_channel_scaling(self, channel_id) -> int :
         """This function checks if an instance channel is scaled and returns the scaling factor.
@@ -3266,19 +3560,11 @@ class SnomMeasurement(FileHandler):
         Returns:
             np.ndarray: the mask array
         """
-        height_flattened = height_data.flatten()
-        height_threshold = threshold*(max(height_flattened)-min(height_flattened))+min(height_flattened)
+        height_data = np.asarray(height_data)
+        height_threshold = threshold*(np.nanmax(height_data)-np.nanmin(height_data))+np.nanmin(height_data)
 
         # create an array containing 0 and 1 depending on wether the height value is below or above threshold
-        mask_array = np.copy(height_data)
-        yres = len(height_data)
-        xres = len(height_data[0])
-        for y in range(yres):
-            for x in range(xres):
-                value = 0
-                if height_data[y][x] >= height_threshold:
-                    value = 1
-                mask_array[y][x] = value
+        mask_array = np.greater_equal(height_data, height_threshold).astype(height_data.dtype)
         return mask_array
 
     def _get_height_treshold(self, height_data:np.ndarray) -> float:
@@ -3309,6 +3595,7 @@ class SnomMeasurement(FileHandler):
                     sys.exit()'''
         return threshold
 
+    @journaled
     def heigth_mask_channels(self, channels:Optional[list]=None, mask_channel:str=None, threshold:float=None) -> None:
         """
         The treshold factor should be between 0 and 1. It sets the threshold for the height pixels.
@@ -3346,6 +3633,7 @@ class SnomMeasurement(FileHandler):
         self.mask_array = mask_array # todo, mask array must be saved as part of the image, otherwise multiple measurement creations will use the same mask
 
         self._write_to_logfile('height_masking_threshold', threshold)
+        self._set_operation_argument('threshold', threshold)
         for channel in channels:
             if channel not in self.channels:
                 print(f'Channel {channel} is not in memory! Please initiate the channels you want to use first!')
@@ -3389,6 +3677,7 @@ class SnomMeasurement(FileHandler):
         clicker = ImageClicker(data, cmap, message)
         return clicker.coords
 
+    @journaled
     def cut_channels(self, channels:Optional[list]=None, preview_channel:Optional[str]=None, autocut:bool=False, coords:Optional[list]=None, reset_mask:bool=True) -> None:
         """This function cuts the specified channels to the specified region. If no coordinates are specified you will be prompted with a window to select an area.
         If you created a mask previously for this instance the old mask will be reused! Otherwise you should manually change the reset_mask parameter to True.
@@ -3414,10 +3703,8 @@ class SnomMeasurement(FileHandler):
         # apply the already existing mask if possible.  
         if reset_mask == False:  
             if (len(self.mask_array) > 0):
-                for channel in channels:
-                    index = self.channels.index(channel)
-                    self.all_data[index] = np.multiply(self.all_data[index], self.mask_array)
-                    # self.channels[index] += '_reduced'
+                self._apply_to_channels(channels, lambda data: np.multiply(data, self.mask_array))
+                # self.channels[index] += '_reduced'
             else:
                 print('There does not seem to be an old mask... ')
         # generate new mask by selecting a region in the preview channel
@@ -3429,24 +3716,20 @@ class SnomMeasurement(FileHandler):
             # check if coords are none, if so, the user has canceled the selection
             if coords is not None:
                 self._write_to_logfile('cut_coords', coords)
+                self._set_operation_argument('coords', coords)
                 # use the selection to create a mask and multiply to all channels, then apply auto_cut function
                 yres = len(data)
                 xres = len(data[0])
-                self.mask_array = np.zeros((yres, xres))
-                for y in range(yres):
-                    if y in range(coords[0][1], coords[1][1]):
-                        for x in range(xres):
-                            if x in range(coords[0][0], coords[1][0]):
-                                self.mask_array[y][x] = 1
-                for channel in channels:
-                    index = self.channels.index(channel)
-                    # set all values outside of the mask to zero and then cut all zero away from the outside with _auto_cut_channels(channels)
-                    self.all_data[index] = np.multiply(self.all_data[index], self.mask_array)
+                self.mask_array = np.zeros((yres, xres), dtype=self.dtype)
+                # negative coordinates are outside of the data and must not wrap around
+                self.mask_array[max(coords[0][1], 0):max(coords[1][1], 0), max(coords[0][0], 0):max(coords[1][0], 0)] = 1
+                # set all values outside of the mask to zero and then cut all zero away from the outside with _auto_cut_channels(channels)
+                self._apply_to_channels(channels, lambda data: np.multiply(data, self.mask_array))
             else:
                 # if the user did not select a rectangle we don't want to cut anything
                 yres = len(data)
                 xres = len(data[0])
-                self.mask_array = np.ones((yres, xres))  
+                self.mask_array = np.ones((yres, xres), dtype=self.dtype)
         # apply the auto cut function to remove masked areas around the data
         self._auto_cut_channels(channels, self.mask_array)
         gc.collect()
@@ -3461,17 +3744,18 @@ class SnomMeasurement(FileHandler):
         if channels is None:
             channels = self.channels
         
-        # get the new size of the reduced channels
-        # reduced_data = self._auto_cut_data(self.all_data[0])
-        reduced_data = self._auto_cut_data(mask_array)
-        yres = len(reduced_data)
-        xres = len(reduced_data[0])
+        # the rows and columns to keep are only determined once from the mask and then applied to all channels
+        selection = None
+        if mask_array is not None:
+            selection = self._get_auto_cut_selection(mask_array)
+            self._apply_to_channels(channels, partial(self._apply_auto_cut_selection, selection=selection))
         for channel in channels:
             index = self.channels.index(channel)
             # get the old size of the data
             xres, yres, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
             xreal, yreal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
-            self.all_data[index] = self._auto_cut_data(self.all_data[index], mask_array)
+            if selection is None:
+                self.all_data[index] = self._auto_cut_data(self.all_data[index])
             xres_new = len(self.all_data[index][0])
             yres_new = len(self.all_data[index])
             xreal_new = xreal*xres_new/xres
@@ -3485,53 +3769,41 @@ class SnomMeasurement(FileHandler):
 
     def _auto_cut_data(self, data, mask_array:np.ndarray=None) -> np.ndarray:
         """This function cuts the data and removes zero values from the outside."""
-        xres = len(data[0])
-        yres = len(data)
-        # find empty columns and rows to delete:
-        columns = []
-        rows = []
-        if mask_array is not None:
-            # if a mask array is given, use it to find empty columns and rows
-            for x in range(xres):
-                if np.all(mask_array[:, x] == 0):
-                    columns.append(x)
-            for y in range(yres):
-                if np.all(mask_array[y, :] == 0):
-                    rows.append(y)
-
-        else:    
-            for x in range(xres):
-                add_to_columns = True
-                for y in range(yres):
-                    if data[y][x] != 0:
-                        add_to_columns = False
-                if add_to_columns == True:
-                    columns.append(x)
-            rows = []
-            for y in range(yres):
-                add_to_rows = True
-                for x in range(xres):
-                    if data[y][x] != 0:
-                        add_to_rows = False
-                if add_to_rows == True:
-                    rows.append(y)
-        
-        # create reduced data array
-        x_reduced = xres - len(columns)
-        y_reduced = yres - len(rows)
-        data_reduced = np.zeros((y_reduced, x_reduced))
-        # iterate through all pixels and check if they are in rows and columns, then add them to the reduced data array
-        count_x = 0
-        count_y = 0
-        for y in range(yres):
-            if y not in rows:
-                for x in range(xres):
-                    if x not in columns:
-                        data_reduced[count_y][count_x] = data[y][x] 
-                        count_x += 1
-                count_x = 0
-                count_y += 1
-        return data_reduced
+        # if a mask array is given, use it to find empty columns and rows
+        if mask_array is None:
+            mask_array = data
+        return self._apply_auto_cut_selection(data, self._get_auto_cut_selection(mask_array))
+
+    def _get_auto_cut_selection(self, mask_array:np.ndarray) -> tuple:
+        """Finds the rows and columns of the mask array which contain only zeros.
+
+        Args:
+            mask_array (np.ndarray): the mask array or data
+
+        Returns:
+            tuple: index to select the remaining rows and columns, simple slices if the remaining rows and columns are contiguous
+        """
+        mask_array = np.asarray(mask_array)
+        # nan values are not zero, like in the comparison with != 0
+        keep_rows = np.any(mask_array != 0, axis=1)
+        keep_columns = np.any(mask_array != 0, axis=0)
+        selection = []
+        for keep in (keep_rows, keep_columns):
+            indices = np.flatnonzero(keep)
+            if len(indices) == 0 or indices[-1] - indices[0] + 1 == len(indices):
+                # a single block, e.g. the bounding box of a mask, can be cut with a slice
+                selection.append(slice(indices[0], indices[-1] + 1) if len(indices) > 0 else slice(0, 0))
+            else:
+                selection.append(indices)
+        if isinstance(selection[0], slice) or isinstance(selection[1], slice):
+            return tuple(selection)
+        return np.ix_(selection[0], selection[1])
+
+    def _apply_auto_cut_selection(self, data:np.ndarray, selection:tuple) -> np.ndarray:
+        # the reduced data is always a new float array, complex data keeps its imaginary part and float32 data its precision
+        # the selection applies to the last two axes, so stacks of channels can be cut at once
+        data = np.asarray(data)
+        return np.array(data[(Ellipsis,) + tuple(selection)], dtype=get_float_dtype(data.dtype))
 
     def scalebar(self, channels:list=[], units="m", dimension="si-length", label=None, length_fraction=None, height_fraction=None, width_fraction=None,
             location=None, loc=None, pad=None, border_pad=None, sep=None, frameon=None, color=None, box_color=None, box_alpha=None, scale_loc=None,
@@ -3571,6 +3843,7 @@ class SnomMeasurement(FileHandler):
                 self.scalebar_channels.append([channel, None])                
             count += 1
 
+    @journaled
     def rotate_90_deg(self, orientation:str = 'right'):
         """This function will rotate all data in memory by 90 degrees.
 
@@ -3586,7 +3859,7 @@ class SnomMeasurement(FileHandler):
         #rotate data:
         all_data = self.all_data.copy()
         # initialize data array
-        self.all_data = []
+        self.all_data = self._create_channel_data([])
         for channel in self.channels:
             # flip pixelarea and scanarea as well
             XReal, YReal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
@@ -3595,18 +3868,11 @@ class SnomMeasurement(FileHandler):
             self._set_channel_tag_dict_value(channel, ChannelTags.PIXELAREA, [YRes, XRes])
             self.all_data.append(np.rot90(all_data[self.channels.index(channel)], axes=axes))
 
-    def _scale_data_xy(self, data:np.ndarray, scale_x:int, scale_y:int) -> np.ndarray:
-        XRes = len(data[0])
-        YRes = len(data)
-        new_data = np.zeros((YRes*scale_y, XRes*scale_x))
-        for y in range(YRes):
-            for i in range(scale_y):
-                for x in range(XRes):
-                    for j in range(scale_x):
-                        new_data[y*scale_y + i][x*scale_x + j]= data[y][x]
-        return new_data
-
-    def quadratic_pixels(self, channels:Optional[list]=None):
+    def _scale_data_xy(self, data:np.ndarray, scale_x:int, scale_y:int, method:str='nearest') -> np.ndarray:
+        return resampling.scale(data, scale_y, scale_x, method=method)
+
+    @journaled
+    def quadratic_pixels(self, channels:Optional[list]=None, method:str='nearest'):
         """This function scales the data such that each pixel is quadratic, eg. the physical dimensions are equal.
         This is important because the pixels will be set to quadratic in the plotting function.
         However make shure that the pixel scaling x relative to y is an integer, otherwise the scaling will not work properly.
@@ -3614,6 +3880,7 @@ class SnomMeasurement(FileHandler):
         
         Args:
             channels [list]: list of channels the scaling should be applied to. If not specified the scaling will be applied to all channels
+            method (str, optional): 'nearest' uses the nearest pixel, 'bilinear' and 'fourier' interpolate. Defaults to 'nearest'.
         """
         self._write_to_logfile('quadratic_pixels', True)
         if channels is None:
@@ -3634,8 +3901,7 @@ class SnomMeasurement(FileHandler):
                     # print('The pixel size does not fit perfectly, you probably chose weired resolution values. You should probably not use this function then...\nScaling the data anyways!')
                 # self.all_data[self.channels.index(channel)] = self._scale_data_xy(self.all_data[self.channels.index(channel)], scale_x, scale_y)
                 # self._set_channel_tag_dict_value(channel, ChannelTags.PIXELAREA, [XRes*scale_x, YRes*scale_y])
-                ###### New method using pillow to scale the image with interpolation, better if the scaling is not an integer
-                # one could also implement a method using pillow to scale the image with interpolation, better if the scaling is not an integer
+                ###### New method using the resampling functions, also works if the scaling is not an integer
                 rescaling = False
                 if pixel_size_x < pixel_size_y:
                     # scale_y, rest = divmod(pixel_size_y, pixel_size_x)
@@ -3648,18 +3914,18 @@ class SnomMeasurement(FileHandler):
                     xres = int(XRes*pixel_size_x/pixel_size_y)
                     rescaling = True
                 if rescaling:
-                    img = Image.fromarray(self.all_data[self.channels.index(channel)])
-                    img = img.resize((xres, yres), Image.Resampling.NEAREST)
-                    self.all_data[self.channels.index(channel)] = np.array(img)
+                    self.all_data[self.channels.index(channel)] = resampling.resize(self.all_data[self.channels.index(channel)], yres, xres, method)
                     self._set_channel_tag_dict_value(channel, ChannelTags.PIXELAREA, [xres, yres])
 
     #### Filtering functions ####
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
     def _gauss_blurr_data(self, array, sigma) -> np.ndarray:
-        """Applies a gaussian blurr to the specified array, with a specified sigma. The blurred data is returned as a np.ndarray."""
-        return gaussian_filter(array, sigma)
+        """Applies a gaussian blurr to the specified array, with a specified sigma. The blurred data is returned as a np.ndarray.
+        Only the last two axes are blurred, so a stack of channels (channel, y, x) is blurred channel by channel."""
+        return gaussian_filter(array, sigma, axes=(-2, -1))
 
+    @journaled
     def gauss_filter_channels(self, channels:Optional[list]=None, sigma=2):
         """This function will gauss filter the specified channels. If no channels are specified, the ones in memory will be used.
         Only for amplitude and height data, phase data will be ignored. Works fine, but the gauss_filter_channels_complex() function is more versatile.
@@ -3673,6 +3939,7 @@ class SnomMeasurement(FileHandler):
         self._write_to_logfile('gaussian_filter_sigma', sigma)
         
         # start the blurring:
+        channels_in_memory = []
         for channel in channels:
             if channel in self.channels:
                 channel_index = self.channels.index(channel)
@@ -3684,10 +3951,11 @@ class SnomMeasurement(FileHandler):
                         user_input = self._user_input_bool()
                         if user_input == True:
                             self.scale_channels([channel])
-                self.all_data[channel_index] = self._gauss_blurr_data(self.all_data[channel_index], sigma)
+                channels_in_memory.append(channel)
                 self.channels_label[channel_index] += '_' + self.filter_gauss_indicator
             else: 
                 print(f'Channel {channel} is not in memory! Please initiate the channels you want to use first!')
+        self._apply_to_channels(channels_in_memory, partial(self._gauss_blurr_data, sigma=sigma))
 
     def _find_gauss_compatible_channels(self) -> list:
         """This function goes through all channels in memory and tries to find compatible pairs of amplitude and phase channels.
@@ -3719,6 +3987,7 @@ class SnomMeasurement(FileHandler):
         return channel_pairs
 
     # todo will currently ignore channel list and only use it to check if channels are in memory, should be adapted such that only specified channels are blurred
+    @journaled
     def gauss_filter_channels_complex(self, channels:Optional[list]=None, scaling:int=4, sigma:int=2) -> None:
         """This fucton gauss filters the specified channels. If no channels are specified, all channels in memory will be used.
         The function is designed to work with complex data, where amplitude and phase are stored in separate channels.
@@ -3774,14 +4043,12 @@ class SnomMeasurement(FileHandler):
         for i in range(len(channel_pairs)):
             amp = self.all_data[channel_pairs[i][0]]
             phase = self.all_data[channel_pairs[i][1]]
-            real = amp*np.cos(phase)
-            imag = amp*np.sin(phase)
+            compl = phase_analysis.amp_phase_to_complex(amp, phase)
 
-            real_blurred = self._gauss_blurr_data(real, sigma)
-            imag_blurred = self._gauss_blurr_data(imag, sigma)
+            real_blurred = self._gauss_blurr_data(compl.real, sigma)
+            imag_blurred = self._gauss_blurr_data(compl.imag, sigma)
             compl_blurred = np.add(real_blurred, 1J*imag_blurred)
-            amp_blurred = np.abs(compl_blurred)
-            phase_blurred = self._get_compl_angle(compl_blurred)
+            amp_blurred, phase_blurred = phase_analysis.complex_to_amp_phase(compl_blurred)
 
             # update the data in memory and the labels used for plotting but not the channel names
             self.all_data[channel_pairs[i][0]] = amp_blurred
@@ -3804,17 +4071,7 @@ class SnomMeasurement(FileHandler):
         Args:
             compl_number_array (np.ndarray): complex number array
         """
-        YRes = len(compl_number_array)
-        XRes = len(compl_number_array[0])
-        realpart = compl_number_array.real
-        imagpart = compl_number_array.imag
-        r = np.sqrt(pow(imagpart, 2) + pow(realpart, 2))
-        phase = np.arctan2(r*imagpart, r*realpart) #returns values between -pi and pi, add pi for the negative values
-        for i in range(YRes):
-            for j in range(XRes):
-                if phase[i][j] < 0:
-                    phase[i][j]+=2*np.pi
-        return phase
+        return phase_analysis.complex_to_phase(compl_number_array)
 
     def _fourier_filter_array(self, complex_array) -> np.ndarray:
         '''
@@ -3826,6 +4083,7 @@ class SnomMeasurement(FileHandler):
         FS_compl = np.fft.fftn(complex_array)
         return FS_compl
     
+    @journaled
     def fourier_filter_channels(self, channels:Optional[list]=None) -> None:
         """This function applies the Fourier filter to all data in memory or specified channels.
                 
@@ -3844,7 +4102,7 @@ class SnomMeasurement(FileHandler):
         for i in range(int(len(channels_to_filter)/2)):
             amp = self.all_data[channels_to_filter[i]]
             phase = self.all_data[channels_to_filter[i+1]]
-            compl = np.add(amp*np.cos(phase), 1J*amp*np.sin(phase))
+            compl = phase_analysis.amp_phase_to_complex(amp, phase)
             FS_compl = self._fourier_filter_array(compl)
             FS_compl_abs = np.absolute(FS_compl)
             FS_compl_angle = self._get_compl_angle(FS_compl)
@@ -3853,6 +4111,7 @@ class SnomMeasurement(FileHandler):
             self.all_data[channels_to_filter[i+1]] = FS_compl_angle
             self.channels_label[channels_to_filter[i+1]] = self.channels_label[channels_to_filter[i+1]] + '_fft'
 
+    @journaled
     def fourier_filter_channels_V2(self, channels:Optional[list]=None) -> None:
         """This function applies the Fourier filter to all data in memory or specified channels
                 
@@ -3884,11 +4143,6 @@ class SnomMeasurement(FileHandler):
         phasedir_positive = 1
         phasedir_negative = -1
         phase_data = self.all_data[self.channels.index(channel)]
-        YRes = len(phase_data)
-        XRes = len(phase_data[0])
-        phase_positive = np.zeros((YRes, XRes))
-        phase_negative = np.zeros((YRes, XRes))
-        phase_no_correction = np.zeros((YRes, XRes))
         '''for y in range(0,YRes):
             for x in range(0,XRes):
                 xreal=x*self.XReal/XRes
@@ -3897,25 +4151,14 @@ class SnomMeasurement(FileHandler):
                 phase_no_correction[y][x] = phase_data[y][x]
                 phase_positive[y][x] = np.mod(phase_data[y][x] - phasedir_positive*(np.cos(-scanangle)*xreal + np.sin(-scanangle)*yreal)/wavelength*2*np.pi, 2*np.pi)
                 phase_negative[y][x] = np.mod(phase_data[y][x] - phasedir_negative*(np.cos(-scanangle)*xreal + np.sin(-scanangle)*yreal)/wavelength*2*np.pi, 2*np.pi)'''
-        xres, yres, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
-        xreal, yreal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
-        xyunit = self._get_channel_tag_dict_unit(channel, ChannelTags.XYUNIT)
         self.print_channel_tag_dict()
-        if xyunit == 'm':
-            xreal *= pow(10, 6)
-            yreal *= pow(10, 6)
-        else:
+        scan_coordinates = self._get_synccorr_scan_coordinates(channel, scanangle)
+        if scan_coordinates is None:
             sys.exit('In synccorrection preview unknown unit encountered!\nCan not proceed with synccorrection!')
-        for y in range(0,yres):
-            for x in range(0,xres):
-                # xreal=x*self.XReal/XRes
-                # yreal=y*self.YReal/YRes
-                xreal_mu=x*xreal/xres
-                yreal_mu=y*yreal/yres
-                #phase accumulated by movement of parabolic mirror only depends on 'x' direction
-                phase_no_correction[y][x] = phase_data[y][x]
-                phase_positive[y][x] = np.mod(phase_data[y][x] - phasedir_positive*(np.cos(-scanangle)*xreal_mu + np.sin(-scanangle)*yreal_mu)/wavelength*2*np.pi, 2*np.pi)
-                phase_negative[y][x] = np.mod(phase_data[y][x] - phasedir_negative*(np.cos(-scanangle)*xreal_mu + np.sin(-scanangle)*yreal_mu)/wavelength*2*np.pi, 2*np.pi)
+        #phase accumulated by movement of parabolic mirror only depends on 'x' direction
+        phase_no_correction = np.copy(phase_data)
+        phase_positive = np.mod(phase_data - phasedir_positive*scan_coordinates/wavelength*2*np.pi, 2*np.pi)
+        phase_negative = np.mod(phase_data - phasedir_negative*scan_coordinates/wavelength*2*np.pi, 2*np.pi)
         #create plots of the uncorrected and corrected images
         subplots = []
         subplots.append(self._add_subplot(phase_no_correction, channel))
@@ -3929,7 +4172,8 @@ class SnomMeasurement(FileHandler):
             phasedir = self._gen_from_input_phasedir()
             return phasedir
 
-    def synccorrection(self, wavelength:float, phasedir:Optional[int]=None) -> None:
+    @journaled
+    def synccorrection(self, wavelength:float, phasedir:Optional[int]=None, parallel:bool=False, max_workers:Optional[int]=None) -> None:
         """This function corrects all the phase channels for the linear phase gradient which stems from the synchronized measurement mode.
         The wavelength must be given in µm. The phasedir is either 1 or -1. If you are unshure about the direction just leave the parameter out.
         You will be shown a preview for both directions and then you must choose the correct one.
@@ -3940,6 +4184,8 @@ class SnomMeasurement(FileHandler):
         Args:
             wavelenght (float): please enter the wavelength in µm.
             phasedir (int, optional): the phase direction, leave out if not known and you will be prompted with a preview and can select the appropriate direction.
+            parallel (bool, optional): load and correct the channels concurrently. Defaults to False.
+            max_workers (int, optional): maximum number of threads if parallel is True. Defaults to None.
 
         """
         '''if self.autoscale == True:
@@ -3958,7 +4204,7 @@ class SnomMeasurement(FileHandler):
         self.autoscale = False
         # load new channels for synccorrection
         all_channels = self.phase_channels + self.amp_channels
-        self.initialize_channels(all_channels)
+        self.initialize_channels(all_channels, parallel=parallel, max_workers=max_workers)
         # try to get the scanangle from the channel tag dict of the first channel
         try:
             scanangle = self._get_channel_tag_dict_value(all_channels[0], ChannelTags.ROTATION)[0]*np.pi/180
@@ -3974,39 +4220,12 @@ class SnomMeasurement(FileHandler):
             phasedir = self._create_synccorr_preview(self.preview_phasechannel, wavelength, scanangle)
         self._write_to_logfile('synccorrection_wavelength', wavelength)
         self._write_to_logfile('synccorrection_phasedir', phasedir)
+        self._set_operation_argument('phasedir', phasedir)
         header, NUL = self._create_header(self.preview_phasechannel) # channel for header just important to distinguish z axis unit either m or nothing
-        for channel in self.phase_channels:
-            i = self.phase_channels.index(channel)
-            phasef = open(self.directory_name / Path(self.filename.name + f' {channel}_corrected.gsf'), 'bw')
-            realf = open(self.directory_name / Path(self.filename.name + f' {self.real_channels[i]}_corrected.gsf'), 'bw')
-            phasef.write(header.encode('utf-8'))
-            realf.write(header.encode('utf-8'))
-            phasef.write(NUL) # add NUL terminator
-            realf.write(NUL)
-            # get the resolution from the file header
-            xres, yres, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
-            xreal, yreal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
-            xyunit = self._get_channel_tag_dict_unit(channel, ChannelTags.XYUNIT)
-            if xyunit == 'm':
-                xreal *= pow(10, 6)
-                yreal *= pow(10, 6)
-            else:
-                print('In synccorrection encountered unknown unit type!')
-                return
-            for y in range(0,yres):
-                for x in range(0,xres):
-                    #convert pixel number to realspace coordinates in µm
-                    xreal_mu=x*xreal/xres
-                    yreal_mu=y*yreal/yres
-                    #open the phase, add pi to change the range from 0 to 2 pi and then substract the linear phase gradient, which depends on the scanangle!
-                    amppixval = self.all_data[self.channels.index(self.amp_channels[i])][y][x]
-                    phasepixval = self.all_data[self.channels.index(self.phase_channels[i])][y][x]
-                    phasepixval_corr = np.mod(phasepixval + np.pi - phasedir*(np.cos(-scanangle)*xreal_mu + np.sin(-scanangle)*yreal_mu)/wavelength*2*np.pi, 2*np.pi)
-                    realpixval = amppixval*np.cos(phasepixval_corr)
-                    phasef.write(pack("f",phasepixval_corr))
-                    realf.write(pack("f",realpixval))
-            phasef.close()
-            realf.close()
+        results = self._map_channels(partial(self._synccorrect_channel, wavelength=wavelength, scanangle=scanangle, phasedir=phasedir, header=header, NUL=NUL),
+                                     self.phase_channels, parallel=parallel, max_workers=max_workers)
+        if False in results:
+            print('In synccorrection encountered unknown unit type!')
         # reinitialize the old data
         self.channels = old_channels
         self.all_data = old_data
@@ -4016,6 +4235,61 @@ class SnomMeasurement(FileHandler):
         self.autoscale = old_autoscale
         gc.collect()
 
+    def _get_synccorr_scan_coordinates(self, channel:str, scanangle:float) -> Optional[np.ndarray]:
+        """Creates the real space coordinate of every pixel along the rotated scan direction in µm.
+        The linear phase gradient of the synchronized measurement mode is proportional to this coordinate.
+
+        Args:
+            channel (str): channel to get the resolution and scan area from
+            scanangle (float): scan rotation angle in rad
+
+        Returns:
+            np.ndarray: the coordinates with the shape of the channel data, None if the unit of the scan area is unknown
+        """
+        xres, yres, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
+        xreal, yreal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
+        xyunit = self._get_channel_tag_dict_unit(channel, ChannelTags.XYUNIT)
+        if xyunit == 'm':
+            xreal *= pow(10, 6)
+            yreal *= pow(10, 6)
+        else:
+            return None
+        #convert pixel number to realspace coordinates in µm
+        xreal_mu = np.arange(xres)*xreal/xres
+        yreal_mu = np.arange(yres)*yreal/yres
+        return np.cos(-scanangle)*xreal_mu[np.newaxis, :] + np.sin(-scanangle)*yreal_mu[:, np.newaxis]
+
+    def _synccorrect_channel(self, channel:str, wavelength:float, scanangle:float, phasedir:int, header:str, NUL:bytes) -> bool:
+        """Corrects one phase channel for the linear phase gradient and saves the corrected phase and the corresponding real part
+        to new .gsf files. Each file is written with a single call.
+
+        Args:
+            channel (str): the phase channel, the matching amplitude channel must also be in memory
+            wavelength (float): wavelength in µm
+            scanangle (float): scan rotation angle in rad
+            phasedir (int): the phase direction, either 1 or -1
+            header (str): header of the .gsf files
+            NUL (bytes): NUL padding after the header
+
+        Returns:
+            bool: False if the unit of the scan area is unknown, True otherwise
+        """
+        i = self.phase_channels.index(channel)
+        scan_coordinates = self._get_synccorr_scan_coordinates(channel, scanangle)
+        if scan_coordinates is None:
+            return False
+        amp_data = self.all_data[self.channels.index(self.amp_channels[i])]
+        phase_data = self.all_data[self.channels.index(channel)]
+        #add pi to change the range from 0 to 2 pi and then substract the linear phase gradient, which depends on the scanangle!
+        phase_corrected = np.mod(phase_data + np.pi - phasedir*scan_coordinates/wavelength*2*np.pi, 2*np.pi)
+        real_data = amp_data*np.cos(phase_corrected)
+        for filechannel, data in [(channel, phase_corrected), (self.real_channels[i], real_data)]:
+            with open(self.directory_name / Path(self.filename.name + f' {filechannel}_corrected.gsf'), 'bw') as file:
+                file.write(header.encode('utf-8'))
+                file.write(NUL) # add NUL terminator
+                file.write(np.asarray(data, dtype='<f4').tobytes())
+        return True
+
     def _gen_from_input_phasedir(self) -> int:
         """
         This function asks the user to input a phase direction, input must be either n or p, for negative or positive respectively.
@@ -4046,40 +4320,37 @@ class SnomMeasurement(FileHandler):
         """
         # check if coordinates are given, then we don't need to display the image
         if coords is None:
-            # let the user select 3 points until success or the users patience runs out
-            while True:
-                coords = self._get_klicker_coordinates(height_data, SNOM_height, "Click on three points to define the leveling plane and press 'Accept'.")
-                if len(coords) != 3:
-                    print('You need to specify 3 point coordinates! \nDo you want to try again?')
-                    user_input = self._user_input_bool()
-                    if user_input == False:
-                        return
-                else: break
+            coords = self._select_3point_coordinates(height_data)
+            if coords is None:
+                return
         elif len(coords) != 3:
             print('You need to specify 3 point coordinates! No leveling performed!')
             return 
         self._write_to_logfile('height_leveling_coordinates', coords)
         # for the 3 point coordinates the height data is calculated over a small area around the clicked pixels to reduce deviations due to noise
-        mean_values = [self._get_mean_value(height_data, coords[i][0], coords[i][1], zone) for i in range(len(coords))]
-        matrix = [[coords[i][0], coords[i][1], mean_values[i]] for i in range(3)]
-        A = matrix
-        b = [100,100,100] # not sure why, 100 is a bit random, but 0 didn't work
-        solution = np.linalg.solve(A, b)
-        yres = len(height_data)
-        xres = len(height_data[0])
-        # create a plane with same dimensions as the height_data
-        plane_data = np.zeros((yres, xres))
-        for y in range(yres):
-            for x in range(xres):
-                plane_data[y][x] = -(solution[0]*x + solution[1]*y)/solution[2]
-        leveled_height_data = np.zeros((yres, xres))
-        # substract the plane_data from the height_data
-        for y in range(yres):
-            for x in range(xres):
-                leveled_height_data[y][x] = height_data[y][x] - plane_data[y][x]
-        
-        return leveled_height_data
+        # the plane through the 3 points is subtracted from the height data
+        return leveling.level_three_points(height_data, coords, zone)
     
+    def _select_3point_coordinates(self, height_data:np.ndarray) -> list:
+        """Lets the user click on three points of the height data to define the leveling plane.
+
+        Args:
+            height_data (np.ndarray): the height data
+
+        Returns:
+            list: the three point coordinates or None if the user gave up
+        """
+        # let the user select 3 points until success or the users patience runs out
+        while True:
+            coords = self._get_klicker_coordinates(height_data, snom_colormaps.SNOM_height, "Click on three points to define the leveling plane and press 'Accept'.")
+            if len(coords) != 3:
+                print('You need to specify 3 point coordinates! \nDo you want to try again?')
+                user_input = self._user_input_bool()
+                if user_input == False:
+                    return None
+            else:
+                return coords
+
     def _level_height_data(self, height_data:np.ndarray, klick_coordinates:list, zone:int):
         """This function levels the height data with a 3 point leveling.
         The user has to click on three points to specify the underground plane.
@@ -4093,39 +4364,20 @@ class SnomMeasurement(FileHandler):
         Returns:
             np.ndarray: the leveled height data
         """
-
-        mean_values = [self._get_mean_value(height_data, klick_coordinates[i][0], klick_coordinates[i][1], zone) for i in range(len(klick_coordinates))]
-        matrix = [[klick_coordinates[i][0], klick_coordinates[i][1], mean_values[i]] for i in range(3)]
-        A = matrix
-        b = [100,100,100] # not sure why, 100 is a bit random, but 0 didn't work
-        solution = np.linalg.solve(A, b)
-        yres = len(height_data)
-        xres = len(height_data[0])
-        # create a plane with same dimensions as the height_data
-        plane_data = np.zeros((yres, xres))
-        for y in range(yres):
-            for x in range(xres):
-                plane_data[y][x] = -(solution[0]*x + solution[1]*y)/solution[2]
-        leveled_height_data = np.zeros((yres, xres))
-        # substract the plane_data from the height_data
-        for y in range(yres):
-            for x in range(xres):
-                leveled_height_data[y][x] = height_data[y][x] - plane_data[y][x]
-        
-        return leveled_height_data
+        return leveling.level_three_points(height_data, klick_coordinates, zone)
 
     def _height_levelling_3point_forGui(self, height_data, zone=1) -> np.ndarray:
-        klick_coordinates = self._get_klicker_coordinates(height_data, SNOM_height, '3 Point leveling: please click on three points\nto specify the underground plane.')
+        klick_coordinates = self._get_klicker_coordinates(height_data, snom_colormaps.SNOM_height, '3 Point leveling: please click on three points\nto specify the underground plane.')
         if len(klick_coordinates) != 3:
             print('You need to specify 3 point coordinates! Data was not leveled!')
             return height_data
         # for the 3 point coordinates the height data is calculated over a small area around the clicked pixels to reduce deviations due to noise
         self._write_to_logfile('height_leveling_coordinates', klick_coordinates)
-        return self._level_height_data(klick_coordinates, zone)
+        return self._level_height_data(height_data, klick_coordinates, zone)
 
     def _level_phase_slope(self, data:np.ndarray, slope:float) -> np.ndarray:
         """This function substracts a linear phase gradient in y direction from the specified phase data.
-        The data is then also shifted by 0 to ensure that the phase data is still in the range of 0 to 2pi.
+        The data is then also wrapped to ensure that the phase data is still in the range of 0 to 2pi. The data is changed in place and also returned.
 
         Args:
             data (np.ndarray): the phase data
@@ -4134,14 +4386,10 @@ class SnomMeasurement(FileHandler):
         Returns:
             np.ndarray: the leveled phase data
         """
-        yres = len(data)
-        xres = len(data[0])
-        for y in range(yres):
-            for x in range(xres):
-                data[y][x] -= y*slope
-        return self._shift_phase_data(data, 0)
+        return phase_analysis.level_phase_slope(data, slope, inplace=True)
 
     # todo this function needs work, should apply a linear fit instead of just comparing two values
+    @journaled
     def correct_phase_drift(self, channels:Optional[list]=None, export:bool=False, phase_slope:float=None, zone:int=1, point_based:bool=True) -> None:
         """This function asks the user to click on two points which should have the same phase value.
         Only the slow drift in y-direction will be compensated. Could in future be extended to include a percentual drift compensation along the x-direction.
@@ -4175,13 +4423,14 @@ class SnomMeasurement(FileHandler):
             if phase_slope != None:
                 #level all phase channels in memory...
                 self._write_to_logfile('phase_driftcomp_slope', phase_slope)
+                self._set_operation_argument('phase_slope', phase_slope)
                 for i in range(len(self.channels)):
                     if 'P' in self.channels[i]:
                         self.all_data[i] = self._level_phase_slope(self.all_data[i], phase_slope)
                         self.channels_label[i] += '_driftcomp'
             else:
                 '''fig, ax = plt.subplots()
-                img = ax.pcolormesh(phase_data, cmap=SNOM_phase)
+                img = ax.pcolormesh(phase_data, cmap=snom_colormaps.SNOM_phase)
                 klicker = clicker(ax, ["event"], markers=["x"])
                 ax.invert_yaxis()
                 divider = make_axes_locatable(ax)
@@ -4206,7 +4455,7 @@ class SnomMeasurement(FileHandler):
                         print('No phase drift corrected!')
                         return'''
                 while True:
-                    coordinates = self._get_klicker_coordinates(phase_data, SNOM_phase, "Phase leveling: please select two points\nto specify the phase drift.")
+                    coordinates = self._get_klicker_coordinates(phase_data, snom_colormaps.SNOM_phase, "Phase leveling: please select two points\nto specify the phase drift.")
                     if (coordinates is None) or (len(coordinates) != 2):
                         print('You must specify two points which should have the same phase, along the y-direction')
                         print('Do you want to try again?')
@@ -4235,7 +4484,7 @@ class SnomMeasurement(FileHandler):
                     phase_slope, intercept = np.polyfit(range(len(flattened_profile)), flattened_profile, 1)
                 leveled_phase_data = self._level_phase_slope(phase_data, phase_slope)
                 fig, ax = plt.subplots()
-                img = ax.pcolormesh(leveled_phase_data, cmap=SNOM_phase)
+                img = ax.pcolormesh(leveled_phase_data, cmap=snom_colormaps.SNOM_phase)
                 ax.invert_yaxis()
                 divider = make_axes_locatable(ax)
                 cax = divider.append_axes("right", size="5%", pad=0.05)
@@ -4263,6 +4512,7 @@ class SnomMeasurement(FileHandler):
                         return
         gc.collect()
 
+    @journaled
     def correct_phase_drift_nonlinear(self, channels:Optional[list]=None, reference_area:list = [None, None]) -> None:
         """This function corrects the phase drift in the y-direction by using a reference area across the full length of the scan.	
         The reference area is used to calculate the average phase value per row.
@@ -4297,24 +4547,17 @@ class SnomMeasurement(FileHandler):
             reference_area[1] = len(phase_data[0]) # right border
 
         # get the phase values per column of the reference area, then flatten each column 
-        flattened_phase_profiles = []
-        for j in range(reference_area[0], reference_area[1]):
-            reference_values = [phase_data[i][j] for i in range(len(phase_data))]
-            reference_values_flattened = phase_analysis.flatten_phase_profile(reference_values, 1)
-            # reference_values_flattened = np.unwrap(reference_values)
-            flattened_phase_profiles.append(reference_values_flattened)
+        flattened_phase_profiles = np.unwrap(np.asarray(phase_data)[:, reference_area[0]:reference_area[1]], axis=0)
 
         # average all flattened profiles
-        reference_values_flattened = np.mean(flattened_phase_profiles, axis=0)
+        reference_values_flattened = np.mean(np.ascontiguousarray(flattened_phase_profiles.T), axis=0)
 
         # remove the averaged reference data per line from the phase data
-        leveled_phase_data = np.copy(phase_data)
-        for i in range(len(phase_data)):
-            leveled_phase_data[i] = (leveled_phase_data[i] - reference_values_flattened[i] + np.pi) %(2*np.pi)
+        leveled_phase_data = phase_analysis.wrap_phase(phase_data - reference_values_flattened[:, np.newaxis] + np.pi, inplace=True)
 
         # display the leveled phase data
         fig, ax = plt.subplots()
-        img = ax.pcolormesh(leveled_phase_data, cmap=SNOM_phase)
+        img = ax.pcolormesh(leveled_phase_data, cmap=snom_colormaps.SNOM_phase)
         ax.invert_yaxis()
         divider = make_axes_locatable(ax)
         cax = divider.append_axes("right", size="10%", pad=0.05)
@@ -4331,16 +4574,18 @@ class SnomMeasurement(FileHandler):
         if user_input == True:
             # write to logfile
             self._write_to_logfile('phase_driftcomp_nonlinear_reference_area', reference_area)
+            self._set_operation_argument('reference_area', reference_area)
             # do the leveling for all channels but use always the same reference data, channels should only differ in phase offset
             for i in range(len(channels)):
                 if 'P' in channels[i]:
-                    self.all_data[self.channels.index(channels[i])] = np.array([(self.all_data[self.channels.index(channels[i])][j] - reference_values_flattened[j] + np.pi) %(2*np.pi) for j in range(len(reference_values_flattened))])
+                    self.all_data[self.channels.index(channels[i])] = phase_analysis.wrap_phase(self.all_data[self.channels.index(channels[i])] - reference_values_flattened[:, np.newaxis] + np.pi, inplace=True)
                     # also apply a phase shift to ensure that the phase is between 0 and 2pi
                     # for now take the average phase an shift it to pi/2 should be white on the colormap
                     phase_shift = np.pi/2 - np.mean(self.all_data[self.channels.index(channels[i])])
                     self.all_data[self.channels.index(channels[i])] = self._shift_phase_data(self.all_data[self.channels.index(channels[i])], phase_shift)
         gc.collect()
 
+    @journaled
     def match_phase_offset(self, channels:Optional[list]=None, reference_channel:str=None, reference_area=None, manual_width=5) -> None:
         """This function matches the phase offset of all phase channels in memory to the reference channel.
         The reference channel is the first phase channel in memory if not specified.
@@ -4369,7 +4614,7 @@ class SnomMeasurement(FileHandler):
         elif reference_area == 'manual':
             # use pointcklicker to get the reference area
             fig, ax = plt.subplots()
-            ax.pcolormesh(self.all_data[self.channels.index(reference_channel)], cmap=SNOM_phase)
+            ax.pcolormesh(self.all_data[self.channels.index(reference_channel)], cmap=snom_colormaps.SNOM_phase)
             klicker = clicker(ax, ["event"], markers=["x"])
             ax.legend()
             ax.axis('scaled')
@@ -4396,7 +4641,7 @@ class SnomMeasurement(FileHandler):
         
         # display the reference area
         fig, ax = plt.subplots()
-        img = ax.pcolormesh(reference_data, cmap=SNOM_phase)
+        img = ax.pcolormesh(reference_data, cmap=snom_colormaps.SNOM_phase)
         divider = make_axes_locatable(ax)
         cax = divider.append_axes("right", size="5%", pad=0.05)
         cbar = plt.colorbar(img, cax=cax)
@@ -4417,8 +4662,11 @@ class SnomMeasurement(FileHandler):
                 phase_offset = np.mean([phase_data[i][reference_area[0][0]:reference_area[0][1]] for i in range(reference_area[1][0], reference_area[1][1])]) - reference_phase
                 self.all_data[self.channels.index(channel)] = self._shift_phase_data(phase_data, -phase_offset)
         self._write_to_logfile('match_phase_offset_reference_area', reference_area)
+        self._set_operation_argument('reference_channel', reference_channel)
+        self._set_operation_argument('reference_area', reference_area)
         gc.collect()
 
+    @journaled
     def correct_amplitude_drift_nonlinear(self, channels:Optional[list]=None, reference_area:list = [None, None]) -> None:
         """This function corrects the amplitude drift in the y-direction by using a reference area across the full length of the scan.	
         The reference area is used to calculate the average amplitude value per row.
@@ -4462,8 +4710,8 @@ class SnomMeasurement(FileHandler):
         
         # display the original data besides the leveled amplitude data
         fig, ax = plt.subplots(1, 2)
-        img1 = ax[0].pcolormesh(amplitude_data, cmap=SNOM_amplitude)
-        img2 = ax[1].pcolormesh(leveled_amplitude_data, cmap=SNOM_amplitude)
+        img1 = ax[0].pcolormesh(amplitude_data, cmap=snom_colormaps.SNOM_amplitude)
+        img2 = ax[1].pcolormesh(leveled_amplitude_data, cmap=snom_colormaps.SNOM_amplitude)
         ax[0].invert_yaxis()
         ax[1].invert_yaxis()
         divider = make_axes_locatable(ax[0])
@@ -4508,6 +4756,7 @@ class SnomMeasurement(FileHandler):
                 return
         gc.collect()
 
+    @journaled
     def correct_height_drift_nonlinear(self, channels:Optional[list]=None, reference_area:list = [None, None]) -> None:
         """This function corrects the height drift in the y-direction by using a reference area across the full length of the scan.	
         The reference area is used to calculate the average height value per row.
@@ -4553,8 +4802,8 @@ class SnomMeasurement(FileHandler):
         
         # display the original data besides the leveled height data
         fig, ax = plt.subplots(1, 2)
-        img1 = ax[0].pcolormesh(height_data, cmap=SNOM_height)
-        img2 = ax[1].pcolormesh(leveled_height_data, cmap=SNOM_height)
+        img1 = ax[0].pcolormesh(height_data, cmap=snom_colormaps.SNOM_height)
+        img2 = ax[1].pcolormesh(leveled_height_data, cmap=snom_colormaps.SNOM_height)
         ax[0].invert_yaxis()
         ax[1].invert_yaxis()
         divider = make_axes_locatable(ax[0])
@@ -4599,24 +4848,91 @@ class SnomMeasurement(FileHandler):
                 return
         gc.collect()
 
-    def level_height_channels_3point(self, channels:Optional[list]=None, coords:list=None) -> None:
+    @journaled
+    def level_height_channels_3point(self, channels:Optional[list]=None, coords:Optional[list | dict]=None) -> None:
         """This function levels all height channels which are either user specified or in the instance memory.
         The leveling will prompt the user with a preview to select 3 points for getting the coordinates of the leveling plane.
         
         Args:
             channels (list, optional): List of channels to level. If not specified all channels in memory will be used. Defaults to None.
-            coords (list, optional): List of coordinates to use for the leveling. If not specified the user will be prompted to click on the points. Defaults to None.
+            coords (list or dict, optional): List of coordinates to use for the leveling of all channels, or a dict channel -> list of coordinates
+                to level each channel with its own points, channels which are not in the dict are not leveled.
+                If not specified the user will be prompted to click on the points for each channel. Defaults to None.
         """
         if channels is None:
             channels = self.channels
-        for channel in channels:
-            if channel in self.channels and self.height_indicator in channel:
-                leveled_data = self._height_levelling_3point(self.all_data[self.channels.index(channel)], coords)
-                if leveled_data is None:
-                    print('No leveling performed!')
-                else:
+        height_channels = [channel for channel in channels if channel in self.channels and self.height_indicator in channel]
+        if isinstance(coords, dict):
+            # the points selected for each channel, e.g. when an interactive leveling is replayed
+            for channel in height_channels:
+                if channel not in coords:
+                    continue
+                leveled_data = self._height_levelling_3point(self.all_data[self.channels.index(channel)], coords[channel])
+                if leveled_data is not None:
                     self.all_data[self.channels.index(channel)] = leveled_data
-                    self.channels_label[self.channels.index(channel)] += '_leveled' 
+                    self.channels_label[self.channels.index(channel)] += '_leveled'
+            gc.collect()
+            return
+        if coords is not None:
+            if len(coords) != 3:
+                print('You need to specify 3 point coordinates! No leveling performed!')
+                return
+            # with known coordinates all height channels are leveled at once
+            self._write_to_logfile('height_leveling_coordinates', coords)
+            self._apply_to_channels(height_channels, partial(leveling.level_three_points, coords=coords), stack=True)
+            for channel in height_channels:
+                self.channels_label[self.channels.index(channel)] += '_leveled'
+            return
+        # the user selects the points for each channel, they are recorded per channel so a replay levels the same channels with the same points
+        selected_coords = {}
+        for channel in height_channels:
+            height_data = self.all_data[self.channels.index(channel)]
+            channel_coords = self._select_3point_coordinates(height_data)
+            if channel_coords is None:
+                print('No leveling performed!')
+                continue
+            self.all_data[self.channels.index(channel)] = self._height_levelling_3point(height_data, channel_coords)
+            self.channels_label[self.channels.index(channel)] += '_leveled'
+            selected_coords[channel] = channel_coords
+        self._set_operation_argument('coords', selected_coords)
+        gc.collect()
+
+    @journaled
+    def level_height_channels(self, channels:Optional[list]=None, order:int=1, fit_area:str='all') -> None:
+        """This function removes the background of all height channels which are either user specified or in the instance memory,
+        without any user interaction. The background is a least squares fit of a 2D polynomial, order 1 removes a plane.
+        All height channels with the same size are fitted at once.
+        The fit can be restricted to the mask of heigth_mask_channels() or cut_channels(), e.g. to fit only the substrate.
+
+        Args:
+            channels (list, optional): List of channels to level. If not specified all channels in memory will be used. Defaults to None.
+            order (int, optional): Order of the polynomial, 0 removes the mean, 1 a plane and 2 a quadratic background. Defaults to 1.
+            fit_area (str, optional): 'all' uses all pixels for the fit, 'mask' only the pixels inside of the mask and
+                'inverted_mask' only the pixels outside of the mask. Defaults to 'all'.
+        """
+        if channels is None:
+            channels = self.channels
+        height_channels = [channel for channel in channels if channel in self.channels and self.height_indicator in channel]
+        if fit_area == 'all':
+            mask = None
+        elif fit_area in ['mask', 'inverted_mask']:
+            if len(self.mask_array) == 0:
+                print('There is no mask, please create one with heigth_mask_channels() first! No leveling performed!')
+                return
+            mask = np.asarray(self.mask_array) != 0
+            if fit_area == 'inverted_mask':
+                mask = ~mask
+            for channel in height_channels:
+                if np.shape(self.all_data[self.channels.index(channel)]) != mask.shape:
+                    print(f'The mask does not have the same size as channel {channel}! No leveling performed!')
+                    return
+        else:
+            print(f'Unknown fit area {fit_area}, use one of ["all", "mask", "inverted_mask"]! No leveling performed!')
+            return
+        self._write_to_logfile('height_leveling_polynomial', [order, fit_area])
+        self._apply_to_channels(height_channels, partial(leveling.level_polynomial, order=order, mask=mask), stack=True)
+        for channel in height_channels:
+            self.channels_label[self.channels.index(channel)] += '_leveled'
         gc.collect()
 
     def level_height_channels_forGui(self, channels:Optional[list]=None):# todo not used?
@@ -4637,15 +4953,12 @@ class SnomMeasurement(FileHandler):
 
     def _shift_phase_data(self, data, shift) -> np.ndarray:
         """This function adds a phaseshift to the specified phase data. The phase data is automatically kept in the 0 to 2 pi range.
+        The data is changed in place and also returned.
         Could in future be extended to show a live view of the phase data while it can be modified by a slider...
         e.g. by shifting the colorscale in the preview rather than the actual data..."""
-        yres = len(data)
-        xres = len(data[0])
-        for y in range(yres):
-            for x in range(xres):
-                data[y][x] = (data[y][x] + shift) % (2*np.pi)
-        return data
+        return phase_analysis.shift_phase(data, shift, inplace=True)
 
+    @journaled
     def shift_phase(self, shift:float=None, channels:Optional[list]=None) -> None:
         """This function will prompt the user with a preview of the first phase channel in memory.
         Under the preview is a slider, by changing the slider value the phase preview will shift accordingly.
@@ -4679,19 +4992,12 @@ class SnomMeasurement(FileHandler):
 
         # export shift value to logfile
         self._write_to_logfile('phase_shift', shift)
+        self._set_operation_argument('shift', shift)
         # shift all phase channels in memory
         # could also be implemented to shift each channel individually...
         
-        for channel in channels:
-            # print(channel)
-            if self.phase_indicator in channel:
-                # print('Before phase shift: ', channel)
-                # print('Min phase value:', np.min(self.all_data[self.channels.index(channel)]))
-                # print('Max phase value:', np.max(self.all_data[self.channels.index(channel)]))
-                self.all_data[self.channels.index(channel)] = self._shift_phase_data(self.all_data[self.channels.index(channel)], shift)
-                # print('After phase shift: ', channel)
-                # print('Min phase value:', np.min(self.all_data[self.channels.index(channel)]))
-                # print('Max phase value:', np.max(self.all_data[self.channels.index(channel)]))
+        phase_channels = [channel for channel in channels if self.phase_indicator in channel]
+        self._apply_to_channels(phase_channels, partial(self._shift_phase_data, shift=shift))
         gc.collect()
 
     def _fit_horizontal_wg(self, data):
@@ -4715,74 +5021,58 @@ class SnomMeasurement(FileHandler):
             p0 = coeff #set the starting parameters for the next fit
         return align_points, list_of_coefficients
 
-    def _shift_data(self, data, axis, shifts) -> np.ndarray:
-        # if shifts are not int round them
-        if not all(isinstance(n, int) for n in shifts):
-            shifts = [round(element) for element in shifts]
-        YRes = len(data)
-        XRes = len(data[0])
-        min_shift = round(min(shifts))
-        max_shift = round(max(shifts))
-        if axis == 1:
-            new_YRes = YRes + int(abs(min_shift-max_shift))
-            data_shifted = np.zeros((new_YRes, XRes))
-            #create the realigned height
-            for x in range(XRes):
-                shift = int(-shifts[x] + abs(max_shift)) #the calculated shift has to be compensated by shifting the pixels
-                # shift = round(-shifts[x] + abs(max_shift)) #the calculated shift has to be compensated by shifting the pixels
-                for y in range(YRes):
-                    data_shifted[y + shift][x] = data[y][x]
-        elif axis == 0:
-            YRes = len(data)
-            XRes = len(data[0])
-            min_shift = round(min(shifts))
-            max_shift = round(max(shifts))
-            new_XRes = XRes + int(abs(min_shift-max_shift))
-            data_shifted = np.zeros((YRes, new_XRes))
-            #create the realigned height
-            for y in range(YRes):
-                shift = int(-shifts[y] + abs(max_shift))
-                # shift = round(-shifts[y] + abs(max_shift))
-                for x in range(XRes):
-                    data_shifted[y][x + shift] = data[y][x]
-        return data_shifted
-
-    def _get_mean_from_area(self, data, axis=1, threshold=0.5):
+    def _shift_data(self, data, axis, shifts, subpixel:bool=False) -> np.ndarray:
+        """Shifts every line of the data to compensate the given shifts. The data is enlarged to fit all shifted lines, new pixels are set to zero.
+
+        Args:
+            data (np.ndarray): data of a single channel (y, x) or a stack of channels with identical size (channel, y, x)
+            axis (int): 1 if the shifts belong to the columns and the data is shifted along y, 0 if the shifts belong to the rows.
+            shifts (np.ndarray): shift for each column or row
+            subpixel (bool, optional): apply fractional shifts with linear interpolation instead of rounding them. Defaults to False.
+
+        Returns:
+            np.ndarray: the shifted data
+        """
+        shifts = np.asarray(shifts, dtype=float)
+        if not subpixel:
+            shifts = np.round(shifts)
+        # move the shifted lines to the first and the shift direction to the second axis, channels are kept as last axis
+        source = [-1, -2] if axis == 1 else [-2, -1]
+        lines = np.moveaxis(np.asarray(data), source, [0, 1])
+        # the calculated shift has to be compensated by shifting the pixels
+        shifted_lines = realign.shift_lines(lines, -shifts, axis=1)
+        return np.moveaxis(shifted_lines, [0, 1], source)
+
+    def _get_mean_from_area(self, data, axis=1, threshold=0.5, parallel:bool=False, max_workers:Optional[int]=None):
         """This function calculates the mean index of an array along a specified axis.
         The mean index is calculated by setting all values below a certain threshold to zero.
+        All columns or rows are evaluated at once, for very wide scans they can be split between multiple threads.
 
         Args:
             data (np.ndarray): 2d array of data.
             axis (int): The axis along which the mean index should be calculated. 0 means x-axis, 1 means y-axis. Defaults to 1.
             threshold (float, optional): threshold, all values below will be set to zero to better estimate the mean index position. Defaults to 0.5.
+            parallel (bool, optional): split the columns or rows between multiple threads. Defaults to False.
+            max_workers (int, optional): maximum number of threads used if parallel is True. Defaults to None.
 
         Returns:
             float: np.ndarray of the mean position indices.
         """
+        # each row of the profiles is one column (axis=1) or row (axis=0) of the data
+        profiles = np.asarray(data, dtype=np.float64)
         if axis == 1:
-            res = len(data[0])
-            sliced_data = [data[:,i] for i in range(res)]
-        elif axis == 0:
-            res = len(data)
-            sliced_data = [data[i] for i in range(res)]
-        #just calculate the shift for each pixel column for now
-        # number_align_points = XRes
-        shifts = np.zeros(res)
-        for i in range(res):
-            max_val = np.max(sliced_data[i])
-            # set all values below threshold to zero
-            sliced_data[i] = np.where(sliced_data[i] < threshold*max_val, 0, sliced_data[i])
-            mean_index = mean_index_array(sliced_data[i])
-            # plot the column data
-            # if i%100 == 0:
-            #     print('mean index:', mean_index)
-            #     plt.plot(column_data)
-            #     plt.vlines(mean_index, ymin=min(column_data), ymax=max(column_data), color='red')
-            #     plt.show()
-            shifts[i] = mean_index
-        return shifts
-
-    def realign(self, channels:Optional[list]=None, bounds:Optional[list]=None, axis=1, threshold=0.5):
+            profiles = profiles.T
+        max_values = np.max(profiles, axis=1, keepdims=True)
+        # set all values below threshold to zero
+        profiles = np.where(profiles < threshold*max_values, 0, profiles)
+        if parallel and len(profiles) > 1:
+            n_chunks = min(len(profiles), max_workers or os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return np.concatenate(list(executor.map(mean_index_arrays, np.array_split(profiles, n_chunks))))
+        return mean_index_arrays(profiles)
+
+    @journaled
+    def realign(self, channels:Optional[list]=None, bounds:Optional[list]=None, axis=1, threshold=0.5, subpixel:bool=False, parallel:bool=False, max_workers:Optional[int]=None):
         """This function corrects the drift of the piezo motor. As of now it needs a reference region of the sample which is assumed to be straight.
         In the future this could be implemented with a general map containing the distortion created by the piezo motor, if it turns out to be temporally constant...
         Anyways, you will be prompted with a preview of the height data, please select an area of the scan with only one 'straight' reference. 
@@ -4796,6 +5086,9 @@ class SnomMeasurement(FileHandler):
                 Should be specified like this: [lower_bound, upper_bound] in px.
             axis (int): The axis along which the mean index should be calculated. 0 means x-axis, 1 means y-axis. Defaults to 1.
             threshold (float, optional): threshold, all values below will be set to zero to better estimate the mean index position. Defaults to 0.5.
+            subpixel (bool, optional): apply the fractional shifts with linear interpolation instead of rounding them to full pixels. Defaults to False.
+            parallel (bool, optional): split the calculation of the mean indices between multiple threads, useful for very wide scans. Defaults to False.
+            max_workers (int, optional): maximum number of threads used if parallel is True. Defaults to None.
         
         """
         self.initialize_channels(channels)
@@ -4817,6 +5110,7 @@ class SnomMeasurement(FileHandler):
             lower = bounds[0]
             upper = bounds[1]
         self._write_to_logfile('realign_axis_bounds', [axis, [lower, upper]])
+        self._set_operation_argument('bounds', [lower, upper])
         if self.height_channel in self.channels:
             height_data = self.all_data[self.channels.index(self.height_channel)]
         else:
@@ -4825,28 +5119,25 @@ class SnomMeasurement(FileHandler):
             # if the channels have been scaled, the height has to be scaled as well
             scaling = self._get_channel_scaling(0)
             if scaling != 1:
-                height_data = self._scale_array(height_data, self.height_channel, scaling)
+                height_data = self._scale_array(height_data, scaling)
         YRes = len(height_data)
         XRes = len(height_data[0])
+        # copy the reference area, parts of the selection outside of the data stay zero
         if axis == 1:
             reduced_height_data = np.zeros((upper-lower +1,XRes))
-            for y in range(YRes):
-                if (lower <= y) and (y <= upper):
-                    for x in range(XRes):
-                        reduced_height_data[y-lower][x] = height_data[y][x]
+            reference_area = np.asarray(height_data)[lower:upper+1]
+            reduced_height_data[:len(reference_area)] = reference_area
         elif axis == 0:
             reduced_height_data = np.zeros((YRes, upper-lower +1))
-            for y in range(YRes):
-                for x in range(XRes):
-                    if (lower <= x) and (x <= upper):
-                        reduced_height_data[y][x-lower] = height_data[y][x]
-        shifts = self._get_mean_from_area(reduced_height_data, axis, threshold)
+            reference_area = np.asarray(height_data)[:, lower:upper+1]
+            reduced_height_data[:, :reference_area.shape[1]] = reference_area
+        shifts = self._get_mean_from_area(reduced_height_data, axis, threshold, parallel, max_workers)
 
         # plot 
         fig, axs = plt.subplots()    
         fig.set_figheight(self.figsizey)
         fig.set_figwidth(self.figsizex) 
-        cmap = SNOM_height
+        cmap = snom_colormaps.SNOM_height
         img = axs.pcolormesh(height_data, cmap=cmap)
         # axs.invert_yaxis()
         divider = make_axes_locatable(axs)
@@ -4865,17 +5156,16 @@ class SnomMeasurement(FileHandler):
         plt.show()
 
         # reinitialize the instance data to fit the new bigger arrays
-        min_shift = round(min(shifts))
-        max_shift = round(max(shifts))
-        new_YRes = YRes + int(abs(min_shift-max_shift))
         all_data = self.all_data
-        self.all_data = []
+        if len({(np.shape(data), np.asarray(data).dtype) for data in all_data}) == 1:
+            # all channels have the same size and type, shift them as one stack
+            self.all_data = self._create_channel_data(list(self._shift_data(np.array(all_data), axis, shifts, subpixel)))
+        else:
+            self.all_data = self._create_channel_data([self._shift_data(data, axis, shifts, subpixel) for data in all_data])
         for i in range(len(self.channels)):
-            shifted_data = self._shift_data(all_data[i], axis, shifts)
-            
-            self.all_data.append(shifted_data)
             self.channels_label[i] += '_shifted'
             # adjust the scan area and pixel area
+            new_YRes, new_XRes = self.all_data[i].shape
             if axis == 1:
                 xres, yres, *args = self._get_channel_tag_dict_value(self.channels[i], ChannelTags.PIXELAREA)
                 yres_new = new_YRes
@@ -4886,14 +5176,15 @@ class SnomMeasurement(FileHandler):
                 self._set_channel_tag_dict_value(self.channels[i], ChannelTags.SCANAREA, [xreal, yreal_new, *args])
             elif axis == 0:
                 xres, yres, *args = self._get_channel_tag_dict_value(self.channels[i], ChannelTags.PIXELAREA)
-                xres_new = new_YRes
+                xres_new = new_XRes
                 self._set_channel_tag_dict_value(self.channels[i], ChannelTags.PIXELAREA, [xres_new, yres, *args])
                 xreal, yreal, *args = self._get_channel_tag_dict_value(self.channels[i], ChannelTags.SCANAREA)
                 xreal_new = xres_new*xreal/xres
                 self._set_channel_tag_dict_value(self.channels[i], ChannelTags.SCANAREA, [xreal_new, yreal, *args])
         gc.collect()
 
-    def overlay_forward_and_backward_channels(self, height_channel_forward:str, height_channel_backward:str, channels:Optional[list]=None):
+    @journaled
+    def overlay_forward_and_backward_channels(self, height_channel_forward:str, height_channel_backward:str, channels:Optional[list]=None, per_row:bool=False, subpixel:bool=False):
         """This function is ment to overlay the backwards and forwards version of the specified channels.
         The function will create a mean version which can then be displayed and saved. Note that the new version will be larger then the previous ones.
         Also make shure to use leveled data if you want to apply to height data.
@@ -4909,11 +5200,14 @@ class SnomMeasurement(FileHandler):
             height_channel_forward (str): usual corrected height channel
             height_channel_backward (str): backwards height channel
             channels (list, optional): a list of all channels to be overlain. Defaults to None.
+            per_row (bool, optional): align each row individually instead of using one shift for the whole image. Defaults to False.
+            subpixel (bool, optional): allow fractional shifts, the backward channels are then interpolated linearly. Defaults to False.
         """
         all_channels = []
         for channel in channels:
             all_channels.extend([channel, self.backwards_indicator + channel])
-        all_channels.extend([height_channel_forward, height_channel_backward])
+        if height_channel_forward not in channels:
+            all_channels.extend([height_channel_forward, height_channel_backward])
         self.initialize_channels(all_channels)
 
         self.set_min_to_zero([height_channel_forward, height_channel_backward])
@@ -4944,84 +5238,51 @@ class SnomMeasurement(FileHandler):
         plt.show()
         '''
 
-        # try to optimize by shifting second array and minimizing mean deviation
+        # limit the search range of the shift
         pixel_scaling = self._get_channel_tag_dict_value(self.channels[0], ChannelTags.PIXELSCALING)[0]
         N = 5*pixel_scaling #maximum iterations, scaled if pixelnumber was increased
 
         # realign.minimize_deviation_1d(array_1, array_2, n_tries=N)
         # realign.Minimize_Deviation_2D(height_data_forward, height_data_backward, n_tries=N)
 
-        # get the index which minimized the deviation of the height channels
-        # index = realign.Minimize_Deviation_2D(height_data_forward, height_data_backward, N, False)
-        index = realign.minimize_deviation_2d(height_channel_forward_blurr, height_channel_backward_blurr, N, False)
-        # self.all_data[self.channels.index(height_channel_forward)], self.all_data[self.channels.index(height_channel_backward)] = realign.Shift_Array_2D_by_Index(height_data_forward, height_data_backward, index)
-
+        # get the shift which maximizes the cross correlation of the height channels, all rows are correlated at once
+        index = realign.estimate_shift_fft(height_channel_forward_blurr, height_channel_backward_blurr, N, per_row, subpixel)
 
         for channel in channels:
             if self.backwards_indicator not in channel:
-                #test:
-                if self.height_indicator in channel:
-                    # get current res and size and add the additional res and size due to addition of zeros while shifting
-                    XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
-                    XReal, YReal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
-                    XRes_new = XRes + abs(index)# absolute value? index can be negative, but resolution can only increase, same for real dimensions
-                    XReal_new = XReal + XReal/XRes*abs(index)
-                    
-                    # create channel_dict for new mean data 
-                    self.channel_tag_dict.append(self.channel_tag_dict[self.channels.index(channel)])
+                forward_index = self.channels.index(channel)
+                backward_index = self.channels.index(self.backwards_indicator + channel)
+                # shift the data of the forward and backwards channel to match and create the mean data
+                forward_data, backward_data, mean_data = realign.overlay_shifted_arrays(self.all_data[forward_index], self.all_data[backward_index], index)
 
-                    # also create data dict entry
-                    self.channels_label.append(self.channels_label[self.channels.index(channel)] + '_overlain')
-
-                    # add new channel to channels
-                    self.channels.append(channel + '_overlain')
-
-                    self._set_channel_tag_dict_value(channel + '_overlain', ChannelTags.PIXELAREA, [XRes_new, YRes])
-                    self._set_channel_tag_dict_value(channel + '_overlain', ChannelTags.SCANAREA, [XReal_new, YReal])
-
-                    #test realign (per scan) based on minimization of differences 
-                    #not usable right now, drift compensation might lead to differently sized data
-                    # self.all_data[self.channels.index(height_channel_forward)] = realign.Minimize_Drift(self.all_data[self.channels.index(height_channel_forward)], display=False)
-                    # self.all_data[self.channels.index(height_channel_backward)] = realign.Minimize_Drift(self.all_data[self.channels.index(height_channel_backward)])
-
-                    # shift the data of the forward and backwards channel to match
-                    self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)] = realign.Shift_Array_2D_by_Index(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)], index)
-        
-
-                    # create mean data and append to all_data
-                    self.all_data.append(realign.Create_Mean_Array(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)]))
-                else:
-                    # get current res and size and add the additional res and size due to addition of zeros while shifting
-                    XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
-                    XReal, YReal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
-                    XRes_new = XRes + abs(index)# absolute value? index can be negative, but resolution can only increase, same for real dimensions
-                    XReal_new = XReal + XReal/XRes*abs(index)
-                    
-                    # create channel_dict for new mean data 
-                    self.channel_tag_dict.append(self.channel_tag_dict[self.channels.index(channel)])
-
-                    # also create data dict entry
-                    self.channels_label.append(self.channels_label[self.channels.index(channel)] + '_overlain')
+                # get current res and size and add the additional res and size due to addition of zeros while shifting
+                XRes, YRes, *args = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
+                XReal, YReal, *args = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
+                added_pixels = len(mean_data[0]) - len(self.all_data[forward_index][0]) # the resolution can only increase, no matter in which direction the data is shifted
+                XRes_new = XRes + added_pixels
+                XReal_new = XReal + XReal/XRes*added_pixels
+                
+                # create channel_dict for new mean data 
+                self.channel_tag_dict.append(self.channel_tag_dict[forward_index])
 
-                    # add new channel to channels
-                    self.channels.append(channel + '_overlain')
-                    
-                    self._set_channel_tag_dict_value(channel + '_overlain', ChannelTags.PIXELAREA, [XRes_new, YRes])
-                    self._set_channel_tag_dict_value(channel + '_overlain', ChannelTags.SCANAREA, [XReal_new, YReal])
+                # also create data dict entry
+                self.channels_label.append(self.channels_label[forward_index] + '_overlain')
 
-                    #test realign (per scan) based on minimization of differences 
-                    # self.all_data[self.channels.index(channel)] = realign.Minimize_Drift(self.all_data[self.channels.index(channel)], display=False)
-                    # self.all_data[self.channels.index(self.backwards_indicator+ channel)] = realign.Minimize_Drift(self.all_data[self.channels.index(self.backwards_indicator+ channel)])
+                # add new channel to channels
+                self.channels.append(channel + '_overlain')
 
-                    # shift the data of the forward and backwards channel to match
-                    self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)] = realign.Shift_Array_2D_by_Index(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)], index)
+                self._set_channel_tag_dict_value(channel + '_overlain', ChannelTags.PIXELAREA, [XRes_new, YRes])
+                self._set_channel_tag_dict_value(channel + '_overlain', ChannelTags.SCANAREA, [XReal_new, YReal])
 
-                    # create mean data and append to all_data
-                    self.all_data.append(realign.create_mean_array(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)]))
+                # replace the forward and backward data with the shifted versions and append the mean data to all_data
+                self.all_data[forward_index] = forward_data
+                self.all_data[backward_index] = backward_data
+                self.all_data.append(mean_data)
 
         gc.collect()
 
-    def overlay_forward_and_backward_channels_v2(self, height_channel_forward:str, height_channel_backward:str, channels:Optional[list]=None):
+    @journaled
+    def overlay_forward_and_backward_channels_v2(self, height_channel_forward:str, height_channel_backward:str, channels:Optional[list]=None, per_row:bool=False, subpixel:bool=False):
         """
         Caution! This variant is ment to keep the scan size identical!
 
@@ -5033,6 +5294,8 @@ class SnomMeasurement(FileHandler):
             height_channel_forward (str): Usual corrected height channel
             height_channel_backward (str): Backwards height channel
             channels (list, optional): List of all channels to be overlain. Only specify the forward direction. Defaults to None. If not specified only the amp channels and the height channel will be overlain.
+            per_row (bool, optional): align each row individually instead of using one shift for the whole image. Defaults to False.
+            subpixel (bool, optional): allow fractional shifts, the backward channels are then interpolated linearly. Defaults to False.
         """
         if channels is None:
             channels = [channel for channel in self.amp_channels if self.backwards_indicator not in channel]
@@ -5055,41 +5318,30 @@ class SnomMeasurement(FileHandler):
         height_channel_forward_blurr = self._gauss_blurr_data(height_data_forward, 2)
         height_channel_backward_blurr = self._gauss_blurr_data(height_data_backward, 2)
 
-        # try to optimize by shifting second array and minimizing mean deviation
+        # limit the search range of the shift
         pixel_scaling = self._get_channel_tag_dict_value(self.channels[0], ChannelTags.PIXELSCALING)[0]
         N = 5*pixel_scaling #maximum iterations, scaled if pixelnumber was increased
 
-        # get the index which minimized the deviation of the height channels
-        index = realign.minimize_deviation_2d(height_channel_forward_blurr, height_channel_backward_blurr, N, False)
+        # get the shift which maximizes the cross correlation of the height channels, all rows are correlated at once
+        index = realign.estimate_shift_fft(height_channel_forward_blurr, height_channel_backward_blurr, N, per_row, subpixel)
 
         for channel in channels:
             if self.backwards_indicator not in channel:
-                if self.height_indicator in channel:
-                    # create channel_dict for new mean data 
-                    self.channel_tag_dict.append(self.channel_tag_dict[self.channels.index(channel)])
-
-                    # also create data dict entry
-                    self.channels_label.append(self.channels_label[self.channels.index(channel)] + '_overlain')
-
-                    # add new channel to channels
-                    self.channels.append(channel + '_overlain')
-        
-                    # create mean data and append to all_data
-                    self.all_data.append(realign.create_mean_array_v2(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)], index))
-                else:
-                    # create channel_dict for new mean data 
-                    self.channel_tag_dict.append(self.channel_tag_dict[self.channels.index(channel)])
+                # create channel_dict for new mean data 
+                self.channel_tag_dict.append(self.channel_tag_dict[self.channels.index(channel)])
 
-                    # also create data dict entry
-                    self.channels_label.append(self.channels_label[self.channels.index(channel)] + '_overlain')
+                # also create data dict entry
+                self.channels_label.append(self.channels_label[self.channels.index(channel)] + '_overlain')
 
-                    # add new channel to channels
-                    self.channels.append(channel + '_overlain')
-                    
-                    # create mean data and append to all_data
-                    self.all_data.append(realign.create_mean_array_v2(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)], index))
+                # add new channel to channels
+                self.channels.append(channel + '_overlain')
+    
+                # create mean data of the overlapping part and append to all_data
+                forward_data, backward_data, mean_data = realign.overlay_shifted_arrays(self.all_data[self.channels.index(channel)], self.all_data[self.channels.index(self.backwards_indicator+ channel)], index, keep_size=True)
+                self.all_data.append(mean_data)
         gc.collect()
 
+    @journaled
     def manually_create_complex_channel(self, amp_channel:str, phase_channel:str, complex_type:Optional[str]=None) -> None:
         """This function will manually create a realpart channel depending on the amp and phase channel you give.
         The channels don't have to be in memory. If they are not they will be loaded but not added to memory, only the realpart will be added.
@@ -5134,12 +5386,10 @@ class SnomMeasurement(FileHandler):
             sys.exit('The data of the specified channels has different resolution!')
         
         # create complex data:
-        real_data = np.zeros((yres_amp, xres_amp))
-        imag_data = np.zeros((yres_amp, xres_amp))
-        for y in range(yres_amp):
-            for x in range(xres_amp):
-                real_data[y][x] = amp_data[y][x]*np.cos(phase_data[y][x])
-                imag_data[y][x] = amp_data[y][x]*np.sin(phase_data[y][x])
+        amp_data = np.asarray(amp_data)
+        phase_data = np.asarray(phase_data)
+        real_data = (amp_data*np.cos(phase_data)).astype(self.dtype, copy=False)
+        imag_data = (amp_data*np.sin(phase_data)).astype(self.dtype, copy=False)
         # create realpart and imaginary part channel and dict and add to memory
         real_channel = f'O{savefile_demod}' + self.real_indicator
         imag_channel = f'O{savefile_demod}' + self.imag_indicator
@@ -5169,6 +5419,7 @@ class SnomMeasurement(FileHandler):
             self.channels_label.append(imag_channel)
         gc.collect()
 
+    @journaled
     def substract_channels(self, channel1:str, channel2:str) -> None:
         """This function will substract the data of channel2 from channel1 and save the result in a new channel.
         The new channel will be named channel1-channel2.
@@ -5237,23 +5488,61 @@ class SnomMeasurement(FileHandler):
         reduced_data = []
         if is_horizontal:
             if inverted:
-                left_data = data[:,:start]
-                right_data = data[:,end:]
+                left_data = data[...,:start]
+                right_data = data[...,end:]
                 reduced_data.append(left_data)
                 reduced_data.append(right_data)
             else:
-                selected_data = data[:,start:end]
+                selected_data = data[...,start:end]
                 reduced_data.append(selected_data)
         else:
             if inverted:
-                top_data = data[:start,:]
-                bottom_data = data[end:,:]
+                top_data = data[...,:start,:]
+                bottom_data = data[...,end:,:]
                 reduced_data.append(top_data)
                 reduced_data.append(bottom_data)
             else:
-                selected_data = data[start:end,:]
+                selected_data = data[...,start:end,:]
         return reduced_data
     
+    def _level_data_columnwise(self, data:np.ndarray, selection:list) -> np.ndarray:
+        """Levels the data with the reference areas of the selection, works for single channels and stacks of channels (channel, y, x).
+        The drift of the mean of each line within the reference areas relative to the first line is subtracted.
+        With two reference areas the drift within each line is corrected as well, by subtracting the linear interpolation between both areas.
+
+        Args:
+            data (np.ndarray): the data to level
+            selection (list): [bound1 (int), bound2 (int), is_horizontal (bool), inverted (bool)]
+
+        Returns:
+            np.ndarray: the leveled data
+        """
+        reduced_data = self._get_data_from_selected_range(data, *selection)
+        if len(reduced_data) == 1:
+            # get the reference data from the mean of the reduced data for each row
+            reference_data = np.mean(reduced_data[0], axis=-1)
+        elif len(reduced_data) == 2:
+            # get the reference data from the mean of the reduced data for each row and for both sides
+            reference_data_left = np.mean(reduced_data[0], axis=-1)
+            reference_data_right = np.mean(reduced_data[1], axis=-1)
+            reference_data = (reference_data_left + reference_data_right)/2
+        # first correct the overall drift of the mean per line, the first line is the reference
+        mean_drift = reference_data - reference_data[..., :1]
+        mean_drift[..., 0] = 0
+        leveled_data = data - mean_drift[..., np.newaxis]
+        if len(reduced_data) == 2:
+            # then correct the drift within each individual line by interpolating between the two reference data arrays
+            # if phase is leveled make sure no phase jumps occur otherwise the leveling will not work
+            left = np.asarray(reference_data_left, dtype=np.float64)[..., np.newaxis]
+            right = np.asarray(reference_data_right, dtype=np.float64)[..., np.newaxis]
+            positions = np.linspace(0, 1, data.shape[-1])
+            line_drift = np.where(positions == 1, right, (right - left)*positions + left)
+            # shift line_drift such that the mean is zero
+            line_drift = line_drift - np.mean(line_drift, axis=-1, keepdims=True)
+            leveled_data = leveled_data - line_drift.astype(get_float_dtype(leveled_data.dtype), copy=False)
+        return leveled_data
+
+    @journaled
     def level_data_columnwise(self, channel_list:Optional[list]=None, display_channel:Optional[str]=None, selection:Optional[list]=None) -> None:
         """This function will level the data of the specified channels columnwise.
         The function will use the data from the display channel to select the range for leveling.
@@ -5283,62 +5572,16 @@ class SnomMeasurement(FileHandler):
         if selection is None:
             selection = self._select_data_range(display_channel)
         # now use the selection to level all channels
+        self._apply_to_channels(channel_list, partial(self._level_data_columnwise, selection=selection))
+        # if phase channel, shift the data such that the mean is pi
+        # todo, for now just shift by 0 to make sure the data is within the 0 to 2pi range
+        phase_channels = [channel for channel in channel_list if self.phase_indicator in channel]
+        self._apply_to_channels(phase_channels, lambda data: self._shift_phase_data(data, np.pi - np.mean(data, axis=(-2, -1), keepdims=True)))
         for channel in channel_list:
-            # get the data from memory
-            data = self.all_data[self.channels.index(channel)]
-            # get the reduced data
-            reduced_data = self._get_data_from_selected_range(data, *selection)
-            # level the data
-            if len(reduced_data) == 1:
-                # print('leveling with one reference area')
-                # get the reference data from the mean of the reduced data for each row
-                reference_data = np.mean(reduced_data[0], axis=1)
-                # create the leveled data
-                leveled_data = np.zeros(data.shape)
-                for i in range(data.shape[0]):
-                    # leveled_data[i] = data[i] - reference_data[i]
-                    if i > 0:
-                        mean_drift = np.mean(reference_data[i]) - np.mean(reference_data[0])
-                        leveled_data[i] = data[i] - mean_drift
-                    else:
-                        leveled_data[i] = data[i]
-            elif len(reduced_data) == 2:
-                # print('leveling with two reference areas')
-                # get the reference data from the mean of the reduced data for each column and for both sides
-                reference_data_left = np.mean(reduced_data[0], axis=1)
-                reference_data_right = np.mean(reduced_data[1], axis=1)
-                # create the leveled data by interpolating between the two reference data arrays and subtracting them from the data
-                leveled_data = np.zeros(data.shape)
-                for i in range(data.shape[0]):
-                    # if phase is leveled make sure no phase jumps occur otherwise the leveling will not work
-                    # first correct the overall drift of the mean per line
-                    if i > 0:
-                        mean_drift = np.mean([reference_data_left[i], reference_data_right[i]]) - np.mean([reference_data_left[0], reference_data_right[0]])
-                        leveled_data[i] = data[i] - mean_drift
-                    else:
-                        leveled_data[i] = data[i]
-                    # then correct the drift within each individual line by interpolating between the two reference data arrays
-                    line_drift = np.interp(np.linspace(0, 1, data.shape[1]), [0, 1], [reference_data_left[i], reference_data_right[i]])
-                    # shift line_drift such that the mean is zero
-                    line_drift = line_drift - np.mean(line_drift)
-                    leveled_data[i] = leveled_data[i] - line_drift
-            # if phase channel, shift the data to match the leveled data to the original data
-            if self.phase_indicator in channel:
-                # todo, for now just shift by 0 to make sure the data is within the 0 to 2pi range
-                # shift the data such that the mean is pi
-                mean_phase = np.mean(leveled_data)
-                shift = np.pi - mean_phase
-                self._shift_phase_data(leveled_data, shift=shift)
-            '''# save the leveled data, add the leveled data to memory and keep old data
-            self.channels.append(channel + '_leveled')
-            self.all_data.append(leveled_data)
-            self.channel_tag_dict.append(self.channel_tag_dict[self.channels.index(channel)])
-            self.channels_label.append(channel + '_leveled')'''
-            # save the leveled data and replace old data
-            # keep original channel name, but change the data and the channels_label
-            self.all_data[self.channels.index(channel)] = leveled_data
+            # keep original channel name, but change the channels_label
             self.channels_label[self.channels.index(channel)] = channel + '_leveled'
         self._write_to_logfile('level_data_columnwise_selection', [channel_list, [elem for elem in selection]])
+        self._set_operation_argument('selection', selection)
 
     #########################################################
     #### Additonal functions that do not change the data ####
@@ -5411,7 +5654,7 @@ class SnomMeasurement(FileHandler):
                     repixval=amp_data[j][k]*np.cos(phase_data[j][k]-phase)/maxval
                     repixels.append(repixval+0.5)
             data = np.array(repixels).reshape(YRes, XRes)
-            img = Image.fromarray(SNOM_realpart(data, bytes=True))
+            img = Image.fromarray(snom_colormaps.SNOM_realpart(data, bytes=True))
             frames.append(img)
         channel = 'O' + savefile_demod + 'R'
         # self.filename is actually a windows path element not a str filename, to get the string use: self.filename.name
@@ -5488,7 +5731,7 @@ class SnomMeasurement(FileHandler):
         XRes, YRes = xres_amp, yres_amp
         flattened_amp = amp_data.flatten()
         maxval = max(flattened_amp)
-        cmap = SNOM_realpart
+        cmap = snom_colormaps.SNOM_realpart
 
         # create real data for all frames
         self.all_real_data = []
@@ -5665,19 +5908,7 @@ class SnomMeasurement(FileHandler):
         Returns:
             float: the mean value
         """
-        xres = len(data[0])
-        yres = len(data)
-        size = 2*zone + 1
-        mean = 0
-        count = 0
-        for y in range(size):
-            for x in range(size):
-                y_pixel = int(y_coord -(size-1)/2 + y)
-                x_pixel = int(x_coord -(size-1)/2 + x)
-                if self._check_pixel_position(xres, yres, x_pixel, y_pixel) == True:
-                    mean += data[y_pixel][x_pixel]
-                    count += 1
-        return mean/count
+        return leveling.get_zone_means(data, [[x_coord, y_coord]], zone)[0]
 
     def get_pixel_coordinates(self, channel) -> list:
         """This function returns the pixel coordinates of the clicked pixel.
@@ -5691,11 +5922,11 @@ class SnomMeasurement(FileHandler):
         data = self.all_data[self.channels.index(channel)]
         # identify the colormap
         if self.height_indicator in channel:
-            cmap = SNOM_height
+            cmap = snom_colormaps.SNOM_height
         elif self.phase_indicator in channel:
-            cmap = SNOM_phase
+            cmap = snom_colormaps.SNOM_phase
         elif self.amp_indicator in channel:
-            cmap = SNOM_amplitude
+            cmap = snom_colormaps.SNOM_amplitude
         else:
             cmap = 'viridis'
         '''fig, ax = plt.subplots()
@@ -5758,11 +5989,11 @@ class SnomMeasurement(FileHandler):
     def _get_positions_from_plot(self, channel, data, coordinates:Optional[list]=None, orientation=None) -> list:
         # Todo redundant to the get clicker corrdinates function?!
         if self.phase_indicator in channel:
-            cmap = SNOM_phase
+            cmap = snom_colormaps.SNOM_phase
         elif self.amp_indicator in channel:
-            cmap = SNOM_amplitude
+            cmap = snom_colormaps.SNOM_amplitude
         elif self.height_indicator in channel:
-            cmap = SNOM_height
+            cmap = snom_colormaps.SNOM_height
 
         fig, ax = plt.subplots()
         img = ax.pcolormesh(data, cmap=cmap)
@@ -5784,28 +6015,24 @@ class SnomMeasurement(FileHandler):
         klick_coordinates = [[round(element[0]), round(element[1])] for element in klicker_coords]
         return klick_coordinates
 
-    def _get_profile(self, data, coordinates:list, orientation:Definitions, width:int) -> list:
-        YRes = len(data)
-        XRes = len(data[0])
-        all_profiles = []
+    def _get_cutlines(self, data, coordinates:list, orientation:Definitions, width:int) -> list:
+        """Returns the cutlines [start, end, width] of profiles which extend over the whole image in the x-direction or y-direction.
+        The profile at coordinate c is the mean of the pixels from int(c - width/2) to int(c - width/2) + width - 1.
+        """
+        YRes, XRes = np.shape(data)[-2:]
+        cutlines = []
         for coord in coordinates:
-            profile = []
             if orientation == Definitions.vertical:
-                for y in range(YRes):
-                    value = 0
-                    for x in range(int(coord[0] - width/2), int(coord[0] + width/2)):
-                        value += data[y][x]
-                    value = value/width
-                    profile.append(value)
-            if orientation == Definitions.horizontal:
-                for x in range(XRes):
-                    value = 0
-                    for y in range(int(coord[1] - width/2), int(coord[1] + width/2)):
-                        value += data[y][x]
-                    value = value/width
-                    profile.append(value)
-            all_profiles.append(profile)
-        return all_profiles
+                x = int(coord[0] - width/2) + (width - 1)/2
+                cutlines.append([[x, 0], [x, YRes - 1], width])
+            elif orientation == Definitions.horizontal:
+                y = int(coord[1] - width/2) + (width - 1)/2
+                cutlines.append([[0, y], [XRes - 1, y], width])
+        return cutlines
+
+    def _get_profile(self, data, coordinates:list, orientation:Definitions, width:int) -> np.ndarray:
+        # all profiles are sampled at once, the result has the shape (profile, point)
+        return profile.get_profiles(data, self._get_cutlines(data, coordinates, orientation, width))
 
     def select_profile(self, profile_channel:str, preview_channel:Optional[str]=None, orientation:Definitions=Definitions.vertical, width:int=10, phase_orientation:int=1, coordinates:list=None):
         # Todo
@@ -5828,7 +6055,7 @@ class SnomMeasurement(FileHandler):
 
         profiledata = self.all_data[self.channels.index(profile_channel)]
 
-        cmap = SNOM_phase
+        cmap = snom_colormaps.SNOM_phase
         fig, ax = plt.subplots()
         img = ax.pcolormesh(profiledata, cmap=cmap)
         ax.invert_yaxis()
@@ -5884,11 +6111,11 @@ class SnomMeasurement(FileHandler):
 
     def _plot_data_and_profile_pos(self, channel, data, coordinates, orientation):
         if self.phase_indicator in channel:
-            cmap = SNOM_phase
+            cmap = snom_colormaps.SNOM_phase
         elif self.amp_indicator in channel:
-            cmap = SNOM_amplitude
+            cmap = snom_colormaps.SNOM_amplitude
         elif self.height_indicator in channel:
-            cmap = SNOM_height
+            cmap = snom_colormaps.SNOM_height
         fig, ax = plt.subplots()
         img = ax.pcolormesh(data, cmap=cmap)
         ax.invert_yaxis()
@@ -5936,7 +6163,7 @@ class SnomMeasurement(FileHandler):
         
         return coordinates
 
-    def select_profiles(self, profile_channel:str, preview_channel:Optional[str]=None, orientation:Definitions=Definitions.vertical, width:int=10, coordinates:Optional[list]=None):
+    def select_profiles(self, profile_channel:str, preview_channel:Optional[str]=None, orientation:Definitions=Definitions.vertical, width:int=10, coordinates:Optional[list]=None) -> np.ndarray:
         # Todo
         """This function lets the user select multiple profiles with given width in pixels and displays the data.
         Also unfinished, but allows for the selection of multiple profiles.
@@ -5968,6 +6195,46 @@ class SnomMeasurement(FileHandler):
         self.profile_channel = profile_channel
         self.profile_orientation = orientation
         return self.profiles
+
+    def extract_profiles(self, cutlines:list, channels:Optional[list]=None, n_points:Optional[int]=None) -> np.ndarray:
+        """This function extracts the profiles of many cutlines with arbitrary angle and width from all specified channels at once.
+        The sampling coordinates of each cutline are calculated once and used for all channels.
+        The profiles of the first channel are kept in memory and can be displayed with display_profiles(), display_flattened_profile()
+        or display_phase_difference().
+
+        Args:
+            cutlines (list): list of cutlines [start, end, width], start and end are [x, y] pixel coordinates and width is the width in pixels.
+                The profile is the mean over the width, like for test_profile_selection().
+            channels (list, optional): channels to extract the profiles from, all channels must have the same size. If not specified all channels in memory will be used. Defaults to None.
+            n_points (int, optional): number of points of every profile. If not specified each profile has one point per pixel
+                and shorter profiles are filled up with nan. Defaults to None.
+
+        Returns:
+            np.ndarray: the profiles of shape (channel, cutline, point)
+        """
+        if channels is None:
+            channels = self.channels
+        channels = [channel for channel in channels if channel in self.channels]
+        if len(channels) == 0:
+            print('None of the specified channels is in memory!')
+            return None
+        indices = [self.channels.index(channel) for channel in channels]
+        shapes = {np.shape(self.all_data[index]) for index in indices}
+        if len(shapes) > 1:
+            print('All channels must have the same size to extract the profiles at once!')
+            return None
+        data_stack = self._get_channel_stack(indices)
+        if data_stack is None:
+            data_stack = np.stack([self.all_data[index] for index in indices])
+        sampler = profile.ProfileSampler(cutlines, data_stack.shape, n_points)
+        profiles = sampler.sample(data_stack)
+        self._write_to_logfile('extract_profiles', [channels, cutlines, n_points])
+        self.profiles = profiles[0]
+        self.profile_channel = channels[0]
+        self.profile_orientation = Definitions.cutline
+        self.profile_cutlines = sampler.cutlines
+        self.profile_lengths = sampler.lengths
+        return profiles
         
     def _display_profile(self, profiles, ylabel=None, labels=None, linestyle='x', title=None):
         # work in progess...
@@ -5990,6 +6257,11 @@ class SnomMeasurement(FileHandler):
             xlabel = 'Y [µm]'
             if title is None:
                 title = 'Vertical profiles of channel ' + self.profile_channel
+        elif self.profile_orientation == Definitions.cutline:
+            xvalues = self._get_cutline_distances(self.profile_channel, self.profile_cutlines, self.profile_lengths, np.shape(profiles)[-1])
+            xlabel = 'Distance [µm]'
+            if title is None:
+                title = 'Profiles of channel ' + self.profile_channel
         # find out y label:
         if ylabel is None:
             if self.phase_indicator in self.profile_channel:
@@ -5998,11 +6270,13 @@ class SnomMeasurement(FileHandler):
                 ylabel = 'Amplitude [arb.u.]'
             elif self.height_indicator in self.profile_channel:
                 ylabel = 'Height [nm]'
-        for index, profile in enumerate(profiles):
+        for index, profile_data in enumerate(profiles):
+            # cutlines have their own distances
+            profile_xvalues = xvalues[index] if self.profile_orientation == Definitions.cutline else xvalues
             if labels is None:
-                plt.plot(xvalues, profile, linestyle, label=f'Profile index: {index}')
+                plt.plot(profile_xvalues, profile_data, linestyle, label=f'Profile index: {index}')
             else:
-                plt.plot(xvalues, profile, linestyle, label=labels[index])
+                plt.plot(profile_xvalues, profile_data, linestyle, label=labels[index])
         plt.xlabel(xlabel)
         plt.ylabel(ylabel)
         plt.title(title)
@@ -6010,6 +6284,17 @@ class SnomMeasurement(FileHandler):
         plt.tight_layout()
         plt.show()
 
+    def _get_cutline_distances(self, channel:str, cutlines:list, lengths:list, n_points:int) -> np.ndarray:
+        """Returns the distance in µm from the start of each cutline for all points of its profile, shape (cutline, point).
+        Points which are not part of a shorter profile are nan."""
+        xrange, yrange = self._get_channel_tag_dict_value(channel, ChannelTags.SCANAREA)
+        xres, yres = self._get_channel_tag_dict_value(channel, ChannelTags.PIXELAREA)
+        distances = np.full((len(cutlines), n_points), np.nan)
+        for index, ((start, end, width), length) in enumerate(zip(cutlines, lengths)):
+            distance = np.hypot((end[0] - start[0])*xrange/xres, (end[1] - start[1])*yrange/yres)
+            distances[index, :length] = np.linspace(0, distance, length)
+        return distances
+
     def display_profiles(self, ylabel:Optional[str]=None, labels:Optional[list]=None):
         """This function will display all current profiles from memory.
 
@@ -6026,7 +6311,8 @@ class SnomMeasurement(FileHandler):
         Args:
             phase_orientation (int): direction of the phase, must be '1' or '-1'
         """
-        flattened_profiles = [phase_analysis.flatten_phase_profile(profile, phase_orientation) for profile in self.profiles]
+        # np.unwrap flattens all profiles at once along the last axis
+        flattened_profiles = phase_analysis.flatten_phase_profile(np.asarray(self.profiles), phase_orientation)
         self._display_profile(flattened_profiles)
         gc.collect()
 
@@ -6036,14 +6322,17 @@ class SnomMeasurement(FileHandler):
         Args:
             reference_index (int): index of the reference profile. Basically the nth-1 selected profile.
         """
-        difference_profiles = [phase_analysis.get_profile_difference(self.profiles[reference_index], self.profiles[i]) for i in range(len(self.profiles)) if i != reference_index]
+        profiles = np.asarray(self.profiles)
+        difference_profiles = phase_analysis.get_profile_difference(profiles[reference_index], np.delete(profiles, reference_index, axis=0))
         labels = ['Wg index ' + str(i) for i in range(len(difference_profiles))]
         self._display_profile(difference_profiles, 'Phase difference', labels)
         gc.collect()
 
     def _get_mean_phase_difference(self, profiles, reference_index:int):
-        difference_profiles = [phase_analysis.get_profile_difference(profiles[reference_index], profiles[i]) for i in range(len(profiles)) if i != reference_index]
-        mean_differences = [np.mean(diff) for diff in difference_profiles]
+        profiles = np.asarray(profiles)
+        difference_profiles = phase_analysis.get_profile_difference(profiles[reference_index], np.delete(profiles, reference_index, axis=0))
+        # shorter profiles are filled up with nan
+        mean_differences = list(np.nanmean(difference_profiles, axis=-1))
         return mean_differences
 
     # not yet fully implemented, eg. the profile plot function is only ment for full horizontal or vertical profiles only
@@ -6069,15 +6358,15 @@ class SnomMeasurement(FileHandler):
         # plt.pcolormesh(array_2d)
         # plt.show()
         if selection is None:
-            profile, start, end, width = select_profile(array_2d, channel)
+            profile_data, start, end, width = select_profile(array_2d, channel)
         else:
             start, end, width = selection
             # create profile 
-            profile = ski.measure.profile_line(array_2d.T, start, end, linewidth=width) # somehow x and y are switched, therefore transpose the array
-        # plt.plot(profile)
+            profile_data = profile.get_profile(array_2d, start, end, width)
+        # plt.plot(profile_data)
         # plt.show()
         self._write_to_logfile('test_profile_selection', [channel, start, end, width])
-        return profile, start, end, width
+        return profile_data, start, end, width
         '''self.profile_channel = channel
         self.profiles = [profile]
         # find out the orientation of the profile
@@ -6134,13 +6423,15 @@ class ApproachCurve(FileHandler):
         directory_name (str): Directory path of the measurement.
         channels (list, optional): List of channels to load. Defaults to None.
         title (str, optional): Title of the measurement. Defaults to None.
+        use_cache (bool, optional): Keep the parsed channels in a binary cache in the SNOM_Config folder, later loads of the unchanged datafile only memory map the cache. Defaults to False.
     """
-    def __init__(self, directory_name:str, channels:Optional[list]=None, title:str=None) -> None:
+    def __init__(self, directory_name:str, channels:Optional[list]=None, title:str=None, use_cache:bool=False) -> None:
         self.measurement_type = MeasurementTypes.APPROACHCURVE
         if channels is None:
             channels = ['M1A']
         self.channels = channels.copy()
         self.x_channel = 'Z'
+        self.use_cache = use_cache
         super().__init__(directory_name, title)
         self.header = 27 # todo, add as parameter to config file, varies with different software versions
         self._initialize_measurement_channel_indicators()
@@ -6184,19 +6475,9 @@ class ApproachCurve(FileHandler):
         self.height_scaling_custom = self._get_from_config('height_scaling_custom')
 
     def _load_data(self):
-        self.all_data = {}
         datafile = self.directory_name / Path(self.filename.name + '.txt')
-        # find header in the file
-        self.header = self.find_header_length(datafile)
-        x_channel_index = self.find_index(datafile, self.x_channel)
-        with open(datafile, 'r') as file:
-            xdata = np.genfromtxt(file ,skip_header=self.header, usecols=(x_channel_index), delimiter='\t', invalid_raise = False)
-        self.all_data[self.x_channel] = xdata
-        for channel in self.channels:
-            channel_index = self.find_index(datafile, channel)
-            with open(datafile, 'r') as file:
-                y_data = np.genfromtxt(file ,skip_header=self.header, usecols=(channel_index), delimiter='\t', invalid_raise = False)
-                self.all_data[channel] = y_data
+        # find header in the file and load the channels, either from the text file or from the binary cache
+        self.all_data = self._load_text_columns(datafile, [self.x_channel] + self.channels, partial(self._read_channels, datafile), self.use_cache)
         # scale the x data to nm
         x_scaling = 1
         x_unit = self._get_measurement_tag_dict_unit(MeasurementTags.SCANAREA)
@@ -6214,6 +6495,45 @@ class ApproachCurve(FileHandler):
         # scale xdata:
         self.all_data[self.x_channel] = np.multiply(self.all_data[self.x_channel], x_scaling)
 
+    def _read_channels(self, datafile:Path, channels:list) -> dict:
+        # all channels are read in a single pass, the column indices are taken from the row with the channel names after the header
+        data = read_columns(datafile, self.header, channels)
+        # the row with the channel names was always parsed as data as well, resulting in a leading nan, keep it so existing evaluations do not change
+        return {channel: np.concatenate([[np.nan], values]) for channel, values in data.items()}
+
+    @classmethod
+    def load_directory(cls, directory_name:str, channels:Optional[list]=None, use_cache:bool=False) -> tuple:
+        """Loads all approach curve measurements in the subfolders of the specified directory and stacks the channels, e.g. for statistics.
+        Each measurement folder must contain the datafile with the same name as the folder. Curves of different length are padded with nan at the end.
+
+        Args:
+            directory_name (str): directory containing the measurement folders
+            channels (list, optional): channels to load, the x channel 'Z' is always loaded. Defaults to None.
+            use_cache (bool, optional): use the binary column cache, see ApproachCurve. Defaults to False.
+
+        Returns:
+            tuple: list of the measurement names, dict channel -> np.ndarray of shape (number of measurements, length of the longest curve)
+        """
+        measurements = []
+        for folder in sorted(Path(directory_name).iterdir()):
+            if not (folder / Path(folder.name + '.txt')).is_file():
+                continue
+            try:
+                measurements.append(cls(folder, channels, use_cache=use_cache))
+            # the filetype detection exits if the folder is not a known measurement, this should only skip the folder
+            except (Exception, SystemExit) as e:
+                print(f'Could not load the approach curve {folder.name}, the folder is skipped: {e}')
+        names = [measurement.filename.name for measurement in measurements]
+        if len(measurements) == 0:
+            return names, {}
+        stacked_data = {}
+        for channel in measurements[0].all_data:
+            length = max(len(measurement.all_data[channel]) for measurement in measurements)
+            stacked_data[channel] = np.full((len(measurements), length), np.nan)
+            for i, measurement in enumerate(measurements):
+                stacked_data[channel][i, :len(measurement.all_data[channel])] = measurement.all_data[channel]
+        return names, stacked_data
+
     def set_min_to_zero(self) -> None:
         """This function will set the minimum of the xdata array to zero."""
         # set the min of the xdata array to zero
@@ -6330,14 +6650,20 @@ class Scan3D(FileHandler):
         directory_name (str): Directory path of the measurement.
         channels (list, optional): List of channels to load. Defaults to None.
         title (str, optional): Title of the measurement. Defaults to None.
+        use_cache (bool, optional): Keep the parsed channels in a binary cache in the SNOM_Config folder, later loads of the unchanged datafile only memory map the cache. Defaults to False.
+        streaming (bool, optional): Do not load the full data cube into memory. Cutplanes, averages and approach curves are read from the datafile
+            or the binary cache in chunks when they are requested, so scans larger than the memory can be analysed. Defaults to False.
     """
-    def __init__(self, directory_name: str, channels:Optional[list]=None, title: str = None) -> None:
+    def __init__(self, directory_name: str, channels:Optional[list]=None, title: str = None, use_cache:bool=False, streaming:bool=False) -> None:
         self.measurement_type = MeasurementTypes.SCAN3D
         # set channelname if none is given
         if channels is None:
             channels = ['Z', 'O2A', 'O2P'] # if you want to plot approach curves 'Z' must be included!
         self.channels = channels.copy()
         self.x_channel = 'Z'
+        self.use_cache = use_cache
+        self.streaming = streaming
+        self.x_offset = 0 # offset of the x channel, only used in streaming mode, see set_min_to_zero
         # call the init constructor of the filehandler class
         super().__init__(directory_name, title)
         # define header, probably same as for approach curve
@@ -6372,19 +6698,21 @@ class Scan3D(FileHandler):
     
     def _load_data(self):
         datafile = self.directory_name / Path(self.filename.name + '.txt')
-        # find header length of datafile
-        self.header = self.find_header_length(datafile)
         # initialize all data dict
         self.all_data = {} # (key, value) = (channelname, 3d matrix, shape:(xres, yres, zres)) 
-        # load the data per channel and add to all_data
+        if self.streaming:
+            # the channels are only read from the datafile when they are needed
+            self.header = self.find_header_length(datafile)
+            return
+        x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
+        # find header length of datafile and load the channels, either from the text file or from the binary cache
+        columns = self._load_text_columns(datafile, self.channels, partial(self._read_channels, datafile, x*y*z), self.use_cache)
         for channel in self.channels:
-            # index = find_index(self.header, datafile, channel) # find the index of the channels
-            index = self.find_index(datafile, channel) # use local version of find_index
-            file = open(datafile, 'r')
-            self.all_data[channel] = np.genfromtxt(file ,skip_header=self.header+1, usecols=(index), delimiter='\t', invalid_raise = False)
-            file.close()
-            x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
-            self.all_data[channel] = np.reshape(self.all_data[channel], (y,x,z))
+            self.all_data[channel] = np.reshape(columns[channel], (y,x,z))
+        # scale xdata:
+        self.all_data[self.x_channel] = np.multiply(self.all_data[self.x_channel], self._get_x_scaling())
+
+    def _get_x_scaling(self):
         # scale the x data to nm
         x_scaling = 1
         # try: x_unit = self.measurement_tag_dict[MeasurementTags.SCANAREA][0]
@@ -6402,11 +6730,100 @@ class Scan3D(FileHandler):
                 x_scaling = pow(10,9)
         # ok forget about that, the software from neaspec saves the scan area parameters as µm but the actual data is stored in m...
         x_scaling = pow(10,9)
-        # scale xdata:
-        self.all_data[self.x_channel] = np.multiply(self.all_data[self.x_channel], x_scaling)
+        return x_scaling
+
+    def _read_channels(self, datafile:Path, expected_rows:int, channels:list) -> dict:
+        # read all channels in a single pass through the datafile, the line after the header contains the channel names
+        return read_columns(datafile, self.header, channels, expected_rows=expected_rows, show_progress=True)
+
+    def _iter_channel_chunks(self, channels:list, stop_row:Optional[int]=None):
+        """Yields the raw data of the specified channels in chunks as (channel, index of the first row, values).
+        Channels in the binary cache are read from the memory map, all other channels are read from the datafile in a single pass.
+
+        Args:
+            channels (list): channels to read
+            stop_row (int, optional): stop reading once all channels reached this row. Defaults to None.
+        """
+        datafile = self.directory_name / Path(self.filename.name + '.txt')
+        cached_data = {}
+        if self.use_cache:
+            header, cached_data = load_column_cache(self._get_column_cache_folder(datafile), os.stat(datafile), channels)
+        chunk_rows = 1024**2
+        for channel, values in cached_data.items():
+            stop = len(values) if stop_row is None else min(stop_row, len(values))
+            for start in range(0, stop, chunk_rows):
+                yield channel, start, np.asarray(values[start:min(start + chunk_rows, stop)])
+        text_channels = [channel for channel in dict.fromkeys(channels) if channel not in cached_data]
+        if len(text_channels) == 0:
+            return
+        row_counts = {channel: 0 for channel in text_channels}
+        chunks = iter_column_chunks(datafile, self.header, text_channels, show_progress=True)
+        try:
+            for chunk in chunks:
+                for channel, values in chunk.items():
+                    yield channel, row_counts[channel], values
+                    row_counts[channel] += len(values)
+                if stop_row is not None and min(row_counts.values()) >= stop_row:
+                    break
+        finally:
+            chunks.close()
+
+    def _convert_raw_data(self, channel:str, data:np.ndarray) -> np.ndarray:
+        # apply the same conversion as _load_data to raw data read in streaming mode
+        if channel == self.x_channel:
+            return np.multiply(data, self._get_x_scaling()) - self.x_offset
+        return data
+
+    def _stream_rows(self, channels:list, start_row:int, stop_row:int) -> dict:
+        """Reads the rows start_row to stop_row of the specified channels in streaming mode. Missing rows are nan."""
+        data = {channel: np.full(stop_row - start_row, np.nan) for channel in channels}
+        for channel, first_row, values in self._iter_channel_chunks(channels, stop_row):
+            # only the part of the chunk which overlaps with the requested rows is used
+            start = max(start_row, first_row)
+            stop = min(stop_row, first_row + len(values))
+            if start < stop:
+                data[channel][start - start_row:stop - start_row] = self._convert_raw_data(channel, values[start - first_row:stop - first_row])
+        return data
+
+    def _get_line_data(self, channels:list, line:int) -> dict:
+        """Returns the data of the specified y line for each channel, the shape of each array is (xres, zres).
+        In streaming mode only this line is read from the datafile.
+        """
+        if not self.streaming:
+            return {channel: self.all_data[channel][line] for channel in channels}
+        x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
+        data = self._stream_rows(channels, line*x*z, (line+1)*x*z)
+        return {channel: np.reshape(data[channel], (x,z)) for channel in channels}
+
+    def _stream_y_average(self, channels:list) -> dict:
+        """Averages the specified channels over the y axis in streaming mode, the shape of each array is (xres, zres).
+        The lines are summed up in the same order as np.mean(data, axis=0) would do, so the results are identical.
+        """
+        x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
+        line_length = x*z
+        sums = {channel: np.zeros(line_length) for channel in channels}
+        for channel, first_row, values in self._iter_channel_chunks(channels, y*line_length):
+            values = self._convert_raw_data(channel, values[:y*line_length - first_row])
+            # add the chunk line by line, the first and last line of the chunk can be incomplete
+            offset = first_row % line_length
+            position = 0
+            while position < len(values):
+                length = min(line_length - offset, len(values) - position)
+                sums[channel][offset:offset + length] += values[position:position + length]
+                position += length
+                offset = 0
+        return {channel: np.reshape(sums[channel]/y, (x,z)) for channel in channels}
 
     def set_min_to_zero(self) -> None:
         """This function will set the minimum of the xdata array to zero."""
+        if self.streaming:
+            # the offset is applied whenever the x channel is read
+            min_x = np.nan
+            for channel, first_row, values in self._iter_channel_chunks([self.x_channel]):
+                # fmin ignores nan values, like nanmin
+                min_x = np.fmin(min_x, np.fmin.reduce(self._convert_raw_data(channel, values), initial=np.nan))
+            self.x_offset += min_x
+            return
         # set the min of the xdata array to zero
         min_x = np.nanmin(self.all_data[self.x_channel]) # for some reason at least the first value seems to be nan 
         self.all_data[self.x_channel] = self.all_data[self.x_channel] - min_x
@@ -6424,14 +6841,19 @@ class Scan3D(FileHandler):
         """
         if channel is None:
             channel = self.channels[0]
+        return self._get_cutplanes([channel], axis, line)[channel]
+
+    def _get_cutplanes(self, channels:list, axis:str='x', line:int=0) -> dict:
         x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
-        data = self.all_data[channel].copy()
-        if axis == 'x':
-            cutplane_data = np.zeros((z,x)) 
-            for i in range(x):
-                for j in range(z):
-                    cutplane_data[j][i] = data[line][i][j]
-        return cutplane_data
+        # in streaming mode all channels are read in a single pass
+        line_data = self._get_line_data(channels, line)
+        all_cutplane_data = {}
+        for channel in channels:
+            if axis == 'x':
+                # the line data has the shape (x, z), the cutplane (z, x)
+                cutplane_data = np.array(np.transpose(line_data[channel]), dtype=np.float64)
+            all_cutplane_data[channel] = cutplane_data
+        return all_cutplane_data
 
     def generate_all_cutplane_data(self, axis:str='x', line:int=0):
         """This function will generate the data of all cutplanes for all channels and store them in a dictionary.
@@ -6440,9 +6862,7 @@ class Scan3D(FileHandler):
             axis (str, optional): Axis of the cutplane. Defaults to 'x'.
             line (int, optional): Line of the cutplane. Defaults to 0.
         """
-        self.all_cutplane_data = {}
-        for channel in self.channels:
-            self.all_cutplane_data[channel] = self.get_cutplane_data(axis=axis, line=line, channel=channel)
+        self.all_cutplane_data = self._get_cutplanes(self.channels, axis=axis, line=line)
 
     def _create_subplot(self, axis:str='x', line:int=0, channel:str=None, auto_align:bool=False):
         if channel is None:
@@ -6472,9 +6892,8 @@ class Scan3D(FileHandler):
             z_shifts = np.zeros(XRes)
             # idea: get all the lowest points of the approach curves and shift them to the same z position, herefore we shift them only upwards relative to the lowest point
             z_data = self.all_cutplane_data[self.x_channel]
-            # reshape the data to the correct shape
-            for i in range(XRes):
-                z_shifts[i] = self._get_z_shift_(z_data[:,i])
+            # get the shift of each approach curve, the columns of the cutplane
+            z_shifts[:] = self._get_z_shift_(z_data)
             # z_data is in nm
             z_shifts = z_shifts
             z_min = np.min(z_shifts)
@@ -6485,11 +6904,7 @@ class Scan3D(FileHandler):
             ZRes_new = int(ZRange_new/z_pixelsize)
             # print('ZRes_new: ', ZRes_new)
             # create the new data array
-            cutplane_data = np.zeros((ZRes_new, XRes))
-            data = self.all_cutplane_data[channel].copy()
-            for i in range(XRes):
-                for j in range(ZRes):
-                    cutplane_data[j+int(z_shifts[i]/z_pixelsize)][i] = data[j][i]
+            cutplane_data = self._shift_approach_curves(self.all_cutplane_data[channel], z_shifts, z_pixelsize, ZRes_new)
             # This shifting is not optimal, since a slow drift or a tilt of the sample would lead to a wrong alignment of the approach curves, although they start at the bottom.
             # Maybe try to use a 2d scan of the same region to align the approach curves.
         
@@ -6615,27 +7030,20 @@ class Scan3D(FileHandler):
         amp_channel = f'O{demodulation}A'
         phase_channel = f'O{demodulation}P'
         x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
-        amp_data = self.all_data[amp_channel].copy()
-        phase_data = self.all_data[phase_channel].copy()
+        line_data = self._get_line_data([amp_channel, phase_channel, self.x_channel], line)
+        amp_data = line_data[amp_channel].copy()
+        phase_data = line_data[phase_channel].copy()
         if axis == 'x':
-            cutplane_amp_data = np.zeros((z,x)) 
-            cutplane_phase_data = np.zeros((z,x))
-            for i in range(x):
-                for j in range(z):
-                    cutplane_amp_data[j][i] = amp_data[line][i][j]
-                    cutplane_phase_data[j][i] = phase_data[line][i][j]
+            cutplane_amp_data = np.transpose(amp_data)
+            cutplane_phase_data = np.transpose(phase_data)
         # todo: shift each y column by offset value depending on average z position, to correct for varying starting position, due to non flat substrates
         z_shifts = np.zeros(x)
         # idea: get all the lowest points of the approach curves and shift them to the same z position, herefore we shift them only upwards relative to the lowest point
-        z_data_raw = self.all_data[self.x_channel]
+        z_data_raw = line_data[self.x_channel]
         # reshape the data to the correct shape
         if axis == 'x':
-            z_data = np.zeros((z,x)) 
-            for i in range(x):
-                for j in range(z):
-                    z_data[j][i] = z_data_raw[line][i][j]
-        for i in range(x):
-            z_shifts[i] = self._get_z_shift_(z_data[:,i])
+            z_data = np.transpose(z_data_raw)
+        z_shifts[:] = self._get_z_shift_(z_data)
         z_shifts = z_shifts
         if align == 'auto':
             z_min = np.min(z_shifts)
@@ -6660,10 +7068,7 @@ class Scan3D(FileHandler):
         ZRes_new = int(ZRange_new/z_pixelsize)
         # print('ZRes_new: ', ZRes_new)
         # create the new data array
-        cutplane_real_data = np.zeros((ZRes_new, XRes))
-        for i in range(XRes):
-            for j in range(ZRes):
-                cutplane_real_data[j+int(z_shifts[i]/z_pixelsize)][i] = amp_data[line][i][j]*np.cos(phase_data[line][i][j])
+        cutplane_real_data = self._shift_approach_curves(np.transpose(amp_data*np.cos(phase_data)), z_shifts, z_pixelsize, ZRes_new)
         # set the channel 
         channel = f'O{demodulation}Re'
         '''This shifting is not optimal, since a slow drift or a tilt of the sample would lead to a wrong alignment of the approach curves, although they start at the bottom.
@@ -6749,9 +7154,8 @@ class Scan3D(FileHandler):
             z_shifts = np.zeros(XRes)
             # idea: get all the lowest points of the approach curves and shift them to the same z position, herefore we shift them only upwards relative to the lowest point
             z_data = self.all_cutplane_data[self.x_channel]
-            # reshape the data to the correct shape
-            for i in range(XRes):
-                z_shifts[i] = self._get_z_shift_(z_data[:,i])
+            # get the shift of each approach curve, the columns of the cutplane
+            z_shifts[:] = self._get_z_shift_(z_data)
             # z_data is in nm
             z_shifts = z_shifts
             z_min = np.min(z_shifts)
@@ -6762,11 +7166,7 @@ class Scan3D(FileHandler):
             ZRes_new = int(ZRange_new/z_pixelsize)
             # print('ZRes_new: ', ZRes_new)
             # create the new data array
-            cutplane_data = np.zeros((ZRes_new, XRes))
-            data = self.all_cutplane_data[real_channel].copy()
-            for i in range(XRes):
-                for j in range(ZRes):
-                    cutplane_data[j+int(z_shifts[i]/z_pixelsize)][i] = data[j][i]
+            cutplane_data = self._shift_approach_curves(self.all_cutplane_data[real_channel], z_shifts, z_pixelsize, ZRes_new)
             # This shifting is not optimal, since a slow drift or a tilt of the sample would lead to a wrong alignment of the approach curves, although they start at the bottom.
             # Maybe try to use a 2d scan of the same region to align the approach curves.
         
@@ -6820,11 +7220,31 @@ class Scan3D(FileHandler):
     def _get_z_shift_(self, z_data):
         # get the average z position for each approach curve
         # might change in the future to a more sophisticated method
-        # return np.mean(z_data)
+        # return np.mean(z_data, axis=0)
 
-        # return the shift of the starting point of the approach curve
+        # return the shift of the starting point of the approach curve, for cutplanes of shape (z, x) the shift of each column
         return z_data[0]
 
+    def _shift_approach_curves(self, cutplane_data:np.ndarray, z_shifts:np.ndarray, z_pixelsize:float, ZRes_new:int) -> np.ndarray:
+        """Shifts each approach curve, the columns of the cutplane data, by the corresponding z shift.
+        The shifted data is placed in a new array with ZRes_new rows.
+
+        Args:
+            cutplane_data (np.ndarray): cutplane data of shape (z, x)
+            z_shifts (np.ndarray): shift of each approach curve in nm
+            z_pixelsize (float): size of a z pixel in nm
+            ZRes_new (int): z resolution of the new array
+
+        Returns:
+            np.ndarray: the shifted cutplane data
+        """
+        ZRes, XRes = np.shape(cutplane_data)
+        new_cutplane_data = np.zeros((ZRes_new, XRes))
+        # the shifts are truncated to full pixels, like int() does
+        pixel_shifts = (np.asarray(z_shifts)/z_pixelsize).astype(int)
+        new_cutplane_data[np.arange(ZRes)[:, np.newaxis] + pixel_shifts, np.arange(XRes)] = cutplane_data
+        return new_cutplane_data
+
     def display_approach_curve(self, x_pixel, y_pixel, x_channel:str=None, y_channels:Optional[list]=None):
         if x_channel is None:
             x_channel = 'Z'
@@ -6833,10 +7253,17 @@ class Scan3D(FileHandler):
             return None
         if y_channels is None:
             y_channels = self.channels
-        x_data = self.all_data[x_channel][y_pixel][x_pixel]
+        if self.streaming:
+            # only read the approach curve of this pixel
+            x,y,z = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
+            start_row = (y_pixel*x + x_pixel)*z
+            pixel_data = self._stream_rows([x_channel] + y_channels, start_row, start_row + z)
+        else:
+            pixel_data = {channel: self.all_data[channel][y_pixel][x_pixel] for channel in [x_channel] + y_channels}
+        x_data = pixel_data[x_channel]
         y_data = []
         for channel in y_channels:
-            y_data.append(self.all_data[channel][y_pixel][x_pixel])
+            y_data.append(pixel_data[channel])
         self._display_approach_curve(x_data, y_data, x_channel, y_channels)
 
     def _display_approach_curve(self, x_data, y_data:list, x_channel, y_channels):
@@ -6913,7 +7340,7 @@ class Scan3D(FileHandler):
         elif reference_area == 'manual':
             # use pointcklicker to get the reference area
             fig, ax = plt.subplots()
-            ax.pcolormesh(cutplane_data, cmap=SNOM_phase)
+            ax.pcolormesh(cutplane_data, cmap=snom_colormaps.SNOM_phase)
             klicker = clicker(ax, ["event"], markers=["x"])
             ax.legend()
             ax.axis('scaled')
@@ -6940,7 +7367,7 @@ class Scan3D(FileHandler):
         
         # display the reference area
         fig, ax = plt.subplots()
-        img = ax.pcolormesh(reference_data, cmap=SNOM_phase)
+        img = ax.pcolormesh(reference_data, cmap=snom_colormaps.SNOM_phase)
         divider = make_axes_locatable(ax)
         cax = divider.append_axes("right", size="5%", pad=0.05)
         cbar = plt.colorbar(img, cax=cax)
@@ -6962,18 +7389,16 @@ class Scan3D(FileHandler):
                 phase_offset = np.mean([phase_data[i][reference_area[0][0]:reference_area[0][1]] for i in range(reference_area[1][0], reference_area[1][1])]) - reference_phase
                 self.all_cutplane_data[channel] = self._shift_phase_data(phase_data, -phase_offset)
         self._write_to_logfile('match_phase_offset_reference_area', reference_area)
+        self._set_operation_argument('reference_channel', reference_channel)
+        self._set_operation_argument('reference_area', reference_area)
         gc.collect()
 
     def _shift_phase_data(self, data, shift) -> np.ndarray:
         """This function adds a phaseshift to the specified phase data. The phase data is automatically kept in the 0 to 2 pi range.
+        The data is changed in place and also returned.
         Could in future be extended to show a live view of the phase data while it can be modified by a slider...
         e.g. by shifting the colorscale in the preview rather than the actual data..."""
-        yres = len(data)
-        xres = len(data[0])
-        for y in range(yres):
-            for x in range(xres):
-                data[y][x] = (data[y][x] + shift) % (2*np.pi)
-        return data
+        return phase_analysis.shift_phase(data, shift, inplace=True)
 
     def shift_phase(self, shift:float=None, channels:Optional[list]=None) -> None:
         """This function will prompt the user with a preview of the first phase channel in memory.
@@ -7013,6 +7438,7 @@ class Scan3D(FileHandler):
 
         # export shift value to logfile
         self._write_to_logfile('phase_shift', shift)
+        self._set_operation_argument('shift', shift)
         # shift all phase channels in memory
         # could also be implemented to shift each channel individually...
         
@@ -7038,6 +7464,14 @@ class Scan3D(FileHandler):
         # create a cutplane of the data by averaging over the y axis
         # create a new data array with the averaged data
         self.all_cutplane_data = {}
+        if self.streaming:
+            # only the channels which are averaged below, all of them are read in a single pass
+            indicators = [self.amp_indicator, self.phase_indicator, self.real_indicator, self.height_indicator]
+            channels = [channel for channel in channels if any(indicator in channel for indicator in indicators)]
+            averaged_data = self._stream_y_average(channels)
+            for channel in channels:
+                self.all_cutplane_data[channel] = np.transpose(averaged_data[channel], axes=(1,0))
+            return
         for channel in channels:
             if self.amp_indicator in channel:
                 amp_data = self.all_data[channel]
@@ -7065,8 +7499,18 @@ class Scan3D(FileHandler):
         # ax.invert_yaxis()
         # plt.show()
         
-    def align_lines(self):
+    def align_lines(self, n_tries:int=5, subpixel:bool=False):
+        """Aligns the y lines of the 3D scan. Each approach curve of the height channel is averaged and all lines are compared to the first line
+        to find the shift with the lowest deviation. All channels are then shifted accordingly.
+
+        Args:
+            n_tries (int, optional): maximum shift in pixels in both directions. Defaults to 5.
+            subpixel (bool, optional): allow fractional shifts, they are applied with linear interpolation. Defaults to False.
+        """
         # idea: take the height channel and average each approach curve, then compare the averaged lines to each other and aplly a shift to align them
+        if self.streaming:
+            print('The lines can not be aligned in streaming mode, since this changes the full data cube!')
+            return
         height_data = self.all_data[self.height_channel]
         averaged_height_data = np.mean(height_data, axis=2)
         # plot the averaged height data
@@ -7075,27 +7519,17 @@ class Scan3D(FileHandler):
         ax.invert_yaxis()
         plt.show()
 
-        # get the index which minimized the deviation of the height channels
-        indices = []
-        for line in averaged_height_data:
-            # calculate the index which minimizes the deviation of the height data
-            index = realign.minimize_deviation_1d(averaged_height_data[0], line, 5, False)
-            indices.append(index)
+        # get the index which minimized the deviation of the height channels, for all lines at once
+        indices = realign.minimize_deviation_lines(averaged_height_data[0], averaged_height_data, n_tries, subpixel)
         # make a new data array with the shifted data
         # apply the shift to all channels
         XRes, YRes, ZRes = self._get_measurement_tag_dict_value(MeasurementTags.PIXELAREA)
-        # ac_zeros = np.zeros(ZRes)
         # idea: create a new data array where each approach curve is shifted by the corresponding index
         # get the biggest differnce in indices
-        max_shift = np.max(indices) - np.min(indices)
+        max_shift = int(np.ceil(np.max(indices) - np.min(indices)))
         # apply the shift to each channel
         for channel in self.channels:
-            new_data = np.zeros((YRes, XRes+max_shift, ZRes))
-            for y in range(YRes):
-                shift = indices[y] - np.min(indices)
-                for x in range(XRes):
-                    new_data[y][x+shift] = self.all_data[channel][y][x]
-            self.all_data[channel] = new_data
+            self.all_data[channel] = realign.shift_lines(self.all_data[channel], indices, axis=1)
         # self.measurement_tag_dict[MeasurementTags.PIXELAREA] = (XRes+max_shift, YRes, ZRes)
         self._set_measurement_tag_dict_value(MeasurementTags.PIXELAREA, [XRes+max_shift, YRes, ZRes])
 
@@ -7135,3 +7569,84 @@ class Scan3D(FileHandler):
         # # split_line.remove('\n')
         # return split_line.index(channel)
 
+
+######################################
+#### Replay of operation journals ####
+######################################
+
+def _initialize_replay_worker() -> None:
+    # the replay must not wait for the user, plots are not shown and matplotlib uses a non interactive backend
+    os.environ['MPLBACKEND'] = 'agg'
+    PlotDefinitions.show_plot = False
+    if plt.is_loaded():
+        plt.switch_backend('agg')
+
+def _replay_measurement(directory_name:str, records:list, channels:Optional[list]=None) -> dict:
+    """Applies the journaled operations to the measurement in the specified folder. Errors are returned instead of raised,
+    so a single failing measurement does not stop the replay of the other measurements.
+    """
+    result = {'directory_name': str(directory_name), 'success': False, 'operations': 0, 'error': None}
+    measurement = None
+    try:
+        init_arguments = {}
+        measurement_class = SnomMeasurement
+        if records and records[0]['operation'] == '__init__':
+            init_arguments = dict(records[0]['arguments'])
+            measurement_class = {'SnomMeasurement': SnomMeasurement}.get(records[0].get('class'), SnomMeasurement)
+            records = records[1:]
+        if channels is not None:
+            init_arguments['channels'] = channels
+        if 'dtype' in init_arguments:
+            init_arguments['dtype'] = np.dtype(init_arguments['dtype'])
+        measurement = measurement_class(directory_name, **init_arguments)
+        for record in records:
+            if record['operation'] == '__init__':
+                raise ValueError('The journal contains more than one session, please select a single session!')
+            measurement._replay_answers = list(record['answers'])
+            try:
+                getattr(measurement, record['operation'])(**record['arguments'])
+            finally:
+                measurement._replay_answers = None
+            result['operations'] += 1
+        result['success'] = True
+    except (Exception, SystemExit) as error:
+        # the filetype detection exits if the folder is not a known measurement, this should only fail this folder
+        result['error'] = f'{type(error).__name__}: {error}'
+    finally:
+        if measurement is not None:
+            measurement.flush_journal()
+    return result
+
+def replay_journal(journal, directory_names:list, session:Optional[str]='last', channels:Optional[list]=None, parallel:bool=True, max_workers:Optional[int]=None) -> list:
+    """Applies the operations recorded in an operation journal to other measurements, e.g. to correct many measurements like one which was corrected interactively.
+    All values the user selected interactively, like coordinates, thresholds or reference areas, and the answers to all questions are stored in the journal,
+    so the operations are replayed without any user interaction. Each measurement is processed in a separate process,
+    plots are not shown and the replayed operations are recorded in the journal of each measurement as well.
+
+    Args:
+        journal (Path or list): path to a journal file, e.g. 'python_manipulation_journal.jsonl' in the folder of the corrected measurement, or a list of records from read_journal()
+        directory_names (list): folders of the measurements to which the operations should be applied
+        session (str, optional): only used if a path is given, the session of the journal to replay, 'last' for the last session. Defaults to 'last'.
+        channels (list, optional): channels to load instead of the channels of the journaled measurement. Defaults to None.
+        parallel (bool, optional): if True several measurements are processed at the same time, otherwise one after another in a single worker process. Defaults to True.
+        max_workers (int, optional): maximum number of processes if parallel is True. Defaults to None.
+
+    Returns:
+        list: one dictionary per measurement with the keys 'directory_name', 'success', 'operations' (number of replayed operations) and 'error'
+    """
+    if isinstance(journal, list):
+        records = journal
+    else:
+        records = read_journal(journal, session)
+    not_replayable = [record['operation'] for record in records if record.get('replayable', True) is False]
+    if not_replayable:
+        raise ValueError(f'The journal contains operations which depend on data that is not stored in the journal and can not be replayed: {not_replayable}')
+    directory_names = [str(directory_name) for directory_name in directory_names]
+    if not parallel:
+        max_workers = 1
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_replay_worker) as executor:
+        results = list(executor.map(partial(_replay_measurement, records=records, channels=channels), directory_names))
+    for result in results:
+        if not result['success']:
+            print(f"Replay failed for {result['directory_name']}: {result['error']}")
+    return results
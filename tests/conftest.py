@@ -0,0 +1,62 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import os
+import sys
+import pathlib
+import pytest
+src_path = pathlib.Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+# the synthetic measurements are shared with the benchmarks
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / 'benchmarks'))
+os.environ.setdefault('MPLBACKEND', 'agg')
+from synthetic_data import create_snom_measurement
+
+'''
+Shared fixtures of the tests. The measurements are synthetic folders created with benchmarks/synthetic_data.py,
+the config, caches and journals of the package are created in a temporary home folder.
+Run the tests with 'python -m pytest' from the repository folder.
+'''
+
+PHASE_CHANNELS = ['O1P', 'O2P', 'O3P', 'R-O2P']
+AMP_CHANNELS = ['O1A', 'O2A', 'O3A', 'R-O2A']
+
+def create_measurement(folder, xres:int=48, yres:int=40, seed:int=0) -> pathlib.Path:
+    """Creates a measurement folder with the channels of PHASE_CHANNELS and AMP_CHANNELS, the mechanical channels and the height channels,
+    see create_snom_measurement of the benchmarks."""
+    return create_snom_measurement(folder, xres, yres, seed, PHASE_CHANNELS + ['M1P'] + AMP_CHANNELS + ['M1A'])
+
+@pytest.fixture(autouse=True, scope='session')
+def home_folder(tmp_path_factory):
+    # the measurements create their config, caches and journals in the home folder
+    home = tmp_path_factory.mktemp('home')
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('HOME', str(home))
+        monkeypatch.setenv('USERPROFILE', str(home))
+        yield home
+
+@pytest.fixture(autouse=True)
+def no_plots(monkeypatch):
+    from snom_analysis.lib.definitions import PlotDefinitions
+    monkeypatch.setattr(PlotDefinitions, 'show_plot', False)
+
+@pytest.fixture
+def measurement_folder(tmp_path) -> pathlib.Path:
+    return create_measurement(tmp_path / 'measurement')
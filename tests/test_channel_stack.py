@@ -0,0 +1,110 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+import pytest
+from snom_analysis.main import SnomMeasurement
+from snom_analysis.lib.channel_store import ChannelList, ChannelStack
+from conftest import PHASE_CHANNELS, AMP_CHANNELS
+
+# the stacked representation must give the same results as the list of channels
+
+CHANNELS = PHASE_CHANNELS + AMP_CHANNELS + ['Z C']
+
+def level_data_columnwise_loop(data, reduced_data):
+    # the previous per-line implementation of level_data_columnwise, without the phase shift
+    if len(reduced_data) == 1:
+        reference_data = np.mean(reduced_data[0], axis=1)
+        leveled_data = np.zeros(data.shape)
+        for i in range(data.shape[0]):
+            if i > 0:
+                mean_drift = np.mean(reference_data[i]) - np.mean(reference_data[0])
+                leveled_data[i] = data[i] - mean_drift
+            else:
+                leveled_data[i] = data[i]
+    elif len(reduced_data) == 2:
+        reference_data_left = np.mean(reduced_data[0], axis=1)
+        reference_data_right = np.mean(reduced_data[1], axis=1)
+        leveled_data = np.zeros(data.shape)
+        for i in range(data.shape[0]):
+            if i > 0:
+                mean_drift = np.mean([reference_data_left[i], reference_data_right[i]]) - np.mean([reference_data_left[0], reference_data_right[0]])
+                leveled_data[i] = data[i] - mean_drift
+            else:
+                leveled_data[i] = data[i]
+            line_drift = np.interp(np.linspace(0, 1, data.shape[1]), [0, 1], [reference_data_left[i], reference_data_right[i]])
+            line_drift = line_drift - np.mean(line_drift)
+            leveled_data[i] = leveled_data[i] - line_drift
+    return leveled_data
+
+def load_both(folder):
+    measurement_list = SnomMeasurement(folder, CHANNELS, autoscale=False)
+    measurement_stack = SnomMeasurement(folder, CHANNELS, autoscale=False, stacked=True)
+    assert isinstance(measurement_stack.all_data, ChannelStack)
+    return measurement_list, measurement_stack
+
+def assert_same_data(measurement_list, measurement_stack):
+    assert list(measurement_list.channels) == list(measurement_stack.channels)
+    for data_list, data_stack in zip(measurement_list.all_data, measurement_stack.all_data):
+        np.testing.assert_array_equal(data_list, data_stack)
+
+@pytest.mark.parametrize('operation', [
+    lambda measurement: measurement.shift_phase(shift=1.3),
+    lambda measurement: measurement.set_min_to_zero(),
+    lambda measurement: measurement.gauss_filter_channels(sigma=2),
+    lambda measurement: measurement.cut_channels(coords=[[5, 4], [30, 25]]),
+    lambda measurement: measurement.level_data_columnwise(selection=[5, 15, True, False]),
+    lambda measurement: measurement.level_data_columnwise(selection=[5, 40, True, True]),
+], ids=['shift_phase', 'set_min_to_zero', 'gauss_filter', 'cut', 'level_one_area', 'level_two_areas'])
+def test_stacked_matches_list(measurement_folder, monkeypatch, operation):
+    # the gauss filter asks whether to continue with unscaled data
+    monkeypatch.setattr(SnomMeasurement, '_user_input_bool', lambda self, *args, **kwargs: True)
+    measurement_list, measurement_stack = load_both(measurement_folder)
+    operation(measurement_list)
+    operation(measurement_stack)
+    assert_same_data(measurement_list, measurement_stack)
+
+@pytest.mark.parametrize('selection', [[5, 15, True, False], [5, 40, True, True]], ids=['one_area', 'two_areas'])
+def test_level_data_columnwise_matches_loop(measurement_folder, selection):
+    measurement = SnomMeasurement(measurement_folder, ['Z C', 'O2A'], autoscale=False)
+    for data in measurement.all_data:
+        expected = level_data_columnwise_loop(data, measurement._get_data_from_selected_range(data, *selection))
+        np.testing.assert_allclose(measurement._level_data_columnwise(data, selection), expected, rtol=1e-12, atol=1e-12*np.abs(data).max())
+    # a stack of channels is leveled like each channel on its own
+    stack = np.stack(measurement.all_data)
+    leveled_stack = measurement._level_data_columnwise(stack, selection)
+    for data, leveled in zip(measurement.all_data, leveled_stack):
+        np.testing.assert_array_equal(leveled, measurement._level_data_columnwise(data, selection))
+
+def test_channel_list_lookup():
+    channels = ChannelList(['O2A', 'O2P', 'Z C', 'O2A'])
+    assert channels.index('O2A') == 0
+    assert channels.index('Z C') == 2
+    assert channels.index('O2A', 1) == 3
+    assert 'O2P' in channels and 'O3P' not in channels
+    with pytest.raises(ValueError):
+        channels.index('O3P')
+    # the lookup follows changes of the list
+    channels.append('O3P')
+    channels[0] = 'O1A'
+    del channels[1]
+    assert channels.index('O3P') == 3
+    assert channels.index('O2A') == 2
+    assert 'O1A' in channels and 'O2P' not in channels
@@ -0,0 +1,112 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import os
+import numpy as np
+import pytest
+from snom_analysis.main import ApproachCurve, Scan3D
+from snom_analysis.lib.file_handling import read_columns, load_column_cache, save_column_cache
+from synthetic_data import TEXT_COLUMNS, create_text_measurement
+
+# the cached columns must always be identical to the columns parsed from the datafile
+
+HEADER_LENGTH = 26 # lines of the parameters header written by create_text_measurement
+
+def touch(path) -> None:
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+@pytest.fixture
+def datafile(tmp_path):
+    folder = create_text_measurement(tmp_path / 'curve', zres=200)
+    return folder / 'curve.txt'
+
+def test_cached_columns_equal_parsed_columns(tmp_path, datafile):
+    cache_folder = tmp_path / 'cache'
+    expected = read_columns(datafile, HEADER_LENGTH, TEXT_COLUMNS)
+    stat = os.stat(datafile)
+    # the columns are added in two steps, like two measurements loading different channels
+    save_column_cache(cache_folder, stat, HEADER_LENGTH, {column: expected[column] for column in TEXT_COLUMNS[:5]})
+    save_column_cache(cache_folder, stat, HEADER_LENGTH, {column: expected[column] for column in TEXT_COLUMNS[5:]})
+    header, data = load_column_cache(cache_folder, os.stat(datafile), TEXT_COLUMNS)
+    assert header == HEADER_LENGTH
+    assert list(data) == TEXT_COLUMNS
+    for column in TEXT_COLUMNS:
+        np.testing.assert_array_equal(data[column], expected[column])
+
+def test_touched_datafile_invalidates_cache(tmp_path, datafile):
+    cache_folder = tmp_path / 'cache'
+    old_stat = os.stat(datafile)
+    save_column_cache(cache_folder, old_stat, HEADER_LENGTH, read_columns(datafile, HEADER_LENGTH, ['Z', 'O2A']))
+    touch(datafile)
+    assert load_column_cache(cache_folder, os.stat(datafile), ['Z', 'O2A']) == (None, {})
+    # the columns of the new version replace the old ones
+    save_column_cache(cache_folder, os.stat(datafile), HEADER_LENGTH, {'O2A': np.arange(3.0)})
+    assert len(list(cache_folder.glob('*.npy'))) == 1
+    header, data = load_column_cache(cache_folder, os.stat(datafile), ['Z', 'O2A'])
+    assert list(data) == ['O2A']
+    # a process still writing the old version does not change the cache of the new version
+    save_column_cache(cache_folder, old_stat, HEADER_LENGTH, {'O2A': np.zeros(3)})
+    header, data = load_column_cache(cache_folder, os.stat(datafile), ['O2A'])
+    np.testing.assert_array_equal(data['O2A'], np.arange(3.0))
+
+@pytest.fixture
+def parsed_channels(monkeypatch) -> list:
+    """Records the channels which are parsed from the datafile instead of taken from the cache."""
+    parsed = []
+    for cls in (ApproachCurve, Scan3D):
+        def spy(self, datafile, *args, read_channels=cls._read_channels):
+            parsed.extend(args[-1])
+            return read_channels(self, datafile, *args)
+        monkeypatch.setattr(cls, '_read_channels', spy)
+    return parsed
+
+def test_approach_curve_cache(tmp_path, parsed_channels):
+    folder = create_text_measurement(tmp_path / 'curve')
+    expected = ApproachCurve(folder, ['M1A', 'O2A'])
+    parsed_channels.clear()
+    ApproachCurve(folder, ['M1A'], use_cache=True)
+    assert parsed_channels == ['Z', 'M1A']
+    # only the channel which is not yet cached is parsed
+    cached = ApproachCurve(folder, ['M1A', 'O2A'], use_cache=True)
+    assert parsed_channels == ['Z', 'M1A', 'O2A']
+    for channel in ['Z', 'M1A', 'O2A']:
+        np.testing.assert_array_equal(cached.all_data[channel], expected.all_data[channel])
+    touch(folder / 'curve.txt')
+    ApproachCurve(folder, ['M1A', 'O2A'], use_cache=True)
+    assert parsed_channels[3:] == ['Z', 'M1A', 'O2A']
+
+def test_scan3d_cache(tmp_path, parsed_channels):
+    folder = create_text_measurement(tmp_path / 'scan', scan='3D', xres=4, yres=3, zres=5)
+    expected = Scan3D(folder, ['Z', 'O2A'])
+    parsed_channels.clear()
+    Scan3D(folder, ['Z', 'O2A'], use_cache=True)
+    cached = Scan3D(folder, ['Z', 'O2A'], use_cache=True)
+    assert parsed_channels == ['Z', 'O2A']
+    for channel in ['Z', 'O2A']:
+        assert cached.all_data[channel].shape == (3, 4, 5)
+        np.testing.assert_array_equal(cached.all_data[channel], expected.all_data[channel])
+    # the streaming mode reads the cached channels from the memory map as well
+    streaming = Scan3D(folder, ['Z', 'O2A'], use_cache=True, streaming=True)
+    chunks = list(streaming._iter_channel_chunks(['O2A']))
+    np.testing.assert_array_equal(np.concatenate([values for channel, start, values in chunks]), expected.all_data['O2A'].ravel())
+    touch(folder / 'scan.txt')
+    Scan3D(folder, ['Z', 'O2A'], use_cache=True)
+    assert parsed_channels == ['Z', 'O2A', 'Z', 'O2A']
@@ -0,0 +1,110 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import os
+import pytest
+from snom_analysis.main import SnomMeasurement
+from snom_analysis.lib.config_profiles import parse_config_value, load_config_profiles, update_config_profiles
+
+CONFIG = '''[FILETYPE]
+name = <standard>
+channels = ['O2A', 'O2P']
+tags = {'SCAN': 'Scan'}
+scaling = 4
+enabled = True
+missing = None
+text = plain text
+'''
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text(CONFIG)
+    return path
+
+@pytest.mark.parametrize('value, expected', [
+    ('<standard>', 'standard'), ('True', True), ('False', False), ('None', None), ('4', 4), ('1.5e-3', 1.5e-3),
+    ("['O2A', 'O2P']", ['O2A', 'O2P']), ("{'SCAN': 'Scan'}", {'SCAN': 'Scan'}), ('plain text', 'plain text'),
+])
+def test_parse_config_value(value, expected):
+    assert parse_config_value(value) == expected
+
+def test_profile_values(config_path):
+    config, profiles = load_config_profiles(config_path)
+    profile = profiles['FILETYPE']
+    assert profile['name'] == 'standard'
+    assert profile['channels'] == ['O2A', 'O2P']
+    assert profile['tags'] == {'SCAN': 'Scan'}
+    assert profile['scaling'] == 4 and profile['enabled'] is True and profile['missing'] is None
+    assert profile['text'] == 'plain text'
+    assert profile.get_raw()['name'] == '<standard>'
+    # mutable values are copied, changing them does not change the profile
+    profile['channels'].append('O3A')
+    assert profile['channels'] == ['O2A', 'O2P']
+
+def test_cache(config_path):
+    config_1, profiles_1 = load_config_profiles(config_path)
+    config_2, profiles_2 = load_config_profiles(config_path)
+    # the read only profiles are shared, the config parsers are not
+    assert profiles_1 is profiles_2
+    assert config_1 is not config_2
+    config_1['FILETYPE']['scaling'] = '8'
+    assert config_2['FILETYPE']['scaling'] == '4'
+    assert load_config_profiles(config_path)[0]['FILETYPE']['scaling'] == '4'
+
+def test_cache_invalidation(config_path):
+    _, profiles = load_config_profiles(config_path)
+    config_path.write_text(CONFIG.replace('scaling = 4', 'scaling = 16'))
+    # make sure the modification time changes even on file systems with a coarse resolution
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _, profiles_changed = load_config_profiles(config_path)
+    assert profiles_changed is not profiles
+    assert profiles_changed['FILETYPE']['scaling'] == 16
+
+def test_update_config_profiles(config_path):
+    config, _ = load_config_profiles(config_path)
+    config['FILETYPE']['scaling'] = '8'
+    with open(config_path, 'w') as f:
+        config.write(f)
+    profiles = update_config_profiles(config_path, config)
+    assert profiles['FILETYPE']['scaling'] == 8
+    assert load_config_profiles(config_path)[1] is profiles
+    # later changes of the callers config do not reach the cache
+    config['FILETYPE']['scaling'] = '32'
+    assert load_config_profiles(config_path)[0]['FILETYPE']['scaling'] == '8'
+
+def test_measurements_do_not_share_config(measurement_folder):
+    measurement_1 = SnomMeasurement(measurement_folder, ['O2A'], autoscale=False)
+    measurement_2 = SnomMeasurement(measurement_folder, ['O2A'], autoscale=False)
+    section = measurement_1.file_type
+    suffix = measurement_1._get_from_config('channel_suffix_manipulated')
+    assert measurement_1.config is not measurement_2.config
+    try:
+        measurement_1._change_config('channel_suffix_manipulated', section, '_changed')
+        assert measurement_1._get_from_config('channel_suffix_manipulated') == '_changed'
+        # the second measurement keeps the config it was created with
+        assert measurement_2._get_from_config('channel_suffix_manipulated') == suffix
+        assert measurement_2.config[section]['channel_suffix_manipulated'] == f'<{suffix}>'
+        # new measurements use the changed config file
+        measurement_3 = SnomMeasurement(measurement_folder, ['O2A'], autoscale=False)
+        assert measurement_3._get_from_config('channel_suffix_manipulated') == '_changed'
+    finally:
+        measurement_1._change_config('channel_suffix_manipulated', section, suffix)
@@ -0,0 +1,81 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import os
+import pytest
+from snom_analysis.main import SnomMeasurement
+
+# the filetype is only detected again if the folder or the config changed since the last detection
+
+@pytest.fixture
+def detections(monkeypatch) -> list:
+    """Records the folders for which the filetype was detected instead of taken from the cache."""
+    detected = []
+    save_filetype_to_cache = SnomMeasurement._save_filetype_to_cache
+    def spy(self, *args, **kwargs):
+        detected.append(self.directory_name.name)
+        return save_filetype_to_cache(self, *args, **kwargs)
+    monkeypatch.setattr(SnomMeasurement, '_save_filetype_to_cache', spy)
+    return detected
+
+def open_measurement(folder) -> SnomMeasurement:
+    return SnomMeasurement(folder, ['O2A'], autoscale=False)
+
+def test_cache_hit_skips_detection(measurement_folder, detections):
+    measurement = open_measurement(measurement_folder)
+    assert detections == ['measurement']
+    cached = open_measurement(measurement_folder)
+    assert detections == ['measurement']
+    assert cached.file_type == measurement.file_type
+    assert cached.measurement_tag_dict == measurement.measurement_tag_dict
+
+def test_new_file_invalidates_cache(measurement_folder, detections):
+    open_measurement(measurement_folder)
+    (measurement_folder / 'notes.txt').write_text('a new file')
+    open_measurement(measurement_folder)
+    assert len(detections) == 2
+
+def test_touched_file_invalidates_cache(measurement_folder, detections):
+    open_measurement(measurement_folder)
+    path = measurement_folder / 'measurement O2A raw.gsf'
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    open_measurement(measurement_folder)
+    assert len(detections) == 2
+
+def test_config_change_invalidates_cache(measurement_folder, detections):
+    measurement = open_measurement(measurement_folder)
+    section = measurement.file_type
+    suffix = measurement._get_from_config('channel_suffix_manipulated')
+    try:
+        measurement._change_config('channel_suffix_manipulated', section, '_changed')
+        open_measurement(measurement_folder)
+        assert len(detections) == 2
+    finally:
+        measurement._change_config('channel_suffix_manipulated', section, suffix)
+
+def test_logfile_and_journal_do_not_invalidate_cache(measurement_folder, detections):
+    measurement = open_measurement(measurement_folder)
+    measurement.shift_phase(shift=1.3)
+    measurement.flush_journal()
+    assert (measurement_folder / 'python_manipulation_journal.jsonl').exists()
+    assert (measurement_folder / 'python_manipulation_log.txt').exists()
+    open_measurement(measurement_folder)
+    assert detections == ['measurement']
@@ -0,0 +1,80 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+import pytest
+from snom_analysis.main import SnomMeasurement
+from conftest import PHASE_CHANNELS, AMP_CHANNELS
+
+# the float32 mode must stay in single precision and agree with the float64 mode
+# the deviation is measured relative to the largest absolute value of each channel,
+# single precision has a resolution of about 6e-8, so 1e-6 leaves room for a few rounding steps
+
+RTOL = 1e-6
+CHANNELS = PHASE_CHANNELS + AMP_CHANNELS + ['Z C', 'R-Z C']
+
+def assert_close_to_float64(measurement_32, measurement_64):
+    assert list(measurement_32.channels) == list(measurement_64.channels)
+    for data_32, data_64 in zip(measurement_32.all_data, measurement_64.all_data):
+        assert data_32.dtype == np.float32
+        assert data_64.dtype == np.float64
+        assert data_32.shape == data_64.shape
+        scale = np.nanmax(np.abs(data_64))
+        np.testing.assert_allclose(data_32, data_64, rtol=0, atol=RTOL*scale)
+
+def load(folder, dtype, **kwargs):
+    return SnomMeasurement(folder, CHANNELS, autoscale=False, dtype=dtype, **kwargs)
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}, {'stacked': True}, {'parallel': True}], ids=['gsf', 'lazy', 'stacked', 'parallel'])
+def test_loaders(measurement_folder, options):
+    assert_close_to_float64(load(measurement_folder, np.float32, **options), load(measurement_folder, np.float64, **options))
+
+def test_unsupported_dtype(measurement_folder):
+    with pytest.raises(ValueError):
+        SnomMeasurement(measurement_folder, ['O2A'], dtype=np.int32)
+
+@pytest.mark.parametrize('operation', [
+    lambda measurement: measurement.scale_channels(scaling=2),
+    lambda measurement: measurement.scale_channels(scaling=2, method='bilinear'),
+    lambda measurement: measurement.gauss_filter_channels(sigma=1.5),
+    lambda measurement: measurement.shift_phase(shift=1.3),
+    lambda measurement: measurement.realign(['Z C', 'O2A', 'O2P'], bounds=[10, 30], axis=1),
+    lambda measurement: measurement.level_data_columnwise(selection=[5, 40, True, True]),
+    lambda measurement: measurement.set_min_to_zero(),
+    lambda measurement: measurement.cut_channels(coords=[[5, 4], [30, 25]]),
+], ids=['scale_nearest', 'scale_bilinear', 'gauss_filter', 'shift_phase', 'realign', 'level_columnwise', 'set_min_to_zero', 'cut'])
+def test_operations(measurement_folder, monkeypatch, operation):
+    # the gauss filter asks whether to continue with unscaled data
+    monkeypatch.setattr(SnomMeasurement, '_user_input_bool', lambda self, *args, **kwargs: True)
+    measurement_32 = load(measurement_folder, np.float32)
+    measurement_64 = load(measurement_folder, np.float64)
+    operation(measurement_32)
+    operation(measurement_64)
+    assert_close_to_float64(measurement_32, measurement_64)
+
+def test_gsf_round_trip(measurement_folder):
+    # the gsf files store float32 values, so saving and loading float32 data does not change it
+    measurement = load(measurement_folder, np.float32)
+    measurement.shift_phase(shift=1.3)
+    measurement.save_to_gsf(appendix='_roundtrip')
+    reloaded = SnomMeasurement(measurement_folder, [channel + '_roundtrip' for channel in CHANNELS], autoscale=False, dtype=np.float32)
+    for data, data_reloaded in zip(measurement.all_data, reloaded.all_data):
+        assert data_reloaded.dtype == np.float32
+        np.testing.assert_allclose(data_reloaded, data, rtol=0, atol=RTOL*np.abs(data).max())
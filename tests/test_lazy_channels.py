@@ -0,0 +1,115 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+from snom_analysis.main import SnomMeasurement
+from snom_analysis.lib.channel_store import LazyChannelData
+from conftest import PHASE_CHANNELS, AMP_CHANNELS
+
+SIZE = 1000 # values per channel
+# room for two decoded channels
+BUDGET = 2.5*SIZE*8/1024**3
+
+def create_lazy_data(n_channels:int=4, memory_budget=BUDGET) -> tuple:
+    """Returns the lazy container and the number of calls of each loader."""
+    calls = [0]*n_channels
+    def get_loader(index):
+        def loader():
+            calls[index] += 1
+            return np.full(SIZE, float(index))
+        return loader
+    all_data = LazyChannelData(memory_budget)
+    for index in range(n_channels):
+        all_data.append_loader(get_loader(index))
+    return all_data, calls
+
+def get_loaded(all_data) -> list:
+    return [index for index in range(len(all_data)) if all_data.is_loaded(index)]
+
+def test_channels_are_decoded_on_first_access():
+    all_data, calls = create_lazy_data()
+    assert get_loaded(all_data) == []
+    assert all_data[1][0] == 1
+    assert get_loaded(all_data) == [1]
+    assert all_data[1][0] == 1
+    assert calls == [0, 1, 0, 0]
+
+def test_least_recently_used_channel_is_evicted():
+    all_data, calls = create_lazy_data()
+    all_data[0]
+    all_data[1]
+    # channel 0 is used again, so channel 1 is now the least recently used one
+    all_data[0]
+    all_data[2]
+    assert get_loaded(all_data) == [0, 2]
+    all_data[3]
+    assert get_loaded(all_data) == [2, 3]
+    assert all_data.memory_usage() <= BUDGET*1024**3
+
+def test_evicted_channels_are_decoded_again():
+    all_data, calls = create_lazy_data()
+    for index in range(4):
+        all_data[index]
+    assert not all_data.is_loaded(0)
+    np.testing.assert_array_equal(all_data[0], np.full(SIZE, 0.0))
+    assert calls[0] == 2
+    # all unchanged channels can be dropped explicitly
+    all_data.evict()
+    assert get_loaded(all_data) == []
+
+def test_changed_channels_are_kept():
+    all_data, calls = create_lazy_data()
+    all_data[0][5] = 42
+    all_data[1] = np.full(SIZE, 7.0)
+    for index in range(2, 4):
+        all_data[index]
+    # the channel changed in place and the assigned channel are never dropped
+    assert all_data.is_loaded(0) and all_data.is_loaded(1)
+    assert all_data[0][5] == 42 and all_data[1][0] == 7
+    all_data.evict()
+    assert get_loaded(all_data) == [0, 1]
+    assert calls[0] == 1
+
+def test_referenced_channels_are_kept():
+    all_data, calls = create_lazy_data()
+    data = all_data[0]
+    for index in range(1, 4):
+        all_data[index]
+    all_data.evict(0)
+    assert all_data.is_loaded(0)
+    # changes of the caller after the other channels were loaded are not lost
+    data[5] = 42
+    del data
+    assert all_data[0][5] == 42
+    assert calls[0] == 1
+
+def test_lazy_measurement(measurement_folder):
+    channels = PHASE_CHANNELS + AMP_CHANNELS + ['Z C']
+    measurement = SnomMeasurement(measurement_folder, channels, autoscale=False)
+    # room for two of the 48x40 channels
+    lazy_measurement = SnomMeasurement(measurement_folder, channels, autoscale=False, lazy=True, memory_budget=2.5*48*40*8/1024**3)
+    assert isinstance(lazy_measurement.all_data, LazyChannelData)
+    for index in range(len(channels)):
+        np.testing.assert_array_equal(lazy_measurement.all_data[index], measurement.all_data[index])
+    assert sum(lazy_measurement.all_data.is_loaded(index) for index in range(len(channels))) <= 2
+    lazy_measurement.shift_phase(shift=1.3)
+    measurement.shift_phase(shift=1.3)
+    for index in range(len(channels)):
+        np.testing.assert_array_equal(lazy_measurement.all_data[index], measurement.all_data[index])
@@ -0,0 +1,50 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import sys
+import matplotlib
+from snom_analysis import main
+from snom_analysis.main import SnomMeasurement
+from snom_analysis.lib.lazy_imports import LazyModule
+
+# hooks of a placeholder must also run if the module is imported elsewhere after the placeholder was created
+
+def test_hook_runs_for_module_imported_later(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    module = LazyModule('colorsys')
+    calls = []
+    module.set_import_hook('first', calls.append)
+    assert calls == [] and not module.is_loaded()
+    import colorsys
+    module.set_import_hook('second', calls.append)
+    assert module.is_loaded()
+    assert calls == [colorsys, colorsys]
+
+def test_mpl_style_is_applied_to_user_plots(measurement_folder, monkeypatch):
+    # the package was imported before pyplot, like 'import snom_analysis' followed by 'import matplotlib.pyplot as plt'
+    monkeypatch.setattr(main, 'plt', LazyModule('matplotlib.pyplot'))
+    import matplotlib.pyplot
+    try:
+        matplotlib.rcdefaults()
+        assert matplotlib.rcParams['xtick.direction'] == 'out'
+        SnomMeasurement(measurement_folder, ['O2A'], autoscale=False)
+        assert matplotlib.rcParams['xtick.direction'] == 'in'
+    finally:
+        matplotlib.rcdefaults()
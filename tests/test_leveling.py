@@ -0,0 +1,166 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+import pytest
+from snom_analysis.main import SnomMeasurement, _replay_measurement
+from snom_analysis.lib import leveling
+from snom_analysis.lib.operation_journal import read_journal
+from conftest import create_measurement
+
+# the previous per-pixel implementation of the 3 point leveling, the vectorized version must be equal within float rounding
+
+def get_mean_value_loop(data, x_coord, y_coord, zone):
+    xres = len(data[0])
+    yres = len(data)
+    size = 2*zone + 1
+    mean = 0
+    count = 0
+    for y in range(size):
+        for x in range(size):
+            y_pixel = int(y_coord -(size-1)/2 + y)
+            x_pixel = int(x_coord -(size-1)/2 + x)
+            if 0 <= x_pixel < xres and 0 <= y_pixel < yres:
+                mean += data[y_pixel][x_pixel]
+                count += 1
+    return mean/count
+
+def level_three_points_loop(height_data, coords, zone=1):
+    mean_values = [get_mean_value_loop(height_data, coords[i][0], coords[i][1], zone) for i in range(len(coords))]
+    matrix = [[coords[i][0], coords[i][1], mean_values[i]] for i in range(3)]
+    solution = np.linalg.solve(matrix, [100, 100, 100])
+    yres = len(height_data)
+    xres = len(height_data[0])
+    leveled_height_data = np.zeros((yres, xres))
+    for y in range(yres):
+        for x in range(xres):
+            leveled_height_data[y][x] = height_data[y][x] + (solution[0]*x + solution[1]*y)/solution[2]
+    return leveled_height_data
+
+def tilted_data(seed=0, yres=40, xres=48):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:yres, 0:xres]
+    return 3 + 0.2*x - 0.1*y + 0.01*rng.standard_normal((yres, xres))
+
+@pytest.mark.parametrize('coords', [[[3, 4], [40, 8], [20, 35]], [[0, 0], [47, 0], [0, 39]]], ids=['inside', 'corners'])
+@pytest.mark.parametrize('zone', [0, 1, 2])
+def test_three_points_matches_loop(coords, zone):
+    data = tilted_data()
+    expected = level_three_points_loop(data, coords, zone)
+    leveled = leveling.level_three_points(data, coords, zone)
+    np.testing.assert_allclose(leveled, expected, rtol=1e-12, atol=1e-12*np.abs(data).max())
+    # the plane is removed, at the borders the zone means are shifted by the tilt since they only contain part of the zone
+    if coords[0] == [3, 4]:
+        assert np.std(leveled) < 0.05
+
+def test_three_points_stack():
+    stack = np.stack([tilted_data(seed) for seed in range(3)])
+    coords = [[3, 4], [40, 8], [20, 35]]
+    leveled = leveling.level_three_points(stack, coords)
+    for data, leveled_data in zip(stack, leveled):
+        np.testing.assert_allclose(leveled_data, level_three_points_loop(data, coords), rtol=1e-12, atol=1e-12*np.abs(data).max())
+
+def test_level_height_channels_3point(measurement_folder):
+    coords = [[3, 4], [40, 8], [20, 35]]
+    measurement = SnomMeasurement(measurement_folder, ['Z C', 'O2A'], autoscale=False)
+    height = np.array(measurement.all_data[0])
+    amplitude = np.array(measurement.all_data[1])
+    measurement.level_height_channels_3point(coords=coords)
+    np.testing.assert_allclose(measurement.all_data[0], level_three_points_loop(height, coords), rtol=1e-12, atol=1e-12*np.abs(height).max())
+    # only height channels are leveled
+    np.testing.assert_array_equal(measurement.all_data[1], amplitude)
+
+@pytest.mark.parametrize('clicks', [{'Z C': [[3, 4], [40, 8], [20, 35]], 'R-Z C': [[5, 30], [44, 36], [25, 2]]}, {'Z C': [[3, 4], [40, 8], [20, 35]], 'R-Z C': []}], ids=['both', 'declined'])
+def test_replay_interactive_3point(tmp_path, monkeypatch, clicks):
+    source = create_measurement(tmp_path / 'source', seed=1)
+    target = create_measurement(tmp_path / 'target', seed=2)
+    channels = ['Z C', 'R-Z C']
+    # each height channel is shown separately, an empty selection is declined by the user
+    selections = list(clicks.values())
+    monkeypatch.setattr(SnomMeasurement, '_get_klicker_coordinates', lambda self, *args, **kwargs: selections.pop(0))
+    monkeypatch.setattr(SnomMeasurement, '_user_input_bool', lambda self, *args, **kwargs: False)
+    measurement = SnomMeasurement(source, channels, autoscale=False)
+    measurement.level_height_channels_3point()
+    assert selections == []
+    leveled_channels = {channel: coords for channel, coords in clicks.items() if len(coords) == 3}
+    assert read_journal(source / 'python_manipulation_journal.jsonl')[-1]['arguments']['coords'] == leveled_channels
+    # keep the replayed measurement, a replay asking for new points fails since no selections are left
+    replayed_measurements = []
+    flush_journal = SnomMeasurement.flush_journal
+    def spy(self):
+        replayed_measurements.append(self)
+        return flush_journal(self)
+    monkeypatch.setattr(SnomMeasurement, 'flush_journal', spy)
+    # replay_journal runs the replay in a worker process, the replay of a single measurement is run here to get the replayed data
+    result = _replay_measurement(target, read_journal(source / 'python_manipulation_journal.jsonl'))
+    assert result['success'] and result['operations'] == 1
+    # the replay levels every channel with its own points and leaves the declined channel unchanged
+    replayed = replayed_measurements[-1]
+    original = SnomMeasurement(target, channels, autoscale=False)
+    for index, channel in enumerate(channels):
+        height = original.all_data[index]
+        expected = level_three_points_loop(height, clicks[channel]) if channel in leveled_channels else height
+        np.testing.assert_allclose(replayed.all_data[index], expected, rtol=1e-12, atol=1e-12*np.abs(height).max())
+        assert replayed.channels_label[index].endswith('_leveled') == (channel in leveled_channels)
+
+@pytest.mark.parametrize('order', [0, 1, 2, 3])
+def test_polynomial_removes_background(order):
+    yres, xres = 40, 48
+    y, x = np.mgrid[0:yres, 0:xres]/10
+    backgrounds = [np.full((yres, xres), 2.0), 2 + 0.3*x - 0.2*y, 2 + 0.3*x - 0.2*y + 0.05*x**2 - 0.1*x*y, 1 + 0.1*x**3 - 0.02*y**2*x]
+    background = backgrounds[order]
+    np.testing.assert_allclose(leveling.level_polynomial(background, order), 0, atol=1e-10)
+    # a lower order can not remove the background completely
+    if order > 0:
+        assert np.abs(leveling.level_polynomial(background, order - 1)).max() > 1e-3
+
+def test_polynomial_mask_and_nan():
+    yres, xres = 40, 48
+    y, x = np.mgrid[0:yres, 0:xres]
+    plane = 0.3*x - 0.2*y
+    data = plane.copy()
+    # a structure on the substrate is excluded from the fit with the mask
+    data[10:20, 10:25] += 5
+    mask = np.ones((yres, xres))
+    mask[10:20, 10:25] = 0
+    leveled = leveling.level_polynomial(data, 1, mask)
+    np.testing.assert_allclose(leveled[mask != 0], 0, atol=1e-10)
+    np.testing.assert_allclose(leveled[mask == 0], 5, atol=1e-10)
+    # pixels which are not finite are ignored and stay not finite
+    data = plane.copy()
+    data[5, 7] = np.nan
+    leveled = leveling.level_polynomial(data, 1)
+    assert np.isnan(leveled[5, 7])
+    np.testing.assert_allclose(leveled[np.isfinite(data)], 0, atol=1e-10)
+    # each channel of a stack with different valid pixels is fitted separately
+    stack = np.stack([data, plane + 1])
+    np.testing.assert_allclose(np.nan_to_num(leveling.level_polynomial(stack, 1)), 0, atol=1e-10)
+    with pytest.raises(ValueError):
+        leveling.level_polynomial(data, 2, np.zeros((yres, xres)))
+
+def test_level_height_channels(measurement_folder):
+    measurement = SnomMeasurement(measurement_folder, ['Z C', 'R-Z C', 'O2A'], autoscale=False)
+    amplitude = np.array(measurement.all_data[2])
+    measurement.level_height_channels(order=1)
+    for channel in ['Z C', 'R-Z C']:
+        data = measurement.all_data[measurement.channels.index(channel)]
+        np.testing.assert_allclose(data, leveling.level_polynomial(measurement._load_data([channel])[0][0], 1), rtol=1e-12, atol=1e-12)
+        assert measurement.channels_label[measurement.channels.index(channel)].endswith('_leveled')
+    np.testing.assert_array_equal(measurement.all_data[2], amplitude)
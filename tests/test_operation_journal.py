@@ -0,0 +1,95 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+import pytest
+from snom_analysis.main import SnomMeasurement, replay_journal
+from snom_analysis.lib.operation_journal import read_journal
+from conftest import create_measurement
+
+JOURNAL = 'python_manipulation_journal.jsonl'
+
+def get_operations(folder) -> list:
+    return [record['operation'] for record in read_journal(folder / JOURNAL)]
+
+def test_init_is_a_single_record(measurement_folder):
+    measurement = SnomMeasurement(measurement_folder, ['O2A', 'O2P'], autoscale=False)
+    measurement.shift_phase(shift=1.3)
+    # loading the channels during the creation is part of the __init__ record
+    assert get_operations(measurement_folder) == ['__init__', 'shift_phase']
+
+def test_replay_skips_bad_folders(tmp_path):
+    source = create_measurement(tmp_path / 'source', seed=1)
+    target = create_measurement(tmp_path / 'target', seed=2)
+    unknown = tmp_path / 'unknown'
+    unknown.mkdir()
+    (unknown / 'notes.txt').write_text('not a measurement')
+    measurement = SnomMeasurement(source, ['O2A', 'O2P'], autoscale=False)
+    measurement.shift_phase(shift=1.3)
+    measurement.set_min_to_zero()
+    results = replay_journal(source / JOURNAL, [unknown, target], parallel=False)
+    # the unknown folder only fails itself, the measurement after it is still processed
+    assert not results[0]['success']
+    assert 'SystemExit' in results[0]['error']
+    assert results[1]['success'] and results[1]['operations'] == 2
+    assert get_operations(target) == ['__init__', 'shift_phase', 'set_min_to_zero']
+
+def test_replay_initialize_channels(tmp_path):
+    source = create_measurement(tmp_path / 'source', seed=1)
+    target = create_measurement(tmp_path / 'target', seed=2)
+    measurement = SnomMeasurement(source, ['O2A'], autoscale=False)
+    measurement.initialize_channels(['O3A', 'O3P', 'Z C'])
+    measurement.shift_phase(shift=1.3)
+    results = replay_journal(source / JOURNAL, [target], parallel=False)
+    assert results[0]['success'] and results[0]['operations'] == 2
+    records = read_journal(target / JOURNAL)
+    assert [record['operation'] for record in records] == ['__init__', 'initialize_channels', 'shift_phase']
+    assert records[1]['arguments']['channels'] == ['O3A', 'O3P', 'Z C']
+    # the replayed measurement ends with the same channels and the same processing
+    replayed = SnomMeasurement(target, ['O3A', 'O3P', 'Z C'], autoscale=False)
+    replayed.shift_phase(shift=1.3)
+    reference = SnomMeasurement(target, ['O3A', 'O3P', 'Z C'], autoscale=False)
+    reference.initialize_channels(['O3A', 'O3P', 'Z C'])
+    reference.shift_phase(shift=1.3)
+    for data, data_reference in zip(replayed.all_data, reference.all_data):
+        np.testing.assert_array_equal(data, data_reference)
+
+def test_arguments_are_recorded_before_the_call(measurement_folder, monkeypatch):
+    monkeypatch.setattr(SnomMeasurement, '_user_input_bool', lambda self, *args, **kwargs: False)
+    measurement = SnomMeasurement(measurement_folder, ['O2A', 'O2P'], autoscale=False)
+    reference_area = [None, None]
+    measurement.correct_amplitude_drift_nonlinear(reference_area=reference_area)
+    # the operation fills in the borders of the list, the journal keeps the arguments of the call
+    assert reference_area != [None, None]
+    record = read_journal(measurement_folder / JOURNAL)[-1]
+    assert record['operation'] == 'correct_amplitude_drift_nonlinear'
+    assert record['arguments']['reference_area'] == [None, None]
+
+def test_create_new_channel_is_not_replayable(tmp_path):
+    source = create_measurement(tmp_path / 'source', seed=1)
+    target = create_measurement(tmp_path / 'target', seed=2)
+    measurement = SnomMeasurement(source, ['O2A'], autoscale=False)
+    measurement.create_new_channel(np.zeros((40, 48)), 'O2A_zero', measurement.channel_tag_dict[0])
+    record = read_journal(source / JOURNAL)[-1]
+    assert record['operation'] == 'create_new_channel'
+    assert record['replayable'] is False
+    assert 'data' not in record['arguments'] and record['arguments']['channel_name'] == 'O2A_zero'
+    with pytest.raises(ValueError):
+        replay_journal(source / JOURNAL, [target], parallel=False)
@@ -0,0 +1,100 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+import pytest
+from skimage.measure import profile_line
+from snom_analysis.main import SnomMeasurement
+from snom_analysis.lib import profile
+from snom_analysis.lib.definitions import Definitions
+
+# the sampling must match skimage.measure.profile_line and the previous per-pixel implementation of _get_profile
+
+def get_profile_loop(data, coordinates, orientation, width):
+    YRes = len(data)
+    XRes = len(data[0])
+    all_profiles = []
+    for coord in coordinates:
+        values = []
+        if orientation == Definitions.vertical:
+            for y in range(YRes):
+                value = 0
+                for x in range(int(coord[0] - width/2), int(coord[0] + width/2)):
+                    value += data[y][x]
+                values.append(value/width)
+        if orientation == Definitions.horizontal:
+            for x in range(XRes):
+                value = 0
+                for y in range(int(coord[1] - width/2), int(coord[1] + width/2)):
+                    value += data[y][x]
+                values.append(value/width)
+        all_profiles.append(values)
+    return all_profiles
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).random((40, 48))
+
+@pytest.mark.parametrize('start, end', [([5, 3], [40, 30]), ([40.5, 2.2], [3.7, 36.1]), ([10, 5], [10, 35]), ([2, 20], [45, 20]), ([0, 0], [47, 39])])
+@pytest.mark.parametrize('width', [1, 2, 5])
+def test_sampler_matches_skimage(data, start, end, width):
+    # skimage uses (row, column) coordinates, the cutlines use [x, y]
+    expected = profile_line(data, (start[1], start[0]), (end[1], end[0]), linewidth=width, order=1, mode='reflect', reduce_func=np.mean)
+    np.testing.assert_allclose(profile.get_profile(data, start, end, width), expected, rtol=0, atol=1e-12)
+
+@pytest.mark.parametrize('orientation', [Definitions.vertical, Definitions.horizontal])
+@pytest.mark.parametrize('width', [1, 4, 5, 10])
+def test_get_profile_matches_loop(measurement_folder, orientation, width):
+    measurement = SnomMeasurement(measurement_folder, ['Z C'], autoscale=False)
+    data = measurement.all_data[0]
+    coordinates = [[12, 9], [20.7, 17.3], [33.4, 25.6]]
+    expected = get_profile_loop(data, coordinates, orientation, width)
+    np.testing.assert_allclose(measurement._get_profile(data, coordinates, orientation, width), expected, rtol=1e-12, atol=1e-12*np.abs(data).max())
+
+def test_profiles_are_padded_with_nan(data):
+    cutlines = [[[0, 0], [30, 0], 1], [[0, 5], [10, 5], 3]]
+    sampler = profile.ProfileSampler(cutlines, data.shape)
+    profiles = sampler.sample(data)
+    assert list(sampler.lengths) == [31, 11]
+    assert profiles.shape == (2, 31)
+    assert np.all(np.isfinite(profiles[0])) and np.all(np.isfinite(profiles[1, :11]))
+    assert np.all(np.isnan(profiles[1, 11:]))
+    # with a fixed number of points all profiles have the same length
+    profiles = profile.get_profiles(data, cutlines, n_points=20)
+    assert profiles.shape == (2, 20) and np.all(np.isfinite(profiles))
+
+def test_sampler_errors(data):
+    with pytest.raises(ValueError):
+        profile.ProfileSampler([[[0, 0], [10, 10], 0]], data.shape)
+    sampler = profile.ProfileSampler([[[0, 0], [10, 10]]], data.shape)
+    with pytest.raises(ValueError):
+        sampler.sample(data[:20])
+
+def test_extract_profiles_stack(measurement_folder):
+    channels = ['Z C', 'O2A', 'O2P']
+    measurement = SnomMeasurement(measurement_folder, channels, autoscale=False)
+    cutlines = [[[5, 3], [40, 30], 3], [[10, 5], [10, 35], 1], [[2, 20], [20, 20], 5]]
+    profiles = measurement.extract_profiles(cutlines)
+    assert profiles.shape == (3, 3, profile.get_cutline_length([5, 3], [40, 30]))
+    for channel, channel_profiles in zip(channels, profiles):
+        np.testing.assert_array_equal(channel_profiles, profile.get_profiles(measurement.all_data[measurement.channels.index(channel)], cutlines))
+    # the profiles of the first channel are kept for the display functions
+    np.testing.assert_array_equal(measurement.profiles, profiles[0])
+    assert measurement.profile_orientation == Definitions.cutline
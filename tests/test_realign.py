@@ -0,0 +1,101 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import numpy as np
+import pytest
+from scipy.interpolate import interp1d
+from snom_analysis.main import SnomMeasurement
+from snom_analysis.lib.additional_functions import mean_index_array, mean_index_arrays
+from snom_analysis.lib import realign
+
+# the previous per-column and per-pixel implementations, the vectorized versions must return the same results
+
+def mean_index_loop(array, interpolation=4):
+    x = np.arange(len(array))
+    xn = np.linspace(0, len(array)-1, len(array)*interpolation)
+    array_interp = interp1d(x, array, kind='cubic')(xn)
+    mean = 0
+    half_area = np.sum(array_interp)/2
+    lower_sum = 0
+    for i in range(len(array_interp)):
+        if lower_sum + array_interp[i] <= half_area:
+            lower_sum += array_interp[i]
+            mean = i
+        else:
+            break
+    return mean/interpolation
+
+def shift_data_loop(data, axis, shifts):
+    shifts = [round(element) for element in shifts]
+    YRes = len(data)
+    XRes = len(data[0])
+    min_shift = round(min(shifts))
+    max_shift = round(max(shifts))
+    if axis == 1:
+        data_shifted = np.zeros((YRes + int(abs(min_shift-max_shift)), XRes))
+        for x in range(XRes):
+            shift = int(-shifts[x] + abs(max_shift))
+            for y in range(YRes):
+                data_shifted[y + shift][x] = data[y][x]
+    elif axis == 0:
+        data_shifted = np.zeros((YRes, XRes + int(abs(min_shift-max_shift))))
+        for y in range(YRes):
+            shift = int(-shifts[y] + abs(max_shift))
+            for x in range(XRes):
+                data_shifted[y][x + shift] = data[y][x]
+    return data_shifted
+
+def test_mean_index_arrays_matches_spline_loop():
+    rng = np.random.default_rng(0)
+    positions = np.arange(30)
+    peaks = np.exp(-(positions - rng.uniform(5, 25, (100, 1)))**2/rng.uniform(2, 20, (100, 1)))
+    profiles = np.concatenate([rng.random((100, 30)), peaks])
+    expected = [mean_index_loop(profile) for profile in profiles]
+    np.testing.assert_array_equal(mean_index_arrays(profiles), expected)
+
+def test_mean_index_array_of_single_profile():
+    profile = np.random.default_rng(1).random(25)
+    mean = mean_index_array(profile)
+    assert isinstance(mean, float)
+    assert mean == mean_index_loop(profile)
+
+@pytest.mark.parametrize('axis', [0, 1])
+def test_shift_data_matches_loop(measurement_folder, axis):
+    measurement = SnomMeasurement(measurement_folder, channels=['O2A', 'Z C'], autoscale=False)
+    data = np.asarray(measurement.all_data[0])
+    n_lines = data.shape[1] if axis == 1 else data.shape[0]
+    shifts = np.random.default_rng(2).uniform(-4, 6, n_lines)
+    np.testing.assert_array_equal(measurement._shift_data(data, axis, shifts), shift_data_loop(data, axis, shifts))
+
+@pytest.mark.parametrize('axis', [0, 1])
+def test_shift_data_of_stack_matches_single_channels(measurement_folder, axis):
+    measurement = SnomMeasurement(measurement_folder, channels=['O2A', 'O2P', 'Z C'], autoscale=False)
+    stack = np.stack([np.asarray(data) for data in measurement.all_data])
+    shifts = np.random.default_rng(3).uniform(-3, 3, stack.shape[2] if axis == 1 else stack.shape[1])
+    shifted_stack = measurement._shift_data(stack, axis, shifts)
+    for data, shifted in zip(stack, shifted_stack):
+        np.testing.assert_array_equal(shifted, measurement._shift_data(data, axis, shifts))
+
+def test_subpixel_shift_keeps_line_sums():
+    data = np.random.default_rng(4).random((20, 30))
+    shifts = np.random.default_rng(5).uniform(-2.5, 2.5, 20)
+    shifted = realign.shift_lines(data, shifts, axis=1)
+    assert shifted.shape == (20, 30 + int(np.ceil(np.max(shifts - np.min(shifts)))))
+    np.testing.assert_allclose(np.sum(shifted, axis=1), np.sum(data, axis=1), rtol=1e-12)
@@ -0,0 +1,127 @@
+##############################################################################
+# Copyright (C) 2020-2025 Hans-Joachim Schill
+
+# This file is part of snom_analysis.
+
+# snom_analysis is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# snom_analysis is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with snom_analysis.  If not, see <http://www.gnu.org/licenses/>.
+##############################################################################
+
+
+import multiprocessing
+import pickle as pkl
+import numpy as np
+import pytest
+from snom_analysis.lib.subplot_registry import SubplotRegistry, get_subplot_registry
+
+# every change is written through one registry and read back through a fresh registry on the same journal, like in a later session
+
+def create_subplot(number:int) -> dict:
+    return {'data': np.full((4, 5), float(number)), 'cmap': 'viridis', 'label': 'label', 'title': f'subplot {number}', 'scalebar': None}
+
+def get_titles(registry) -> list:
+    return [subplot['title'] for subplot in registry.get_all()]
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'all_subplots.journal'
+
+def test_operations_are_persisted(path):
+    registry = SubplotRegistry(path)
+    for number in range(5):
+        registry.append(create_subplot(number))
+    registry.remove([1, 3])
+    registry.swap(0, 2)
+    registry.pop()
+    registry.append(create_subplot(5))
+    expected = ['subplot 4', 'subplot 2', 'subplot 5']
+    assert get_titles(registry) == expected
+    subplots = SubplotRegistry(path).get_all()
+    assert [subplot['title'] for subplot in subplots] == expected
+    np.testing.assert_array_equal(subplots[0]['data'], create_subplot(4)['data'])
+    assert subplots[0]['cmap'] == 'viridis' and subplots[0]['scalebar'] is None
+
+def test_changes_of_other_instances_are_read(path):
+    first = SubplotRegistry(path)
+    second = SubplotRegistry(path)
+    first.append(create_subplot(0))
+    second.append(create_subplot(1))
+    first.append(create_subplot(2))
+    assert get_titles(second) == ['subplot 0', 'subplot 1', 'subplot 2']
+    second.remove([0])
+    first.swap(0, 1)
+    assert get_titles(first) == get_titles(second) == ['subplot 2', 'subplot 1']
+    assert get_titles(SubplotRegistry(path)) == ['subplot 2', 'subplot 1']
+    # a cleared journal is noticed as well
+    first.clear()
+    assert not path.exists()
+    assert len(second) == 0
+
+def test_compaction(path):
+    registry = SubplotRegistry(path)
+    registry.append(create_subplot(0))
+    for number in range(1, 40):
+        registry.append(create_subplot(number))
+        registry.pop()
+    # the journal only contains the remaining subplot after it was rewritten
+    assert registry._outdated_records <= 16
+    assert path.stat().st_size < 10*len(pkl.dumps(create_subplot(0)))
+    assert get_titles(SubplotRegistry(path)) == ['subplot 0']
+
+def test_incomplete_last_record(path):
+    registry = SubplotRegistry(path)
+    registry.append(create_subplot(0))
+    registry.append(create_subplot(1))
+    size = path.stat().st_size
+    registry.append(create_subplot(2))
+    # a process was killed while writing the last record
+    with open(path, 'r+b') as file:
+        file.truncate(size + 20)
+    reader = SubplotRegistry(path)
+    assert get_titles(reader) == ['subplot 0', 'subplot 1']
+    # the incomplete record is replaced by the next record, the complete records are kept
+    reader.append(create_subplot(3))
+    assert get_titles(SubplotRegistry(path)) == ['subplot 0', 'subplot 1', 'subplot 3']
+
+def append_subplots(path, first_number:int, count:int) -> None:
+    registry = SubplotRegistry(path)
+    for number in range(first_number, first_number + count):
+        registry.append(create_subplot(number))
+        if number % 3 == 0:
+            registry.swap(0, len(registry) - 1)
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='needs the fork start method')
+def test_concurrent_processes(path):
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=append_subplots, args=(path, 100*i, 30)) for i in range(8)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+    # no process lost the records of the others
+    titles = get_titles(SubplotRegistry(path))
+    assert sorted(titles) == sorted(f'subplot {100*i + number}' for i in range(8) for number in range(30))
+
+def test_legacy_subplots_are_imported_once(tmp_path, path):
+    legacy_path = tmp_path / 'all_subplots.p'
+    with open(legacy_path, 'wb') as file:
+        pkl.dump([create_subplot(0), create_subplot(1)], file)
+    registry = get_subplot_registry(path, legacy_path)
+    assert get_titles(registry) == ['subplot 0', 'subplot 1']
+    assert not legacy_path.exists()
+    assert (tmp_path / 'all_subplots.p.migrated').exists()
+    registry.clear()
+    # the deleted subplots do not come back
+    assert not SubplotRegistry(path).import_legacy_file(legacy_path)
+    assert get_titles(SubplotRegistry(path)) == []